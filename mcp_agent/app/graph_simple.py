@@ -11,7 +11,7 @@ from typing_extensions import Annotated
 import operator
 from .prompts.creator_prompt import get_unified_creator_prompt
 from langgraph.prebuilt.chat_agent_executor import AgentState
-from .utils.artifact_functions import get_artifact_files, artifact_exists
+from .utils.artifact_repository import get_artifact_repository
 import logging
 from .prompt import get_test_prompt
 
@@ -38,8 +38,9 @@ class MyAgentState(AgentState):
         # If we have an artifact_id but no files loaded, load them
         if self.get("artifact_id") and not self.get("files"):
             try:
-                if artifact_exists(self.get("artifact_id")):
-                    files = get_artifact_files(self.get("artifact_id"))
+                repository = get_artifact_repository()
+                if repository.exists(self.get("artifact_id")):
+                    files = repository.file_paths(self.get("artifact_id"))
                     # Update the state with loaded files
                     self["files"] = files
                     logger.info(f"Loaded {len(files)} files for artifact {self.get('artifact_id')}")
@@ -17,11 +17,11 @@
 ####################################################################
 
 # main.py
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional # Added Any, Optional
+from fastapi.responses import StreamingResponse, Response
+from pydantic import BaseModel, ValidationError
+from typing import List, Dict, Any, Optional, AsyncIterator # Added Any, Optional
 from typing import Dict, Optional
 from datetime import datetime
 import os
@@ -29,7 +29,12 @@ from dotenv import load_dotenv
 from langchain_core.messages import (
     HumanMessage, AIMessage, SystemMessage, BaseMessage)
 import asyncio
-from .utils.artifact_functions import save_artifact_to_file
+import json
+import mimetypes
+import re
+from .utils.artifact_functions import write_artifact_file, artifact_storage_id, diff_artifact_manifest, StaleRevisionError, StagedFiles, ArtifactWrite, get_artifact_asset
+from .utils.asset_store import get_asset_store
+from .utils.vectorization_queue import get_vectorization_queue
 
 
 import logging # Add logging import
@@ -54,13 +59,12 @@ from .models.artifact_models import (
     ChatRequest,
     ArtifactSummary,
     ArtifactFilesResponse,
-    FileContentResponse
+    FileContentResponse,
+    FilesManifestRequest,
+    FilesManifestResponse
 )
 
 
-
-from .mcp_agent import MCPAgent
-
 app = FastAPI()
 
 app.add_middleware(
@@ -76,17 +80,24 @@ from .vector_store.tools.retrieve_file_contents import retrieve_file_contents
 from .vector_store.tools.get_specific_file_content import get_specific_file_content
 from .vector_store.tools.search_all_artifacts_for_content import search_all_artifacts_for_content
 from .vector_store.tools.search_code_patterns import search_code_patterns
+from .vector_store.tools.grep_artifacts import grep_artifacts
 
 vs_store_tools = [
     retrieve_files,
     retrieve_file_contents,
     get_specific_file_content,
     search_all_artifacts_for_content,
-    search_code_patterns
+    search_code_patterns,
+    grep_artifacts
 ]
 
 @app.on_event("startup")
 async def startup_event():
+    # Imported here so the file endpoints load without the agent's MCP and LangGraph stack
+    from .mcp_agent import MCPAgent
+    
+    app.state.vectorization_queue = get_vectorization_queue()
+    await app.state.vectorization_queue.start()
     app.state.agent = MCPAgent()
     await app.state.agent.initialize() # Initialize the agent
     # Additional setup if needed
@@ -99,6 +110,7 @@ async def startup_event():
 async def shutdown_event():
     if hasattr(app.state.agent, 'cleanup'):
         await app.state.agent.cleanup()
+    await app.state.vectorization_queue.stop()
     # Additional cleanup if needed
     print("Application shutdown complete")
 
@@ -115,18 +127,6 @@ async def receive_files(request: FilesRequest):
     logger.info(f"Files count: {len(request.files)}")
     logger.info(f"Messages count: {len(request.messages) if request.messages else 0}")
     
-    # Extract file paths for agent state
-    file_paths = [file.path for file in request.files]
-    
-    # Update agent state with artifact info using the unified method
-    artifact_id = request.artifact_id
-    if artifact_id:
-        app.state.agent.update_agent_state(
-            artifact_id=artifact_id,
-            files=file_paths
-        )
-        logger.info(f"Updated agent state with artifact_id: {artifact_id} and {len(file_paths)} files")
-    
     # Categorize files
     text_files = [f for f in request.files if not f.is_binary]
     binary_files = [f for f in request.files if f.is_binary]
@@ -140,30 +140,213 @@ async def receive_files(request: FilesRequest):
     if len(request.files) > 5:
         logger.info(f"... and {len(request.files) - 5} more files")
     
-    # Save artifact to JSON file
+    # Save artifact to the repository; vectors are rebuilt by the background queue
+    saved = None
     try:
-        saved_file_path = save_artifact_to_file(request)
-        logger.info(f"Artifact successfully saved to: {saved_file_path}")
+        saved = await asyncio.to_thread(write_artifact_file, request)
+        logger.info(f"Artifact {saved.artifact_id} saved at revision {saved.revision}")
     except Exception as e:
         logger.error(f"Failed to save artifact: {e}")
-        saved_file_path = None
     
     return {
-        "success": True,
-        "artifact_id": request.artifact_id,
+        **_after_save(request, saved, len(request.files)),
         "chat_id": request.chat_id,
         "url_id": request.url_id,
         "application_name": request.application_name,
-        "files_received": len(request.files),
         "text_files": len(text_files),
         "binary_files": len(binary_files),
+        "stored": bool(request.chat_id or request.url_id)
+    }
+
+def _after_save(request: FilesRequest, saved: Optional[ArtifactWrite], files_received: int) -> Dict[str, Any]:
+    """Point the agent at the artifact, queue its vector rebuild if files changed and build the upload response.
+    
+    saved is None when the save failed; the agent is then given the uploaded paths."""
+    if saved is not None:
+        file_paths = [entry["path"] for entry in saved.file_entries]
+    else:
+        file_paths = [file.path for file in request.files]
+    
+    # Update agent state with artifact info using the unified method
+    if request.artifact_id:
+        app.state.agent.update_agent_state(
+            artifact_id=request.artifact_id,
+            files=file_paths
+        )
+        logger.info(f"Updated agent state with artifact_id: {request.artifact_id} and {len(file_paths)} files")
+    
+    files_changed = saved is not None and saved.files_changed
+    vectorization = app.state.vectorization_queue.submit(saved) if files_changed else None
+    
+    return {
+        "success": True,
+        "artifact_id": request.artifact_id,
+        "revision": saved.revision if saved is not None else None,
+        "files_received": files_received,
+        "files_removed": len(request.removed_paths),
+        "file_count": len(file_paths),
+        "files_changed": files_changed,
         "messages_received": len(request.messages) if request.messages else 0,
-        "stored": bool(request.chat_id or request.url_id),
-        "saved_to_file": saved_file_path,
+        "vectorization": vectorization,
         "timestamp": datetime.now().isoformat(),
-        "agent_state_updated": bool(artifact_id)
+        "agent_state_updated": bool(request.artifact_id)
     }
 
+@app.post("/api/files/manifest", response_model=FilesManifestResponse)
+async def receive_files_manifest(request: FilesManifestRequest):
+    """First phase of a delta sync: compare the client's path -> digest manifest with the stored artifact"""
+    artifact_id = artifact_storage_id(request.artifact_id, request.chat_id, request.url_id)
+    revision, upload, removed = await asyncio.to_thread(diff_artifact_manifest, artifact_id, request.files)
+    logger.info(f"Manifest for {artifact_id}: {len(request.files)} files, {len(upload)} to upload, {len(removed)} removed")
+    
+    return FilesManifestResponse(
+        artifact_id=artifact_id,
+        revision=revision,
+        upload=upload,
+        removed=removed,
+        unchanged=len(request.files) - len(upload)
+    )
+
+@app.post("/api/files/delta")
+async def receive_files_delta(request: FilesRequest):
+    """Second phase of a delta sync: the files the manifest asked for, plus removed_paths and base_revision"""
+    logger.info(f"Delta for {request.artifact_id}: {len(request.files)} files, {len(request.removed_paths)} removed, base revision {request.base_revision}")
+    try:
+        saved = await asyncio.to_thread(write_artifact_file, request)
+    except StaleRevisionError as e:
+        # The artifact changed after the manifest was diffed; the client should diff again
+        logger.warning(f"Rejected stale delta for {request.artifact_id}: {e}")
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to save artifact delta: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return _after_save(request, saved, len(request.files))
+
+async def _ndjson_lines(request: Request) -> AsyncIterator[bytes]:
+    """Non-empty lines of an NDJSON request body, as they arrive"""
+    buffer = bytearray()
+    async for chunk in request.stream():
+        buffer.extend(chunk)
+        start = 0
+        while (end := buffer.find(b"\n", start)) != -1:
+            line = bytes(buffer[start:end]).strip()
+            start = end + 1
+            if line:
+                yield line
+        del buffer[:start]
+    if buffer.strip():
+        yield bytes(buffer).strip()
+
+@app.post("/api/files/stream")
+async def receive_files_stream(request: Request):
+    """Streaming upload as NDJSON: a FilesRequest without files on the first line, then one FileItem per line.
+    
+    Each file is written to the blob store as it arrives and dropped, so memory
+    stays flat in the project size; the artifact is committed once at the end."""
+    header: Optional[FilesRequest] = None
+    staged = StagedFiles()
+    try:
+        async for line in _ndjson_lines(request):
+            if header is None:
+                header = FilesRequest(**json.loads(line))
+                logger.info(f"Streaming files for artifact {header.artifact_id}")
+                # Files sent in the header are staged like streamed ones
+                for file in header.files:
+                    await asyncio.to_thread(staged.add, file)
+                header.files = []
+                continue
+            file = FileItem(**json.loads(line))
+            await asyncio.to_thread(staged.add, file)
+    except (ValueError, ValidationError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid NDJSON line: {e}")
+    
+    if header is None:
+        raise HTTPException(status_code=400, detail="Empty upload: the first line must be the FilesRequest header")
+    logger.info(f"Received {len(staged.entries)} streamed files for artifact {header.artifact_id}")
+    
+    try:
+        saved = await asyncio.to_thread(write_artifact_file, header, staged)
+    except StaleRevisionError as e:
+        logger.warning(f"Rejected stale streamed upload for {header.artifact_id}: {e}")
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to save streamed artifact: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return _after_save(header, saved, len(staged.entries))
+
+def _parse_byte_range(range_header: Optional[str], size: int) -> Optional[tuple]:
+    """(start, end) of a single "bytes=" range, None to serve the whole file; ValueError if unsatisfiable"""
+    match = re.fullmatch(r"\s*bytes=(\d*)-(\d*)\s*", range_header or "")
+    if not match or match.group(1) == match.group(2) == "":
+        # Absent, malformed or multi-range headers get the full content
+        return None
+    if match.group(1) == "":
+        start, end = max(size - int(match.group(2)), 0), size - 1
+    else:
+        start = int(match.group(1))
+        end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+    if start >= size or start > end:
+        raise ValueError(f"Range {range_header} not satisfiable for {size} bytes")
+    return start, end
+
+def _if_none_match(header: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match list names etag or is "*"; weak tags (W/) match like strong ones"""
+    for tag in (header or "").split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == "*" or tag == etag:
+            return True
+    return False
+
+@app.get("/api/files/{artifact_id}/assets/{path:path}")
+async def get_artifact_asset_content(artifact_id: str, path: str, request: Request):
+    """Binary file of an artifact, with an ETag of its digest and single-range (206) reads"""
+    entry = await asyncio.to_thread(get_artifact_asset, artifact_id, path)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"No binary file {path} in artifact {artifact_id}")
+    
+    size = entry["size"]
+    etag = f'"{entry["digest"]}"'
+    headers = {"ETag": etag, "Accept-Ranges": "bytes", "Cache-Control": "no-cache"}
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if _if_none_match(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    # A range is only honoured against the version the client has (If-Range)
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range and if_range != etag:
+        range_header = None
+    try:
+        byte_range = _parse_byte_range(range_header, size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    
+    asset_store = get_asset_store()
+    if byte_range is None:
+        content = asset_store.iter_bytes(entry["digest"])
+        return StreamingResponse(content, media_type=media_type, headers={**headers, "Content-Length": str(size)})
+    
+    start, end = byte_range
+    content = asset_store.iter_bytes(entry["digest"], start, end)
+    return StreamingResponse(
+        content,
+        status_code=206,
+        media_type=media_type,
+        headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}", "Content-Length": str(end - start + 1)}
+    )
+
+@app.get("/api/files/{artifact_id}/vectorization")
+async def get_vectorization_status(artifact_id: str):
+    """State of the background vector rebuild for an artifact (keyed like its storage file)"""
+    status = app.state.vectorization_queue.get_status(artifact_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"No vectorization job for artifact {artifact_id}")
+    return status
+
 # Refactor the chat endpoint
 
 from .utils.message_converter import (
@@ -71,6 +71,25 @@ class FilesRequest(BaseModel):
     files: List[FileItem] = []
     messages: Optional[List[ChatMessage]] = None
     file_count: Optional[int] = None
+    # Delta sync: paths to drop from the stored artifact, and the revision the
+    # client diffed against in /api/files/manifest (rejected if it has moved on)
+    removed_paths: List[str] = []
+    base_revision: Optional[int] = None
+
+class FilesManifestRequest(BaseModel):
+    """First phase of a delta sync: the client's files as path -> sha256 hex digest of the content"""
+    artifact_id: str
+    chat_id: Optional[str] = None
+    url_id: Optional[str] = None
+    files: Dict[str, str] = {}
+
+class FilesManifestResponse(BaseModel):
+    """Which files the client has to upload or remove in the second phase"""
+    artifact_id: str
+    revision: Optional[int] = None  # None if the artifact is not stored yet
+    upload: List[str] = []  # Paths that are new or whose content changed
+    removed: List[str] = []  # Stored paths missing from the client's manifest
+    unchanged: int = 0
 
 class ArtifactSummary(BaseModel):
     """Summary information about an artifact for listing purposes"""
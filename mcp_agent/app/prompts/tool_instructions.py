@@ -33,6 +33,11 @@ def get_tool_usage_instructions() -> str:
    - Use when: Looking for functions, classes, hooks, imports
    - Use for: Finding where specific patterns are implemented
 
+   **grep_artifacts()** - Exact text/regex search, like grep
+   - Use when: You need EVERY occurrence of a tag, identifier, import or string
+   - Returns: file path, line number and line text for each match (no full content)
+   - Omit artifact_id to search all artifacts
+
 **TOOL CALLING EXAMPLES:**
 
 **Example 1: User wants to modify existing component**
@@ -104,6 +109,17 @@ search_code_patterns(
 )
 ```
 
+**Example 6: Finding every use of a component**
+```
+User: "Replace all top bars with the new navigation menu"
+
+STEP 1: Find every usage
+grep_artifacts(
+    pattern="obc-top-bar",
+    artifact_id="my-app"
+)
+```
+
 **FILTERING STRATEGIES:**
 
 **By Language/Framework:**
@@ -127,6 +143,7 @@ search_code_patterns(
 - `search_type="mmr"` - Diverse results (good for exploration)  
 - `search_type="similarity_score_threshold"` - High relevance only
   - Use with: `search_kwargs={"score_threshold": 0.7, "k": 5}`
+- `search_type="hybrid"` - Keyword + semantic search (best for identifiers and imports)
 
 **SEARCH PARAMETERS:**
 
@@ -4,15 +4,17 @@ import sys
 import json
 import pathlib
 from dotenv import load_dotenv
-from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
+from mcp_agent.vector_store.manager.embedding_cache import EmbeddingCache
+from mcp_agent.vector_store.manager.embeddings import get_embeddings_config, create_embeddings
+from mcp_agent.vector_store.manager.mmap_store import save_store
 
-# Load environment
+# Load environment; EMBEDDINGS_BACKEND=hashing builds the index offline
 load_dotenv()
-openai_api_key = os.getenv("OPENAI_API_KEY")
-if not openai_api_key:
+embeddings_config = get_embeddings_config()
+if embeddings_config["backend"] == "openai" and not os.getenv("OPENAI_API_KEY"):
     print("Error: OPENAI_API_KEY not set in environment.")
     sys.exit(1)
 
@@ -69,12 +71,17 @@ splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
 docs = splitter.split_documents(raw_docs)
 print(f"Split into {len(docs)} chunks.")
 
-# Embed and build FAISS
-embeddings = OpenAIEmbeddings(openai_api_key=openai_api_key)
+# Embed and build FAISS, reusing vectors already in the shared embedding cache
+cache = EmbeddingCache(script_dir.parents[1] / "storage" / "embedding_cache" / "embeddings.sqlite")
+embeddings = create_embeddings(embeddings_config, cache)
 vector_store = FAISS.from_documents(docs, embeddings)
+print("Embedding cache:", cache.stats())
 
-# Persist the index
+# Persist the index without pickle
 output_dir = script_dir / "kb"
 output_dir.mkdir(exist_ok=True)
-vector_store.save_local(folder_path=str(output_dir), index_name="index")
+index_info = save_store(output_dir, vector_store, os.getenv("VECTOR_INDEX_TYPE", "auto"))
+print("Index:", index_info)
+with open(output_dir / "embeddings.json", 'w', encoding='utf-8') as f:
+    json.dump({**embeddings_config, "dimension": vector_store.index.d}, f, indent=2)
 print("✅ Rebuilt FAISS index with dimension:", vector_store.index.d)
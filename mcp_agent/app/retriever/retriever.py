@@ -1,28 +1,42 @@
 import os
 from dotenv import load_dotenv
-from langchain_openai import OpenAIEmbeddings
+import json
 from langchain_openai import ChatOpenAI
-from langchain_community.vectorstores import FAISS
 from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain.chains import create_retrieval_chain
 from langchain import hub
 from pathlib import Path
+from mcp_agent.vector_store.manager.embedding_cache import EmbeddingCache
+from mcp_agent.vector_store.manager.embeddings import get_embeddings_config, create_embeddings
+from mcp_agent.vector_store.manager.mmap_store import load_store, is_legacy_store
 BASE_DIR = Path(__file__).resolve().parent
 
 # Load environment variables
 load_dotenv()
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
-# Initialize embeddings
-embeddings = OpenAIEmbeddings(openai_api_key=openai_api_key)
+# Use the embedding backend recorded when the index was built
+embeddings_info_path = BASE_DIR / "kb" / "embeddings.json"
+if embeddings_info_path.exists():
+    with open(embeddings_info_path, 'r', encoding='utf-8') as f:
+        embeddings_config = json.load(f)
+else:
+    embeddings_config = get_embeddings_config("openai")
 
-# Load existing vector store
-vector_store = FAISS.load_local(
-    folder_path=str(BASE_DIR / "kb"),
-    embeddings=embeddings,
-    index_name="index",
-    allow_dangerous_deserialization=True
+# Initialize embeddings behind the shared embedding cache
+embeddings = create_embeddings(
+    embeddings_config,
+    EmbeddingCache(BASE_DIR.parents[1] / "storage" / "embedding_cache" / "embeddings.sqlite")
 )
+
+# Load existing vector store; one saved by FAISS.save_local keeps its chunks in a pickle, which is not read
+kb_dir = BASE_DIR / "kb"
+if is_legacy_store(kb_dir):
+    raise ValueError(
+        f"{kb_dir} was built by an older build_vectorstore.py with a pickled docstore. "
+        "Please rebuild it: python -m mcp_agent.retriever.build_vectorstore"
+    )
+vector_store = load_store(kb_dir, embeddings)
 # Debug: verify embedding vs index dimensions
 print(f"FAISS index dimension: {vector_store.index.d}")
 test_emb = embeddings.embed_query("test query")
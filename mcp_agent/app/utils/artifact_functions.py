@@ -1,107 +1,187 @@
 import json
+import asyncio
+import threading
 from pathlib import Path
 from datetime import datetime
 import logging
-from ..models.artifact_models import FilesRequest, SavedArtifact, ArtifactMetadata, ProjectInfo, FileItem
-from ..vector_store.manager.vector_manager import VectorStoreManager
-from typing import List, Optional, Dict
+from ..models.artifact_models import FilesRequest, SavedArtifact, ArtifactMetadata, ProjectInfo, FileItem, ChatMessage
+from ..vector_store.manager.get_vector_manager import get_vector_manager
+from .blob_store import BlobStore, get_blob_store, blob_digest
+from .asset_store import AssetStore, get_asset_store
+from .artifact_repository import get_artifact_repository, StaleRevisionError
+from typing import List, Optional, Dict, Any, NamedTuple, Tuple
 
 logger = logging.getLogger(__name__)
 
-def save_artifact_to_file(request: FilesRequest) -> str:
-    """Save artifact by merging new files with existing ones and update vector store"""
+# Artifacts are read, merged and saved back, so concurrent saves must not interleave
+_artifact_write_lock = threading.Lock()
+
+class ArtifactWrite(NamedTuple):
+    """Result of merging a files request into its stored artifact"""
+    artifact_id: str
+    # Repository revision of the artifact after this save
+    revision: int
+    file_entries: List[Dict[str, Any]]
+    files_changed: bool
+    is_update: bool
+
+    def load_files(self) -> List[FileItem]:
+        """Contents of the saved text files, with binary files left empty; blobs never change,
+        so this is always this save's snapshot"""
+        return _files_from_entries(self.file_entries, get_blob_store(), include_binary=False)
+
+class StagedFiles:
+    """Files of an upload whose contents are already in the blob store, added one at a time as they arrive"""
+    
+    def __init__(self):
+        self.entries: List[Dict[str, Any]] = []
+        self.project_info: Optional[ProjectInfo] = None
+        self._saw_package_json = False
+    
+    def add(self, file: FileItem):
+        # Binary payloads go to the asset store, so text-only reads never touch them
+        store = get_asset_store() if file.is_binary else get_blob_store()
+        self.entries.append(_file_entry(file, store.put(file.content)))
+        # Project info comes from the first package.json, as for a full upload
+        if 'package.json' in file.path and not self._saw_package_json:
+            self._saw_package_json = True
+            self.project_info = _parse_project_info(file.content)
+
+def write_artifact_file(request: FilesRequest, staged: Optional[StagedFiles] = None) -> ArtifactWrite:
+    """Merge new files with the stored artifact and write it to disk.
+    
+    Files already staged (streaming uploads) are merged in place of request.files."""
+    with _artifact_write_lock:
+        saved = _write_artifact_file(request, staged)
+    if saved.files_changed:
+        # Cached search results describe the previous files
+        get_vector_manager().invalidate_search_results(saved.artifact_id)
+    return saved
+
+def artifact_storage_id(artifact_id: Optional[str], chat_id: Optional[str] = None, url_id: Optional[str] = None) -> str:
+    """Id an artifact is stored under: its url id, else chat id, else artifact id, made filename-safe"""
+    filename = url_id or chat_id or artifact_id
+    if not filename:
+        filename = f"artifact_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    
+    return "".join(c for c in filename if c.isalnum() or c in ('-', '_')).rstrip()
+
+def diff_artifact_manifest(artifact_id: str, manifest: Dict[str, str]) -> Tuple[Optional[int], List[str], List[str]]:
+    """Revision of a stored artifact, the manifest paths it lacks or holds other content for, and its paths missing from the manifest"""
+    repository = get_artifact_repository()
+    revision = repository.revision(artifact_id)
+    stored = repository.file_digests(artifact_id) if revision is not None else {}
+    upload = [path for path, digest in manifest.items() if stored.get(path) != digest]
+    removed = [path for path in stored if path not in manifest]
+    return revision, upload, removed
+
+def _parse_project_info(package_json: str) -> Optional[ProjectInfo]:
+    try:
+        package_data = json.loads(package_json)
+        return ProjectInfo(
+            name=package_data.get('name'),
+            version=package_data.get('version'),
+            description=package_data.get('description'),
+            dependencies=package_data.get('dependencies', {}),
+            scripts=package_data.get('scripts', {}),
+            dependencies_count=len(package_data.get('dependencies', {}))
+        )
+    except Exception as e:
+        logger.warning(f"Failed to parse package.json: {e}")
+        return None
+
+def _write_artifact_file(request: FilesRequest, staged: Optional[StagedFiles] = None) -> ArtifactWrite:
     try:
         # Create storage directories
         storage_dir = Path.cwd() / "storage"
-        files_dir = storage_dir / "files"
         vector_dir = storage_dir / "vector_store"
         
         storage_dir.mkdir(exist_ok=True)
-        files_dir.mkdir(exist_ok=True)
         vector_dir.mkdir(exist_ok=True)
         
         # Generate filename
-        filename = request.url_id or request.chat_id or request.artifact_id
-        if not filename:
-            filename = f"artifact_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        filename = artifact_storage_id(request.artifact_id, request.chat_id, request.url_id)
         
-        filename = "".join(c for c in filename if c.isalnum() or c in ('-', '_')).rstrip()
-        file_path = files_dir / f"{filename}.json"
-        
-        # Load existing artifact if it exists
-        existing_files: Dict[str, FileItem] = {}
+        # Load the existing entries; unchanged contents are never read or rewritten
+        repository = get_artifact_repository()
+        blob_store = get_blob_store()
+        existing_entries: Dict[str, Dict[str, Any]] = {}
         existing_metadata = None
-        existing_messages = []
+        existing_messages: List[Dict[str, Any]] = []
         is_update = False
         
-        if file_path.exists():
+        if repository.exists(filename):
             try:
-                logger.info(f"Loading existing artifact from: {file_path}")
-                existing_artifact = load_artifact_from_file(str(file_path))
+                logger.info(f"Loading existing artifact entries for: {filename}")
                 
-                # Convert existing files to dict for easy lookup by path
-                existing_files = {f.path: f for f in existing_artifact.files}
-                existing_metadata = existing_artifact.metadata
-                existing_messages = existing_artifact.messages or []
+                # Index existing entries by path for easy lookup
+                existing_entries = {entry["path"]: entry for entry in repository.file_entries(filename)}
+                existing_metadata = ArtifactMetadata(**repository.get_metadata(filename))
+                existing_messages = repository.message_entries(filename)
                 is_update = True
                 
-                logger.info(f"Found {len(existing_files)} existing files")
+                logger.info(f"Found {len(existing_entries)} existing files")
                 
             except Exception as e:
                 logger.warning(f"Failed to load existing artifact, creating new one: {e}")
         
+        # Store the contents of new files; contents already in the blob store cost a stat
+        if staged is None:
+            staged = StagedFiles()
+            for new_file in request.files:
+                staged.add(new_file)
+        
         # Extract project info from package.json in new files
-        project_info = existing_metadata.project_info if existing_metadata else None
-        package_json_file = next((f for f in request.files if 'package.json' in f.path), None)
-        if package_json_file:
-            try:
-                package_data = json.loads(package_json_file.content)
-                project_info = ProjectInfo(
-                    name=package_data.get('name'),
-                    version=package_data.get('version'),
-                    description=package_data.get('description'),
-                    dependencies=package_data.get('dependencies', {}),
-                    scripts=package_data.get('scripts', {}),
-                    dependencies_count=len(package_data.get('dependencies', {}))
-                )
-            except Exception as e:
-                logger.warning(f"Failed to parse package.json: {e}")
+        project_info = staged.project_info or (existing_metadata.project_info if existing_metadata else None)
         
         # Merge files: new files override existing ones, keep files not in new request
-        merged_files = existing_files.copy()  # Start with existing files
+        merged_entries = existing_entries.copy()
+        changed_entries: List[Dict[str, Any]] = []
         new_files_count = 0
         updated_files_count = 0
         files_changed = False  # Track if any files actually changed
         
-        for new_file in request.files:
-            if new_file.path in merged_files:
-                # File exists, check if content changed
-                if merged_files[new_file.path].content != new_file.content:
-                    logger.info(f"Updating existing file: {new_file.path}")
-                    merged_files[new_file.path] = new_file
-                    updated_files_count += 1
-                    files_changed = True
-                else:
-                    logger.debug(f"File unchanged: {new_file.path}")
+        for new_entry in staged.entries:
+            path = new_entry["path"]
+            existing_entry = merged_entries.get(path)
+            if existing_entry is not None and existing_entry["digest"] == new_entry["digest"]:
+                logger.debug(f"File unchanged: {path}")
+                continue
+            
+            if existing_entry is not None:
+                logger.info(f"Updating existing file: {path}")
+                updated_files_count += 1
             else:
-                # New file, add it
-                logger.info(f"Adding new file: {new_file.path}")
-                merged_files[new_file.path] = new_file
+                logger.info(f"Adding new file: {path}")
                 new_files_count += 1
-                files_changed = True
+            merged_entries[path] = new_entry
+            changed_entries.append(new_entry)
+            files_changed = True
+        
+        # Drop files the client removed (delta sync); a full upload never removes files
+        removed_paths = [path for path in request.removed_paths if merged_entries.pop(path, None) is not None]
+        if removed_paths:
+            logger.info(f"Removing {len(removed_paths)} files")
+            files_changed = True
         
         # Convert back to list
-        final_files = list(merged_files.values())
+        final_entries = list(merged_entries.values())
         
-        logger.info(f"File merge summary: {new_files_count} new, {updated_files_count} updated, {len(final_files)} total")
+        logger.info(f"File merge summary: {new_files_count} new, {updated_files_count} updated, {len(removed_paths)} removed, {len(final_entries)} total")
         
-        # Merge messages - append new messages to existing ones
-        merged_messages = existing_messages.copy()
+        # Merge messages - append new messages to existing ones (compared by content)
+        new_messages: List[Dict[str, Any]] = []
+        known_contents = {entry["content_digest"] for entry in existing_messages}
         if request.messages:
             for new_msg in request.messages:
-                # Check if message already exists (simple content comparison)
-                if not any(existing_msg.content == new_msg.content for existing_msg in merged_messages):
-                    merged_messages.append(new_msg)
+                content_digest = blob_digest(new_msg.content)
+                if content_digest not in known_contents:
+                    new_messages.append({
+                        "role": new_msg.role,
+                        "digest": blob_store.put(json.dumps(new_msg.dict(), ensure_ascii=False)),
+                        "content_digest": content_digest
+                    })
+                    known_contents.add(content_digest)
                     logger.debug(f"Added new message from {new_msg.role}")
         
         # Create metadata - use new metadata but preserve original creation time
@@ -113,8 +193,8 @@ def save_artifact_to_file(request: FilesRequest) -> str:
             application_name=request.application_name or (existing_metadata.application_name if existing_metadata else None),
             thread_id=request.thread_id,
             created_at=existing_metadata.created_at if existing_metadata else datetime.now().isoformat(),
-            file_count=len(final_files),
-            total_size=sum(f.size for f in final_files),
+            file_count=len(final_entries),
+            total_size=sum(entry["size"] for entry in final_entries),
             project_info=project_info
         )
         
@@ -128,84 +208,131 @@ def save_artifact_to_file(request: FilesRequest) -> str:
             metadata_dict = metadata.dict()
             metadata_dict['update_count'] = 0
         
-        # Create the complete artifact
-        artifact_dict = {
-            "metadata": metadata_dict,
-            "files": [f.dict() for f in final_files],
-            "messages": [msg.dict() for msg in merged_messages]
-        }
-        
-        # Save to JSON
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(artifact_dict, f, indent=2, ensure_ascii=False)
-        
-        # Update vector store ONLY if files actually changed
-        try:
-            vector_manager = VectorStoreManager(vector_dir)
-            
-            if files_changed:
-                if is_update:
-                    logger.info(f"Files changed, updating vector store for: {filename}")
-                    vector_manager.update_artifact_vectors(filename, final_files)
-                else:
-                    logger.info(f"Creating new vector store for: {filename}")
-                    vector_manager.create_artifact_vectors(filename, final_files)
-                logger.info(f"Vector store updated for artifact: {filename}")
-            else:
-                logger.info(f"No file changes detected, skipping vector store update for: {filename}")
-                
-        except Exception as e:
-            logger.error(f"Failed to update vector store: {e}")
-            # Don't fail the entire save if vector store update fails
+        # Save the artifact row, changed entries and new messages in one transaction; a delta
+        # computed against an older revision may miss changes saved since, so it is refused
+        revision = repository.save(
+            filename, metadata_dict, changed_entries, new_messages, removed_paths,
+            base_revision=request.base_revision
+        )
         
-        # Verify file was written
-        file_size = file_path.stat().st_size
         action = "updated" if existing_metadata else "created"
-        logger.info(f"Artifact {action}: {file_path} ({file_size} bytes)")
+        logger.info(f"Artifact {action}: {filename} ({len(changed_entries)} changed files, {len(new_messages)} new messages)")
         
-        return str(file_path)
+        return ArtifactWrite(filename, revision, final_entries, files_changed, is_update)
         
+    except StaleRevisionError:
+        # An expected outcome of delta sync, reported to the caller rather than logged as a failure
+        raise
     except Exception as e:
         logger.error(f"Failed to save artifact: {e}")
         raise e
-    
 
-# Helper function to construct artifact path (for consistency)
-def get_artifact_path(artifact_id: str) -> str:
-    """Get the full file path for an artifact given its ID"""
-    storage_dir = Path.cwd() / "storage" / "files"
-    file_path = storage_dir / f"{artifact_id}.json"
-    return str(file_path)  # Just return the path string
+def _file_entry(file: FileItem, digest: str) -> Dict[str, Any]:
+    """Manifest entry of a file: everything but its content, which is stored under digest"""
+    return {
+        "path": file.path,
+        "digest": digest,
+        "is_binary": file.is_binary,
+        "size": file.size,
+        "type": file.type
+    }
+
+def _files_from_entries(entries: List[Dict[str, Any]], blob_store: BlobStore, include_binary: bool = True) -> List[FileItem]:
+    files = []
+    for entry in entries:
+        if not entry["is_binary"]:
+            content = blob_store.get(entry["digest"])
+        elif include_binary:
+            content = ensure_asset(entry["digest"]).get(entry["digest"])
+        else:
+            content = ""
+        files.append(FileItem(**{key: value for key, value in entry.items() if key != "digest"}, content=content))
+    return files
+
+def ensure_asset(digest: str) -> AssetStore:
+    """Asset store holding a binary file, moving it there if it was saved as a text blob before assets existed"""
+    asset_store = get_asset_store()
+    if not asset_store.exists(digest):
+        asset_store.put(get_blob_store().get(digest))
+    return asset_store
+
+def get_artifact_asset(artifact_id: str, path: str) -> Optional[Dict[str, Any]]:
+    """Entry of a binary file of an artifact, with "size" set to its decoded payload size"""
+    entry = get_artifact_repository().file_entry(artifact_id, path)
+    if entry is None or not entry["is_binary"]:
+        return None
+    entry["size"] = ensure_asset(entry["digest"]).size(entry["digest"])
+    return entry
+
+async def aupdate_artifact_vectors(saved: ArtifactWrite, raise_errors: bool = False):
+    """Update vector store ONLY if files actually changed, keeping the event loop free while chunks are embedded.
+    The shared manager swaps the new index into its cache, so tools see it on their next call"""
+    if not saved.files_changed:
+        logger.info(f"No file changes detected, skipping vector store update for: {saved.artifact_id}")
+        return
+    
+    try:
+        vector_manager = get_vector_manager()
+        files = await asyncio.to_thread(saved.load_files)
+        if saved.is_update:
+            logger.info(f"Files changed, updating vector store for: {saved.artifact_id}")
+            await vector_manager.aupdate_artifact_vectors(saved.artifact_id, files)
+        else:
+            logger.info(f"Creating new vector store for: {saved.artifact_id}")
+            await vector_manager.acreate_artifact_vectors(saved.artifact_id, files)
+        logger.info(f"Vector store updated for artifact: {saved.artifact_id}")
+        
+    except Exception as e:
+        logger.error(f"Failed to update vector store: {e}")
+        if raise_errors:
+            raise
+        # Don't fail the entire save if vector store update fails
+    
 
 def artifact_exists(artifact_id: str) -> bool:
     """Check if an artifact exists"""
-    file_path = Path(get_artifact_path(artifact_id))  # Convert back to Path for exists check
-    return file_path.exists()
+    return get_artifact_repository().exists(artifact_id)
 
-def load_artifact_from_file(file_path: str) -> SavedArtifact:
-    """Load and validate artifact using Pydantic models"""
+def load_artifact(artifact_id: str, include_binary: bool = True) -> SavedArtifact:
+    """Load and validate an artifact using Pydantic models, reading file and message contents from the blob store.
+    
+    Binary files are left empty unless include_binary is set."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        repository = get_artifact_repository()
+        metadata = repository.get_metadata(artifact_id)
+        if metadata is None:
+            raise FileNotFoundError(f"Artifact {artifact_id} not found")
         
-        # Use Pydantic model for validation
-        artifact = SavedArtifact(**data)
-        return artifact
+        blob_store = get_blob_store()
+        return SavedArtifact(
+            metadata=metadata,
+            files=_files_from_entries(repository.file_entries(artifact_id), blob_store, include_binary),
+            messages=[
+                ChatMessage(**json.loads(blob_store.get(entry["digest"])))
+                for entry in repository.message_entries(artifact_id)
+            ]
+        )
         
     except Exception as e:
-        logger.error(f"Failed to load artifact from {file_path}: {e}")
+        logger.error(f"Failed to load artifact {artifact_id}: {e}")
         raise e
 
+def load_artifact_file(artifact_id: str, path: str, include_binary: bool = True) -> Optional[FileItem]:
+    """One file of a stored artifact, reading only that file's content"""
+    entry = get_artifact_repository().file_entry(artifact_id, path)
+    if entry is None:
+        return None
+    return _files_from_entries([entry], get_blob_store(), include_binary)[0]
+
 def get_artifact_files(artifact_id: str) -> List[str]:
     """Get list of file paths from an artifact using artifact_id"""
     try:
-        if not artifact_exists(artifact_id):
+        repository = get_artifact_repository()
+        if not repository.exists(artifact_id):
             logger.warning(f"Artifact {artifact_id} not found")
             return []
-            
-        file_path = get_artifact_path(artifact_id)
-        artifact = load_artifact_from_file(file_path)
-        return [file_item.path for file_item in artifact.files]
+        
+        return repository.file_paths(artifact_id)
         
     except Exception as e:
         logger.error(f"Failed to get files from artifact {artifact_id}: {e}")
@@ -214,23 +341,11 @@ def get_artifact_files(artifact_id: str) -> List[str]:
 def get_artifact_summary(artifact_id: str) -> Dict:
     """Get summary info about an artifact using artifact_id"""
     try:
-        if not artifact_exists(artifact_id):
+        summary = get_artifact_repository().summary(artifact_id)
+        if summary is None:
             logger.warning(f"Artifact {artifact_id} not found")
             return {}
-            
-        file_path = get_artifact_path(artifact_id)
-        artifact = load_artifact_from_file(file_path)
-        
-        return {
-            "file_count": len(artifact.files),
-            "total_size": sum(f.size for f in artifact.files),
-            "created_at": artifact.metadata.created_at,
-            "updated_at": getattr(artifact.metadata, 'updated_at', None),
-            "update_count": getattr(artifact.metadata, 'update_count', 0),
-            "application_name": artifact.metadata.application_name,
-            "project_name": artifact.metadata.project_info.name if artifact.metadata.project_info else None,
-            "file_paths": [f.path for f in artifact.files]
-        }
+        return summary
     except Exception as e:
         logger.error(f"Failed to get artifact summary for {artifact_id}: {e}")
-        return {}
\ No newline at end of file
+        return {}
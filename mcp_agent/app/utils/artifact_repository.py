@@ -0,0 +1,321 @@
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterator, Sequence
+
+from ..models.artifact_models import SavedArtifact
+from .blob_store import BlobStore, get_blob_store, blob_digest
+from .asset_store import get_asset_store
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    artifact_id TEXT PRIMARY KEY,
+    revision INTEGER NOT NULL DEFAULT 1,
+    application_name TEXT,
+    project_name TEXT,
+    thread_id TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    update_count INTEGER NOT NULL DEFAULT 0,
+    file_count INTEGER NOT NULL DEFAULT 0,
+    total_size INTEGER NOT NULL DEFAULT 0,
+    metadata TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS artifacts_updated_at ON artifacts (updated_at);
+
+CREATE TABLE IF NOT EXISTS files (
+    artifact_id TEXT NOT NULL REFERENCES artifacts (artifact_id) ON DELETE CASCADE,
+    path TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0,
+    is_binary INTEGER NOT NULL DEFAULT 0,
+    type TEXT,
+    PRIMARY KEY (artifact_id, path)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS files_path ON files (path);
+
+CREATE TABLE IF NOT EXISTS messages (
+    artifact_id TEXT NOT NULL REFERENCES artifacts (artifact_id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    content_digest TEXT NOT NULL,
+    PRIMARY KEY (artifact_id, seq),
+    UNIQUE (artifact_id, content_digest)
+);
+"""
+
+_FILE_COLUMNS = "path, digest, size, is_binary, type"
+
+
+class StaleRevisionError(Exception):
+    """A delta upload was diffed against a revision of the artifact that has since been replaced"""
+
+
+class ArtifactRepository:
+    """
+    SQLite catalog of stored artifacts: their metadata, file entries and messages.
+
+    File and message contents live in the blob store and are referenced by
+    digest, so listing files, summarizing or checking an artifact are
+    indexed queries that never read a body. The database runs in WAL mode:
+    readers are not blocked by a save, and a save commits its artifact row,
+    file entries and messages in one transaction.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = Path(db_path or Path.cwd() / "storage" / "artifacts.db")
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # sqlite3 connections are not shared between threads; each thread opens its own
+        self._local = threading.local()
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def exists(self, artifact_id: str) -> bool:
+        row = self._connection().execute(
+            "SELECT 1 FROM artifacts WHERE artifact_id = ?", (artifact_id,)
+        ).fetchone()
+        return row is not None
+
+    def revision(self, artifact_id: str) -> Optional[int]:
+        """Counter bumped by every save of the artifact, for caches keyed on its contents"""
+        row = self._connection().execute(
+            "SELECT revision FROM artifacts WHERE artifact_id = ?", (artifact_id,)
+        ).fetchone()
+        return row["revision"] if row else None
+
+    def list_artifact_ids(self) -> List[str]:
+        rows = self._connection().execute("SELECT artifact_id FROM artifacts ORDER BY artifact_id")
+        return [row["artifact_id"] for row in rows]
+
+    def get_metadata(self, artifact_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT metadata FROM artifacts WHERE artifact_id = ?", (artifact_id,)
+        ).fetchone()
+        return json.loads(row["metadata"]) if row else None
+
+    def file_paths(self, artifact_id: str) -> List[str]:
+        rows = self._connection().execute(
+            "SELECT path FROM files WHERE artifact_id = ? ORDER BY path", (artifact_id,)
+        )
+        return [row["path"] for row in rows]
+
+    def file_entries(self, artifact_id: str) -> List[Dict[str, Any]]:
+        """Path, digest, size, is_binary and type of every file of the artifact"""
+        rows = self._connection().execute(
+            f"SELECT {_FILE_COLUMNS} FROM files WHERE artifact_id = ? ORDER BY path", (artifact_id,)
+        )
+        return [self._file_entry(row) for row in rows]
+
+    def file_digests(self, artifact_id: str) -> Dict[str, str]:
+        """Path -> content digest of every file of the artifact"""
+        rows = self._connection().execute(
+            "SELECT path, digest FROM files WHERE artifact_id = ?", (artifact_id,)
+        )
+        return {row["path"]: row["digest"] for row in rows}
+
+    def file_entry(self, artifact_id: str, path: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            f"SELECT {_FILE_COLUMNS} FROM files WHERE artifact_id = ? AND path = ?", (artifact_id, path)
+        ).fetchone()
+        return self._file_entry(row) if row else None
+
+    def message_entries(self, artifact_id: str) -> List[Dict[str, Any]]:
+        rows = self._connection().execute(
+            "SELECT role, digest, content_digest FROM messages WHERE artifact_id = ? ORDER BY seq", (artifact_id,)
+        )
+        return [dict(row) for row in rows]
+
+    def summary(self, artifact_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT file_count, total_size, created_at, updated_at, update_count, application_name, project_name "
+            "FROM artifacts WHERE artifact_id = ?",
+            (artifact_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        summary = dict(row)
+        summary["file_paths"] = self.file_paths(artifact_id)
+        return summary
+
+    def save(
+        self,
+        artifact_id: str,
+        metadata: Dict[str, Any],
+        changed_files: List[Dict[str, Any]],
+        new_messages: List[Dict[str, Any]],
+        removed_paths: Sequence[str] = (),
+        base_revision: Optional[int] = None
+    ) -> int:
+        """Upsert the artifact row and changed file entries, drop removed files and add new messages, in one transaction
+
+        Returns the artifact's revision after the save.
+
+        With base_revision set, the artifact must still be at that revision when the
+        transaction starts, otherwise StaleRevisionError is raised and nothing is saved.
+        """
+        project_info = metadata.get("project_info") or {}
+        values = (
+            metadata.get("application_name"),
+            project_info.get("name"),
+            metadata.get("thread_id"),
+            metadata.get("created_at"),
+            metadata.get("updated_at"),
+            metadata.get("update_count", 0),
+            metadata.get("file_count", 0),
+            metadata.get("total_size", 0),
+            json.dumps(metadata, ensure_ascii=False)
+        )
+        with self._transaction() as conn:
+            if base_revision is None:
+                conn.execute(
+                    """
+                    INSERT INTO artifacts (
+                        application_name, project_name, thread_id, created_at, updated_at,
+                        update_count, file_count, total_size, metadata, artifact_id
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (artifact_id) DO UPDATE SET
+                        revision = revision + 1,
+                        application_name = excluded.application_name,
+                        project_name = excluded.project_name,
+                        thread_id = excluded.thread_id,
+                        created_at = excluded.created_at,
+                        updated_at = excluded.updated_at,
+                        update_count = excluded.update_count,
+                        file_count = excluded.file_count,
+                        total_size = excluded.total_size,
+                        metadata = excluded.metadata
+                    """,
+                    (*values, artifact_id)
+                )
+            else:
+                # Checked and bumped in one statement, so a save committed since the client's diff is caught
+                updated = conn.execute(
+                    """
+                    UPDATE artifacts SET
+                        revision = revision + 1,
+                        application_name = ?, project_name = ?, thread_id = ?, created_at = ?, updated_at = ?,
+                        update_count = ?, file_count = ?, total_size = ?, metadata = ?
+                    WHERE artifact_id = ? AND revision = ?
+                    """,
+                    (*values, artifact_id, base_revision)
+                )
+                if updated.rowcount == 0:
+                    row = conn.execute(
+                        "SELECT revision FROM artifacts WHERE artifact_id = ?", (artifact_id,)
+                    ).fetchone()
+                    raise StaleRevisionError(
+                        f"Artifact {artifact_id} is at revision {row['revision'] if row else None}, not {base_revision}"
+                    )
+            conn.executemany(
+                f"INSERT OR REPLACE INTO files (artifact_id, {_FILE_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (artifact_id, entry["path"], entry["digest"], entry["size"], int(bool(entry["is_binary"])), entry.get("type"))
+                    for entry in changed_files
+                ]
+            )
+            conn.executemany(
+                "DELETE FROM files WHERE artifact_id = ? AND path = ?",
+                [(artifact_id, path) for path in removed_paths]
+            )
+            next_seq = conn.execute(
+                "SELECT COALESCE(MAX(seq), -1) + 1 FROM messages WHERE artifact_id = ?", (artifact_id,)
+            ).fetchone()[0]
+            conn.executemany(
+                "INSERT OR IGNORE INTO messages (artifact_id, seq, role, digest, content_digest) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (artifact_id, next_seq + i, entry["role"], entry["digest"], entry["content_digest"])
+                    for i, entry in enumerate(new_messages)
+                ]
+            )
+            return conn.execute("SELECT revision FROM artifacts WHERE artifact_id = ?", (artifact_id,)).fetchone()[0]
+
+    def import_json_files(self, files_dir: Path, blob_store: BlobStore) -> int:
+        """Import artifact JSON files that are not in the database yet"""
+        imported = 0
+        for file_path in sorted(files_dir.glob("*.json")) if files_dir.exists() else []:
+            artifact_id = file_path.stem
+            if self.exists(artifact_id):
+                continue
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                files, messages = _entries_from_json(data, blob_store)
+                self.save(artifact_id, data["metadata"], files, messages)
+                imported += 1
+            except Exception as e:
+                logger.warning(f"Failed to import artifact file {file_path}: {e}")
+        if imported:
+            logger.info(f"Imported {imported} artifact files from {files_dir} into {self.db_path}")
+        return imported
+
+    @staticmethod
+    def _file_entry(row: sqlite3.Row) -> Dict[str, Any]:
+        entry = dict(row)
+        entry["is_binary"] = bool(entry["is_binary"])
+        return entry
+
+
+def _entries_from_json(data: Dict[str, Any], blob_store: BlobStore):
+    """File and message entries of a stored JSON artifact, moving inline contents into the blob and asset stores"""
+    artifact = SavedArtifact(**data)
+    files = [
+        {
+            "path": file.path,
+            "digest": (get_asset_store() if file.is_binary else blob_store).put(file.content),
+            "is_binary": file.is_binary,
+            "size": file.size,
+            "type": file.type
+        }
+        for file in artifact.files
+    ]
+    messages = [
+        {
+            "role": message.role,
+            "digest": blob_store.put(json.dumps(message.dict(), ensure_ascii=False)),
+            "content_digest": blob_digest(message.content)
+        }
+        for message in artifact.messages or []
+    ]
+    return files, messages
+
+
+# Global repository instance, shared by every request handler and tool in the process
+_artifact_repository: Optional[ArtifactRepository] = None
+_artifact_repository_lock = threading.Lock()
+
+def get_artifact_repository() -> ArtifactRepository:
+    """Get or create the global artifact repository, importing artifact JSON files on first use"""
+    global _artifact_repository
+    with _artifact_repository_lock:
+        if _artifact_repository is None:
+            repository = ArtifactRepository()
+            repository.import_json_files(Path.cwd() / "storage" / "files", get_blob_store())
+            _artifact_repository = repository
+        return _artifact_repository
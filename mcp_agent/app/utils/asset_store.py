@@ -0,0 +1,152 @@
+import base64
+import binascii
+import logging
+import os
+import struct
+import threading
+import uuid
+import zlib
+from pathlib import Path
+from typing import Optional, Iterator, Tuple
+
+from .blob_store import blob_digest
+
+logger = logging.getLogger(__name__)
+
+# Asset file header: flags, then the size of the decoded payload
+_HEADER = struct.Struct("<BQ")
+FLAG_COMPRESSED = 1
+FLAG_BASE64 = 2
+
+
+def decode_binary_content(content: str) -> Tuple[bytes, int]:
+    """Bytes of a binary file as sent in a FileItem, and the flags needed to give back the same string
+
+    Canonical base64 is decoded; anything else is kept as its UTF-8 encoding.
+    """
+    try:
+        payload = base64.b64decode(content, validate=True)
+        if base64.b64encode(payload).decode("ascii") == content:
+            return payload, FLAG_BASE64
+    except (binascii.Error, ValueError):
+        pass
+    return content.encode("utf-8"), 0
+
+
+class AssetStore:
+    """
+    Content-addressed store of binary file payloads, kept apart from the text blobs.
+
+    Assets are stored decoded, and compressed only when that saves at least
+    min_saving of the size, since images and fonts are mostly compressed
+    already. They are named by the same digest as text blobs (sha256 of the
+    content string a client sends) so delta sync manifests cover both.
+    Uncompressed assets are read with a seek, which keeps range reads cheap.
+    """
+
+    def __init__(self, asset_dir: Optional[str] = None, compression_level: int = 6, min_saving: float = 0.1):
+        self.asset_dir = Path(asset_dir or Path.cwd() / "storage" / "assets")
+        self.asset_dir.mkdir(parents=True, exist_ok=True)
+        self.compression_level = compression_level
+        self.min_saving = min_saving
+
+    def path(self, digest: str) -> Path:
+        return self.asset_dir / digest[:2] / digest
+
+    def exists(self, digest: str) -> bool:
+        return self.path(digest).exists()
+
+    def put(self, content: str) -> str:
+        """Store a binary file's content if it is not stored yet and return its digest"""
+        digest = blob_digest(content)
+        asset_path = self.path(digest)
+        if asset_path.exists():
+            return digest
+
+        payload, flags = decode_binary_content(content)
+        data = payload
+        compressed = zlib.compress(payload, self.compression_level)
+        if len(compressed) <= (1 - self.min_saving) * len(payload):
+            data = compressed
+            flags |= FLAG_COMPRESSED
+
+        asset_path.parent.mkdir(exist_ok=True)
+        tmp_path = asset_path.with_name(f".{asset_path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(_HEADER.pack(flags, len(payload)))
+                f.write(data)
+            # Concurrent writers of the same content produce identical files
+            os.replace(tmp_path, asset_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        return digest
+
+    def size(self, digest: str) -> int:
+        """Size of the decoded payload; raises FileNotFoundError for an unknown digest"""
+        with open(self.path(digest), 'rb') as f:
+            return _HEADER.unpack(f.read(_HEADER.size))[1]
+
+    def read_bytes(self, digest: str) -> bytes:
+        return b"".join(self.iter_bytes(digest))
+
+    def get(self, digest: str) -> str:
+        """Content string the asset was stored from"""
+        with open(self.path(digest), 'rb') as f:
+            flags, _ = _HEADER.unpack(f.read(_HEADER.size))
+        payload = self.read_bytes(digest)
+        if flags & FLAG_BASE64:
+            return base64.b64encode(payload).decode("ascii")
+        return payload.decode("utf-8")
+
+    def iter_bytes(
+        self, digest: str, start: int = 0, end: Optional[int] = None, chunk_size: int = 64 * 1024
+    ) -> Iterator[bytes]:
+        """Decoded payload bytes start..end (inclusive), in chunks"""
+        with open(self.path(digest), 'rb') as f:
+            flags, size = _HEADER.unpack(f.read(_HEADER.size))
+            end = size - 1 if end is None else min(end, size - 1)
+            remaining = end - start + 1
+            if remaining <= 0:
+                return
+
+            if not flags & FLAG_COMPRESSED:
+                f.seek(_HEADER.size + start)
+                while remaining > 0:
+                    chunk = f.read(min(chunk_size, remaining))
+                    if not chunk:
+                        return
+                    remaining -= len(chunk)
+                    yield chunk
+                return
+
+            # Compressed assets are decompressed from the start, skipping up to the range
+            decompressor = zlib.decompressobj()
+            skip = start
+            while remaining > 0:
+                data = f.read(chunk_size)
+                chunk = decompressor.decompress(data) if data else decompressor.flush()
+                if skip:
+                    dropped = min(skip, len(chunk))
+                    chunk = chunk[dropped:]
+                    skip -= dropped
+                if chunk:
+                    chunk = chunk[:remaining]
+                    remaining -= len(chunk)
+                    yield chunk
+                if not data:
+                    return
+
+
+# Global asset store instance, shared by every artifact save in the process
+_asset_store: Optional[AssetStore] = None
+_asset_store_lock = threading.Lock()
+
+def get_asset_store() -> AssetStore:
+    """Get or create the global asset store"""
+    global _asset_store
+    with _asset_store_lock:
+        if _asset_store is None:
+            _asset_store = AssetStore()
+        return _asset_store
@@ -0,0 +1,74 @@
+import hashlib
+import logging
+import os
+import threading
+import uuid
+import zlib
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def blob_digest(content: str) -> str:
+    """Digest addressing a piece of text; the same sha256 the vector store uses for file hashes"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class BlobStore:
+    """
+    Content-addressed store of compressed text blobs.
+
+    A blob is named by the digest of its content and never changes, so
+    saving content that is already stored costs a stat, and artifacts that
+    share files share their blobs. Blobs are spread over 256 directories
+    by digest prefix to keep directory listings short.
+    """
+
+    def __init__(self, blob_dir: Optional[str] = None, compression_level: int = 6):
+        self.blob_dir = Path(blob_dir or Path.cwd() / "storage" / "blobs")
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.compression_level = compression_level
+
+    def path(self, digest: str) -> Path:
+        return self.blob_dir / digest[:2] / f"{digest}.z"
+
+    def exists(self, digest: str) -> bool:
+        return self.path(digest).exists()
+
+    def put(self, content: str) -> str:
+        """Store content if it is not stored yet and return its digest"""
+        digest = blob_digest(content)
+        blob_path = self.path(digest)
+        if blob_path.exists():
+            return digest
+
+        blob_path.parent.mkdir(exist_ok=True)
+        tmp_path = blob_path.with_name(f".{blob_path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(zlib.compress(content.encode("utf-8"), self.compression_level))
+            # Concurrent writers of the same content produce identical files
+            os.replace(tmp_path, blob_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        return digest
+
+    def get(self, digest: str) -> str:
+        """Content of a blob; raises FileNotFoundError for an unknown digest"""
+        with open(self.path(digest), 'rb') as f:
+            return zlib.decompress(f.read()).decode("utf-8")
+
+
+# Global blob store instance, shared by every artifact save in the process
+_blob_store: Optional[BlobStore] = None
+_blob_store_lock = threading.Lock()
+
+def get_blob_store() -> BlobStore:
+    """Get or create the global blob store"""
+    global _blob_store
+    with _blob_store_lock:
+        if _blob_store is None:
+            _blob_store = BlobStore()
+        return _blob_store
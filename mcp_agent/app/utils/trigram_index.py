@@ -0,0 +1,231 @@
+import json
+import logging
+import os
+import re
+import threading
+import uuid
+import zlib
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Set
+
+from .artifact_repository import get_artifact_repository
+from .blob_store import BlobStore, get_blob_store
+
+logger = logging.getLogger(__name__)
+
+# Characters that lose their special meaning when escaped in a regex
+_ESCAPED_LITERALS = set(r".^$*+?{}[]()|\/-#&~ '\"")
+
+
+def trigrams(text: str) -> Set[str]:
+    """Lowercase trigrams of a string"""
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def required_literals(pattern: str) -> List[str]:
+    """
+    Literal runs that every match of a regex must contain.
+
+    Conservative: literals inside groups are ignored, since the group may be
+    optional, and top-level alternation yields an empty list, which means
+    "scan every file".
+    """
+    if "|" in pattern:
+        return []
+
+    runs: List[str] = []
+    current: List[str] = []
+
+    def flush():
+        if current:
+            runs.append("".join(current))
+            current.clear()
+
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if depth:
+            if c == "\\":
+                i += 1
+            elif c == "(":
+                depth += 1
+            elif c == ")":
+                depth -= 1
+            i += 1
+            continue
+        if c == "\\" and i + 1 < len(pattern):
+            escaped = pattern[i + 1]
+            if escaped in _ESCAPED_LITERALS:
+                current.append(escaped)
+            else:
+                # Character classes such as \d, \w, \s
+                flush()
+            i += 2
+            continue
+        if c in "*?{":
+            # The preceding character may be absent
+            if current:
+                current.pop()
+            flush()
+            if c == "{":
+                close = pattern.find("}", i)
+                i = close + 1 if close != -1 else len(pattern)
+                continue
+        elif c == "+":
+            flush()
+        elif c == "[":
+            flush()
+            close = pattern.find("]", i + 2)
+            i = close + 1 if close != -1 else len(pattern)
+            continue
+        elif c == "(":
+            flush()
+            depth = 1
+        elif c in ".^$)":
+            flush()
+        else:
+            current.append(c)
+        i += 1
+
+    flush()
+    return [run for run in runs if len(run) >= 3]
+
+
+class TrigramIndex:
+    """
+    Trigram index over the text files of one artifact revision for literal and regex grep.
+
+    Holds only paths, blob digests and posting lists; a search reads the
+    content of the candidate files from the blob store. Indexes are saved
+    per artifact and tagged with the revision they were built from, so they
+    are built once per save rather than once per process or cache miss.
+    """
+
+    def __init__(self, revision: int, paths: List[str], digests: List[str], postings: Dict[str, List[int]]):
+        self.revision = revision
+        self.paths = paths
+        self.digests = digests
+        self.postings = postings
+
+    @classmethod
+    def build(cls, revision: int, file_digests: Dict[str, str], blob_store: BlobStore) -> "TrigramIndex":
+        """Index the given path -> blob digest files"""
+        paths = sorted(file_digests)
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for file_index, path in enumerate(paths):
+            for trigram in trigrams(blob_store.get(file_digests[path])):
+                postings[trigram].append(file_index)
+        return cls(revision, paths, [file_digests[path] for path in paths], dict(postings))
+
+    def save(self, index_path: Path):
+        data = {"revision": self.revision, "paths": self.paths, "digests": self.digests, "postings": self.postings}
+        tmp_path = index_path.with_name(f".{index_path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            tmp_path.write_bytes(zlib.compress(json.dumps(data, ensure_ascii=False).encode("utf-8")))
+            os.replace(tmp_path, index_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    @classmethod
+    def load(cls, index_path: Path) -> "TrigramIndex":
+        data = json.loads(zlib.decompress(index_path.read_bytes()).decode("utf-8"))
+        return cls(data["revision"], data["paths"], data["digests"], data["postings"])
+
+    def candidates(self, literals: List[str]) -> List[int]:
+        """Indexes of the files containing every trigram of every required literal"""
+        required = set()
+        for literal in literals:
+            required |= trigrams(literal)
+        if not required:
+            return list(range(len(self.paths)))
+
+        # Intersect the rarest posting lists first
+        candidate_files: Optional[Set[int]] = None
+        for trigram in sorted(required, key=lambda t: len(self.postings.get(t, ()))):
+            files = self.postings.get(trigram)
+            if not files:
+                return []
+            candidate_files = set(files) if candidate_files is None else candidate_files.intersection(files)
+            if not candidate_files:
+                return []
+        return sorted(candidate_files)
+
+    def search(
+        self,
+        pattern: str,
+        blob_store: BlobStore,
+        regex: bool = False,
+        case_sensitive: bool = False,
+        file_extension: Optional[str] = None,
+        max_results: int = 50
+    ) -> List[Dict[str, Any]]:
+        """Return file:line hits for a literal or regex pattern"""
+        flags = 0 if case_sensitive else re.IGNORECASE
+        compiled = re.compile(pattern if regex else re.escape(pattern), flags)
+        literals = required_literals(pattern) if regex else [pattern]
+
+        hits: List[Dict[str, Any]] = []
+        for file_index in self.candidates(literals):
+            path = self.paths[file_index]
+            if file_extension and Path(path).suffix.lstrip('.') != file_extension.lstrip('.'):
+                continue
+            for line_number, line in enumerate(blob_store.get(self.digests[file_index]).splitlines(), start=1):
+                if compiled.search(line):
+                    hits.append({"file_path": path, "line": line_number, "text": line.strip()})
+                    if len(hits) >= max_results:
+                        return hits
+        return hits
+
+
+# Recently used trigram indexes, keyed by artifact id; older ones are reloaded from disk
+_MAX_INDEXES = 32
+_indexes: "OrderedDict[str, TrigramIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+def _index_path(artifact_id: str) -> Path:
+    index_dir = Path.cwd() / "storage" / "trigram_indexes"
+    index_dir.mkdir(parents=True, exist_ok=True)
+    return index_dir / f"{artifact_id}.json.z"
+
+def get_trigram_index(artifact_id: str) -> Optional[TrigramIndex]:
+    """Get the trigram index for an artifact, building and saving it when the artifact has been saved since"""
+    repository = get_artifact_repository()
+    revision = repository.revision(artifact_id)
+    if revision is None:
+        return None
+
+    with _indexes_lock:
+        index = _indexes.get(artifact_id)
+        if index is not None and index.revision == revision:
+            _indexes.move_to_end(artifact_id)
+            return index
+
+    index_path = _index_path(artifact_id)
+    index = None
+    if index_path.exists():
+        try:
+            index = TrigramIndex.load(index_path)
+        except Exception as e:
+            logger.warning(f"Failed to load trigram index for {artifact_id}: {e}")
+    if index is None or index.revision != revision:
+        file_digests = {
+            entry["path"]: entry["digest"] for entry in repository.file_entries(artifact_id) if not entry["is_binary"]
+        }
+        index = TrigramIndex.build(revision, file_digests, get_blob_store())
+        index.save(index_path)
+        logger.info(f"Built trigram index for {artifact_id}: {len(index.paths)} files, {len(index.postings)} trigrams")
+
+    with _indexes_lock:
+        _indexes[artifact_id] = index
+        _indexes.move_to_end(artifact_id)
+        while len(_indexes) > _MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+def list_stored_artifacts() -> List[str]:
+    """Ids of all stored artifacts"""
+    return get_artifact_repository().list_artifact_ids()
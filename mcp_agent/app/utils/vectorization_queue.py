@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Set
+
+from .artifact_functions import ArtifactWrite, aupdate_artifact_vectors
+
+logger = logging.getLogger(__name__)
+
+
+class VectorizationQueue:
+    """
+    Background queue that rebuilds artifact vectors off the request path.
+
+    Jobs are keyed by artifact. Saves that arrive while a job is queued or
+    running replace its pending snapshot, so a burst of saves for one
+    artifact becomes a single rebuild of its latest state. At most one job
+    per artifact runs at a time.
+    """
+
+    def __init__(self, workers: int = 2, job_ttl: float = 3600.0, max_finished_jobs: int = 1000):
+        self.workers = workers
+        # Finished job statuses are kept this long, and at most this many
+        self.job_ttl = job_ttl
+        self.max_finished_jobs = max_finished_jobs
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        # Latest unprocessed snapshot per artifact
+        self._pending: Dict[str, ArtifactWrite] = {}
+        self._queued: Set[str] = set()
+        self._running: Set[str] = set()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        # Artifacts whose latest job finished, oldest first, with the monotonic finish time
+        self._finished: "OrderedDict[str, float]" = OrderedDict()
+
+    async def start(self):
+        """Start the worker tasks on the running event loop"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        # Snapshots submitted before start() are picked up now
+        for artifact_id in self._pending:
+            self._queue.put_nowait(artifact_id)
+            self._queued.add(artifact_id)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Vectorization queue started with {self.workers} workers")
+
+    async def stop(self):
+        """Cancel the workers; jobs still pending are dropped"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info(f"Vectorization queue stopped with {len(self._pending)} pending jobs")
+
+    def submit(self, saved: ArtifactWrite) -> Dict[str, Any]:
+        """Queue a rebuild of an artifact's vectors, coalescing with any pending one"""
+        artifact_id = saved.artifact_id
+        now = datetime.now().isoformat()
+        job = self._jobs.get(artifact_id)
+
+        if artifact_id in self._pending:
+            # Replace the snapshot that has not started yet
+            job["coalesced"] += 1
+            logger.info(f"Coalesced vectorization job for {artifact_id} ({job['coalesced']} saves merged)")
+        else:
+            job = {
+                "artifact_id": artifact_id,
+                "state": "queued",
+                "submitted_at": now,
+                "started_at": None,
+                "finished_at": None,
+                "coalesced": 0,
+                "error": None,
+                # A job still running for an older snapshot stays visible until it finishes
+                "previous": self._jobs.get(artifact_id) if artifact_id in self._running else None
+            }
+            self._jobs[artifact_id] = job
+            self._finished.pop(artifact_id, None)
+            self._prune_jobs()
+
+        job["updated_at"] = now
+        job["file_count"] = len(saved.file_entries)
+        self._pending[artifact_id] = saved
+
+        if self._queue is not None and artifact_id not in self._queued and artifact_id not in self._running:
+            self._queue.put_nowait(artifact_id)
+            self._queued.add(artifact_id)
+
+        return self._public_job(job)
+
+    def get_status(self, artifact_id: str) -> Optional[Dict[str, Any]]:
+        """Current job state for an artifact, or None if it was never queued"""
+        job = self._jobs.get(artifact_id)
+        return self._public_job(job) if job else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and job counts by state"""
+        states: Dict[str, int] = {}
+        for job in self._jobs.values():
+            states[job["state"]] = states.get(job["state"], 0) + 1
+        return {
+            "workers": len(self._tasks),
+            "pending": len(self._pending),
+            "running": len(self._running),
+            "jobs": states
+        }
+
+    async def _worker(self, worker_id: int):
+        while True:
+            artifact_id = await self._queue.get()
+            self._queued.discard(artifact_id)
+            saved = self._pending.pop(artifact_id, None)
+            if saved is None:
+                self._queue.task_done()
+                continue
+
+            job = self._jobs[artifact_id]
+            job.pop("previous", None)
+            job["state"] = "running"
+            job["started_at"] = datetime.now().isoformat()
+            self._running.add(artifact_id)
+
+            try:
+                logger.info(f"Worker {worker_id} vectorizing {artifact_id} ({len(saved.file_entries)} files)")
+                await aupdate_artifact_vectors(saved, raise_errors=True)
+                job["state"] = "done"
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Vectorization job for {artifact_id} failed: {e}")
+                job["state"] = "failed"
+                job["error"] = str(e)
+            finally:
+                job["finished_at"] = datetime.now().isoformat()
+                self._running.discard(artifact_id)
+                if self._jobs.get(artifact_id) is job:
+                    self._finished[artifact_id] = time.monotonic()
+                    self._prune_jobs()
+                self._queue.task_done()
+
+            # Saves that arrived while this job ran are rebuilt next, from their latest state
+            if artifact_id in self._pending and artifact_id not in self._queued:
+                self._queue.put_nowait(artifact_id)
+                self._queued.add(artifact_id)
+
+    def _prune_jobs(self):
+        """Forget finished jobs past their TTL, then the oldest ones over the cap"""
+        expired_before = time.monotonic() - self.job_ttl
+        while self._finished:
+            artifact_id, finished = next(iter(self._finished.items()))
+            if finished > expired_before and len(self._finished) <= self.max_finished_jobs:
+                break
+            del self._finished[artifact_id]
+            del self._jobs[artifact_id]
+
+    @staticmethod
+    def _public_job(job: Dict[str, Any]) -> Dict[str, Any]:
+        status = {key: value for key, value in job.items() if key != "previous"}
+        if job.get("previous"):
+            status["running"] = {
+                key: job["previous"][key] for key in ("state", "started_at", "file_count")
+            }
+        return status
+
+
+# Global vectorization queue instance
+_vectorization_queue: Optional[VectorizationQueue] = None
+
+def get_vectorization_queue() -> VectorizationQueue:
+    """Get or create the global vectorization queue"""
+    global _vectorization_queue
+    if _vectorization_queue is None:
+        _vectorization_queue = VectorizationQueue()
+    return _vectorization_queue
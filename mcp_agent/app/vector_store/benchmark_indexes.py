@@ -0,0 +1,116 @@
+# benchmark_indexes.py
+#
+# Compare the index types in vector_store/manager/index_types.py against exact
+# search: recall@k, p50/p99 single-query latency and bytes per vector.
+#
+#   python -m mcp_agent.vector_store.benchmark_indexes --store storage/vector_store/<artifact_id>
+#   python -m mcp_agent.vector_store.benchmark_indexes --store mcp_agent/retriever/kb
+#   python -m mcp_agent.vector_store.benchmark_indexes --synthetic 50000 --dim 1536
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+from mcp_agent.vector_store.manager.index_types import INDEX_TYPES, build_index, index_bytes
+from mcp_agent.vector_store.manager.mmap_store import INDEX_FILE, load_vectors, store_files_dir
+
+
+def load_store_vectors(store_dir: Path) -> np.ndarray:
+    vectors = load_vectors(store_dir)
+    if vectors is None:
+        # Stores saved before vectors.npy existed have a flat index
+        index = faiss.read_index(str(store_files_dir(store_dir) / INDEX_FILE))
+        vectors = index.reconstruct_n(0, index.ntotal)
+    return np.ascontiguousarray(vectors, dtype=np.float32)
+
+
+def synthetic_vectors(n: int, dim: int, seed: int) -> np.ndarray:
+    # Clustered unit vectors, closer to real embeddings than uniform noise
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, n // 100), dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), n)] + 0.3 * rng.normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_queries(vectors: np.ndarray, n_queries: int, seed: int) -> np.ndarray:
+    # Perturbed copies of stored vectors, so queries land near real data
+    rng = np.random.default_rng(seed + 1)
+    picks = vectors[rng.integers(0, len(vectors), n_queries)]
+    noise = rng.normal(scale=0.05, size=picks.shape).astype(np.float32)
+    return np.ascontiguousarray(picks + noise * np.linalg.norm(picks, axis=1, keepdims=True))
+
+
+def benchmark(vectors: np.ndarray, queries: np.ndarray, k: int, index_types):
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+
+    rows = []
+    for index_type in index_types:
+        start = time.perf_counter()
+        index, info = build_index(vectors, index_type)
+        build_seconds = time.perf_counter() - start
+
+        # Single-query latency, as one request sees it
+        threads = faiss.omp_get_max_threads()
+        faiss.omp_set_num_threads(1)
+        latencies = []
+        hits = 0
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            _, found = index.search(query[None, :], k)
+            latencies.append(time.perf_counter() - start)
+            hits += len(set(found[0]) & set(expected))
+        faiss.omp_set_num_threads(threads)
+
+        latencies_ms = np.array(latencies) * 1000
+        rows.append({
+            "requested": index_type,
+            "index": info["index_factory"],
+            "recall": hits / (len(queries) * k),
+            "p50_ms": float(np.percentile(latencies_ms, 50)),
+            "p99_ms": float(np.percentile(latencies_ms, 99)),
+            "bytes_per_vector": index_bytes(index) / len(vectors),
+            "build_s": build_seconds
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall/latency/size benchmark of FAISS index types")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--store", type=Path, help="vector store directory to read vectors from")
+    source.add_argument("--synthetic", type=int, metavar="N", help="generate N synthetic vectors")
+    parser.add_argument("--dim", type=int, default=1536, help="dimension of synthetic vectors")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--types", nargs="+", default=[t for t in INDEX_TYPES if t != "auto"] + ["auto"],
+                        choices=INDEX_TYPES)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.store:
+        if not args.store.exists():
+            print(f"Store not found: {args.store}")
+            sys.exit(1)
+        vectors = load_store_vectors(args.store)
+    else:
+        vectors = synthetic_vectors(args.synthetic, args.dim, args.seed)
+
+    queries = make_queries(vectors, args.queries, args.seed)
+    k = min(args.k, len(vectors))
+    print(f"{len(vectors)} vectors, dim {vectors.shape[1]}, {len(queries)} queries, recall@{k} vs exact search\n")
+
+    print(f"{'type':<9} {'index':<18} {'recall':>7} {'p50 ms':>8} {'p99 ms':>8} {'bytes/vec':>10} {'build s':>8}")
+    for row in benchmark(vectors, queries, k, args.types):
+        print(
+            f"{row['requested']:<9} {row['index']:<18} {row['recall']:>7.3f} {row['p50_ms']:>8.3f} "
+            f"{row['p99_ms']:>8.3f} {row['bytes_per_vector']:>10.1f} {row['build_s']:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,450 @@
+import bisect
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple, NamedTuple, Sequence
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from .embeddings import stored_embedding_id
+from .metadata_index import MetadataIndex, FilterType
+from .mmap_store import MmapDocstore, load_vectors, replace_atomically, store_generation
+from .mmr import mmr_select
+
+logger = logging.getLogger(__name__)
+
+
+class _Range(NamedTuple):
+    start: int
+    end: int
+    # Generation directory of the per-artifact store the documents are read from
+    generation: str
+
+
+class _Snapshot(NamedTuple):
+    """Index state, read under the shared lock and replaced as a whole by writers"""
+    index: Optional[faiss.Index]
+    ranges: Dict[str, _Range]
+    docstores: Dict[str, MmapDocstore]
+    metadata_indexes: Dict[str, MetadataIndex]
+    next_id: int
+    # Range starts in ascending order and their artifacts, to map a vector id to its artifact
+    starts: List[int]
+    owners: List[str]
+
+
+def _snapshot(
+    index: Optional[faiss.Index],
+    ranges: Dict[str, _Range],
+    docstores: Dict[str, MmapDocstore],
+    metadata_indexes: Dict[str, MetadataIndex],
+    next_id: int
+) -> _Snapshot:
+    order = sorted(ranges, key=lambda artifact_id: ranges[artifact_id].start)
+    return _Snapshot(index, ranges, docstores, metadata_indexes, next_id, [ranges[a].start for a in order], order)
+
+
+class _ReadWriteLock:
+    """Shared lock for searches, exclusive lock for writers; a waiting writer holds back new readers"""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        with self._condition:
+            while self._writing or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._condition:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+
+class ConsolidatedIndex:
+    """Single FAISS index holding the vectors of every artifact.
+
+    Vectors live in an IndexIDMap2 and each artifact owns one contiguous
+    range of vector ids, so a search for one artifact is an id-range
+    selector and a search across all artifacts is a single ANN query.
+
+    Only vectors and id ranges are stored here. Chunk text and metadata are
+    read from the generation of each per-artifact store the vectors came
+    from, through its memory-mapped docstore. Writes change the live index
+    under an exclusive lock that searches wait for, and ids are renumbered
+    once removed ranges leave most of them unused.
+
+    Writing the index to disk is deferred by persist_delay seconds, so a
+    burst of saves is persisted once. The index is derived from the
+    per-artifact stores: sync() re-adds whatever a lost write left out.
+
+    Metadata filters are resolved through each artifact's MetadataIndex to
+    the vector ids they allow, which are passed to FAISS as a selector, so
+    the top k all match the filter.
+    """
+
+    INDEX_FILE = "consolidated.faiss"
+    RANGES_FILE = "consolidated_ranges.json"
+
+    # Renumber vector ids once next_id exceeds this multiple of the vectors held
+    RENUMBER_RATIO = 2
+
+    def __init__(
+        self,
+        index_dir: str,
+        stores_dir: str,
+        embedding_model: Optional[str] = None,
+        persist_delay: float = 5.0
+    ):
+        self.index_dir = Path(index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.stores_dir = Path(stores_dir)
+        # Vectors from a different embedding model are not loaded
+        self.embedding_model = embedding_model
+        self.persist_delay = persist_delay
+
+        self._snapshot = _snapshot(None, {}, {}, {}, 0)
+        self._lock = _ReadWriteLock()
+        # Changes not yet written to disk, guarded by self._lock
+        self._dirty = False
+        # Serializes writes to disk; taken before self._lock, never while holding it
+        self._persist_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._timer_lock = threading.Lock()
+        self._load()
+
+    @property
+    def index(self) -> Optional[faiss.Index]:
+        return self._snapshot.index
+
+    def exists(self) -> bool:
+        """Whether a consolidated index has been written to disk"""
+        return (self.index_dir / self.INDEX_FILE).exists()
+
+    def artifacts(self) -> List[str]:
+        """Artifacts currently held in the index"""
+        return list(self._snapshot.ranges)
+
+    def upsert(self, artifact_id: str):
+        """Replace an artifact's vectors with those of the latest save of its store, without re-embedding"""
+        self._apply(upserts=[artifact_id])
+
+    def remove(self, artifact_id: str):
+        """Drop an artifact's vectors from the index"""
+        if artifact_id in self._snapshot.ranges:
+            self._apply(removes=[artifact_id])
+
+    def sync(self, artifact_ids: Sequence[str]):
+        """Match the index to these artifacts' stores on disk
+
+        Artifacts that are missing or hold an older save of their store are
+        (re)added, and artifacts not listed are dropped, as are stores built
+        with another embedding model.
+        """
+        snapshot = self._snapshot
+        matching = [artifact_id for artifact_id in artifact_ids if self._built_with_model(artifact_id)]
+        wanted = set(matching)
+        upserts = [
+            artifact_id for artifact_id in matching
+            if artifact_id not in snapshot.ranges
+            or snapshot.ranges[artifact_id].generation != self._current_generation(artifact_id)
+        ]
+        removes = [artifact_id for artifact_id in snapshot.ranges if artifact_id not in wanted]
+        if upserts or removes:
+            self._apply(upserts=upserts, removes=removes)
+
+    def flush(self):
+        """Write pending changes to disk now"""
+        with self._timer_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        with self._persist_lock, self._lock.read():
+            if not self._dirty:
+                return
+            try:
+                self._save(self._snapshot)
+                self._dirty = False
+            except Exception as e:
+                logger.error(f"Failed to persist consolidated index: {e}")
+
+    def search(
+        self,
+        query_vector: List[float],
+        search_type: str = "similarity",
+        search_kwargs: Optional[Dict[str, Any]] = None,
+        filter: FilterType = None,
+        artifact_id: Optional[str] = None
+    ) -> List[Tuple[Document, float]]:
+        """Search the whole index or one artifact's range, returning relevance scores (higher is better)"""
+        search_kwargs = search_kwargs or {}
+        k = search_kwargs.get("k", 5)
+        fetch_k = search_kwargs.get("fetch_k", 20)
+
+        with self._lock.read():
+            snapshot = self._snapshot
+            if snapshot.index is None or snapshot.index.ntotal == 0:
+                return []
+
+            if artifact_id is not None and artifact_id not in snapshot.ranges:
+                return []
+            selector = None
+            if filter:
+                allowed = self._allowed_ids(snapshot, filter, artifact_id)
+                if not allowed.any():
+                    return []
+                selector = faiss.IDSelectorBitmap(np.packbits(allowed, bitorder="little"))
+            elif artifact_id is not None:
+                span = snapshot.ranges[artifact_id]
+                selector = faiss.IDSelectorRange(span.start, span.end)
+
+            # Over-fetch when candidates will be re-ranked afterwards
+            n_candidates = max(k, fetch_k) if search_type == "mmr" else k
+            query = np.array([query_vector], dtype=np.float32)
+            params = faiss.SearchParameters(sel=selector) if selector is not None else None
+            distances, ids = snapshot.index.search(query, n_candidates, params=params)
+
+            candidates = [
+                (int(vector_id), self._document(snapshot, int(vector_id)), float(distance))
+                for vector_id, distance in zip(ids[0], distances[0])
+                if vector_id != -1
+            ]
+
+            if search_type == "mmr" and candidates:
+                candidate_ids = np.array([vector_id for vector_id, _, _ in candidates], dtype=np.int64)
+                selected = mmr_select(
+                    query[0], snapshot.index.reconstruct_batch(candidate_ids), k, search_kwargs.get("lambda_mult", 0.5)
+                )
+                candidates = [candidates[i] for i in selected]
+            else:
+                candidates = candidates[:k]
+
+        scored = [(doc, FAISS._euclidean_relevance_score_fn(distance)) for _, doc, distance in candidates]
+        if search_type == "similarity_score_threshold":
+            threshold = search_kwargs.get("score_threshold", 0.0)
+            scored = [(doc, score) for doc, score in scored if score >= threshold]
+        return scored
+
+    @staticmethod
+    def _allowed_ids(snapshot: _Snapshot, filter: FilterType, artifact_id: Optional[str]) -> np.ndarray:
+        """Mask over vector ids of the chunks matching a filter, in one artifact or all of them"""
+        mask = np.zeros(snapshot.next_id, dtype=bool)
+        for searched in [artifact_id] if artifact_id is not None else snapshot.ranges:
+            span = snapshot.ranges[searched]
+            positions = snapshot.metadata_indexes[searched].select(filter)
+            if positions is None:
+                mask[span.start:span.end] = True
+            else:
+                mask[span.start + positions] = True
+        return mask
+
+    @staticmethod
+    def _document(snapshot: _Snapshot, vector_id: int) -> Document:
+        artifact_id = snapshot.owners[bisect.bisect_right(snapshot.starts, vector_id) - 1]
+        return snapshot.docstores[artifact_id].document_at(vector_id - snapshot.ranges[artifact_id].start)
+
+    def _current_generation(self, artifact_id: str) -> str:
+        return store_generation(self.stores_dir / artifact_id) or ""
+
+    def _built_with_model(self, artifact_id: str) -> bool:
+        """Whether an artifact's store holds vectors of this index's embedding model"""
+        if self.embedding_model is None:
+            return True
+        try:
+            with open(self.stores_dir / artifact_id / "metadata.json", 'r') as f:
+                built_with = stored_embedding_id(json.load(f))
+        except FileNotFoundError:
+            built_with = stored_embedding_id({})
+        if built_with != self.embedding_model:
+            logger.warning(
+                f"Not consolidating {artifact_id}: built with {built_with}, not {self.embedding_model}"
+            )
+            return False
+        return True
+
+    def _open_store(self, artifact_id: str) -> Tuple[str, MmapDocstore, np.ndarray]:
+        """Generation, docstore and exact vectors of the latest save of an artifact's store"""
+        generation = self._current_generation(artifact_id)
+        files_dir = self.stores_dir / artifact_id / generation
+        docstore = MmapDocstore(files_dir)
+        vectors = load_vectors(files_dir)
+        return generation, docstore, np.ascontiguousarray(vectors, dtype=np.float32)
+
+    def _apply(self, upserts: Sequence[str] = (), removes: Sequence[str] = ()):
+        """Apply removals and upserts to the live index under the exclusive lock"""
+        # Read the stores before taking the lock, so searches only wait for the index update
+        opened: Dict[str, Tuple[str, MmapDocstore, np.ndarray]] = {}
+        for artifact_id in upserts:
+            try:
+                opened[artifact_id] = self._open_store(artifact_id)
+            except Exception as e:
+                logger.error(f"Failed to consolidate {artifact_id}: {e}")
+
+        with self._lock.write():
+            current = self._snapshot
+            index = current.index
+            ranges = dict(current.ranges)
+            docstores = dict(current.docstores)
+            metadata_indexes = dict(current.metadata_indexes)
+            next_id = current.next_id
+
+            # A store saved again while it was being read is left to that save's own upsert
+            superseded = {
+                artifact_id for artifact_id, (generation, _, _) in opened.items()
+                if generation != self._current_generation(artifact_id)
+            }
+            for artifact_id in list(removes) + [a for a in upserts if a not in superseded]:
+                span = ranges.pop(artifact_id, None)
+                docstores.pop(artifact_id, None)
+                metadata_indexes.pop(artifact_id, None)
+                if span is not None:
+                    index.remove_ids(faiss.IDSelectorRange(span.start, span.end))
+
+            for artifact_id, (generation, docstore, vectors) in opened.items():
+                count = len(vectors)
+                if artifact_id in superseded or count == 0:
+                    continue
+                if index is None:
+                    index = faiss.IndexIDMap2(faiss.index_factory(vectors.shape[1], "Flat"))
+                elif vectors.shape[1] != index.d:
+                    logger.warning(
+                        f"Not consolidating {artifact_id}: {vectors.shape[1]}-d vectors in a {index.d}-d index"
+                    )
+                    continue
+                index.add_with_ids(vectors, np.arange(next_id, next_id + count, dtype=np.int64))
+                ranges[artifact_id] = _Range(next_id, next_id + count, generation)
+                docstores[artifact_id] = docstore
+                metadata_indexes[artifact_id] = MetadataIndex(*docstore.metadata_groups())
+                next_id += count
+
+            # Filters build a mask over every id ever handed out, so keep them dense
+            if index is not None and next_id > self.RENUMBER_RATIO * index.ntotal:
+                index, ranges, next_id = self._renumbered(index, ranges)
+
+            self._snapshot = _snapshot(index, ranges, docstores, metadata_indexes, next_id)
+            self._dirty = True
+
+        if upserts:
+            logger.info(f"Consolidated vectors for {len(opened) - len(superseded)} artifacts")
+        self._schedule_persist()
+
+    @staticmethod
+    def _renumbered(index: faiss.Index, ranges: Dict[str, _Range]) -> Tuple[faiss.Index, Dict[str, _Range], int]:
+        """Copy of the index with ids 0..ntotal-1, each artifact's range still contiguous"""
+        order = sorted(ranges, key=lambda artifact_id: ranges[artifact_id].start)
+        renumbered_ranges: Dict[str, _Range] = {}
+        next_id = 0
+        for artifact_id in order:
+            span = ranges[artifact_id]
+            renumbered_ranges[artifact_id] = _Range(next_id, next_id + span.end - span.start, span.generation)
+            next_id += span.end - span.start
+
+        renumbered = faiss.IndexIDMap2(faiss.index_factory(index.d, "Flat"))
+        if order:
+            old_starts = np.array([ranges[a].start for a in order], dtype=np.int64)
+            new_starts = np.array([renumbered_ranges[a].start for a in order], dtype=np.int64)
+            old_ids = faiss.vector_to_array(index.id_map)
+            owners = np.searchsorted(old_starts, old_ids, side="right") - 1
+            vectors = faiss.downcast_index(index.index).reconstruct_n(0, index.ntotal)
+            renumbered.add_with_ids(vectors, old_ids - old_starts[owners] + new_starts[owners])
+        logger.info(f"Renumbered consolidated index to {next_id} ids")
+        return renumbered, renumbered_ranges, next_id
+
+    def _schedule_persist(self):
+        if self.persist_delay <= 0:
+            self.flush()
+            return
+        with self._timer_lock:
+            if self._timer is None:
+                self._timer = threading.Timer(self.persist_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _save(self, snapshot: _Snapshot):
+        if snapshot.index is None:
+            return
+        replace_atomically(
+            self.index_dir / self.INDEX_FILE, lambda path: faiss.write_index(snapshot.index, str(path))
+        )
+        replace_atomically(
+            self.index_dir / self.RANGES_FILE,
+            lambda path: path.write_text(
+                json.dumps(
+                    {
+                        "next_id": snapshot.next_id,
+                        "ntotal": snapshot.index.ntotal,
+                        "ranges": {artifact_id: list(span) for artifact_id, span in snapshot.ranges.items()},
+                        "embedding_model": self.embedding_model
+                    },
+                    indent=2
+                ),
+                encoding="utf-8"
+            )
+        )
+
+    def _load(self):
+        if not self.exists():
+            return
+        try:
+            with open(self.index_dir / self.RANGES_FILE, 'r') as f:
+                saved = json.load(f)
+            if saved.get("embedding_model") != self.embedding_model:
+                logger.warning(
+                    f"Consolidated index was built with {saved.get('embedding_model')}, "
+                    f"not {self.embedding_model}; ignoring it"
+                )
+                return
+            index = faiss.read_index(str(self.index_dir / self.INDEX_FILE))
+            if saved.get("ntotal") != index.ntotal:
+                logger.warning("Consolidated index and its ranges were written by different saves; ignoring it")
+                return
+
+            ranges: Dict[str, _Range] = {}
+            docstores: Dict[str, MmapDocstore] = {}
+            metadata_indexes: Dict[str, MetadataIndex] = {}
+            for artifact_id, span in saved["ranges"].items():
+                span = _Range(*span)
+                if span.generation == self._current_generation(artifact_id):
+                    try:
+                        docstore = MmapDocstore(self.stores_dir / artifact_id / span.generation)
+                        docstores[artifact_id] = docstore
+                        metadata_indexes[artifact_id] = MetadataIndex(*docstore.metadata_groups())
+                        ranges[artifact_id] = span
+                        continue
+                    except FileNotFoundError:
+                        pass
+                # The store was saved again since; its vectors are added back by sync()
+                index.remove_ids(faiss.IDSelectorRange(span.start, span.end))
+
+            self._snapshot = _snapshot(index, ranges, docstores, metadata_indexes, saved["next_id"])
+            logger.info(f"Loaded consolidated index with {index.ntotal} vectors for {len(ranges)} artifacts")
+        except Exception as e:
+            logger.error(f"Failed to load consolidated index: {e}")
+            self._snapshot = _snapshot(None, {}, {}, {}, 0)
@@ -0,0 +1,178 @@
+import logging
+from typing import List, Any, Optional, Tuple
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_core.documents import Document
+
+from .metadata_index import MetadataIndex, FilterType
+from .mmr import mmr_select
+
+logger = logging.getLogger(__name__)
+
+
+class PrefilteredFAISS(FAISS):
+    """
+    FAISS store that applies metadata filters before searching, not after.
+
+    A filter is resolved through the store's MetadataIndex to the vector
+    positions it allows. Small subsets are scored exactly with NumPy over
+    the saved vectors; larger ones are searched in the FAISS index with an
+    id selector. Either way the top-k comes from the matching chunks only,
+    instead of whatever survives a post-filter over fetch_k candidates.
+    """
+
+    # Filtered subsets up to this size are scored exactly instead of through the index
+    EXACT_SUBSET_MAX = 4096
+
+    def __init__(self, *args, metadata_index: MetadataIndex, vectors: Optional[np.ndarray] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metadata_index = metadata_index
+        self.vectors_mapped = isinstance(vectors, np.memmap)
+        self.vectors = np.asarray(vectors, dtype=np.float32) if vectors is not None else None
+        self.squared_norms: Optional[np.ndarray] = None
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: FilterType = None,
+        fetch_k: int = 20,
+        **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        positions, scores = self._search_positions(embedding, k, self.metadata_index.select(filter))
+
+        score_threshold = kwargs.get("score_threshold")
+        if score_threshold is not None:
+            keep = scores >= score_threshold if self._higher_is_better() else scores <= score_threshold
+            positions, scores = positions[keep], scores[keep]
+
+        return [(self.document_at(position), float(score)) for position, score in zip(positions, scores)]
+
+    def max_marginal_relevance_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        *,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: FilterType = None
+    ) -> List[Tuple[Document, float]]:
+        positions, scores = self._search_positions(embedding, fetch_k, self.metadata_index.select(filter))
+        selected = mmr_select(np.array(embedding, dtype=np.float32), self._vectors_at(positions), k, lambda_mult)
+        return [(self.document_at(positions[i]), float(scores[i])) for i in selected]
+
+    def search_candidates_by_vector(
+        self, embedding: List[float], fetch_k: int = 20, filter: FilterType = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Positions, raw scores and stored vectors of the top fetch_k chunks, for re-ranking across stores
+
+        Documents are not read; fetch the ones that are kept with document_at.
+        """
+        positions, scores = self._search_positions(embedding, fetch_k, self.metadata_index.select(filter))
+        return positions, scores, self._vectors_at(positions)
+
+    def _search_positions(
+        self, embedding: List[float], k: int, allowed: Optional[np.ndarray]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Positions and scores of the k best vectors, best first, among the allowed positions"""
+        if allowed is not None and len(allowed) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        if allowed is not None and self.vectors is not None and len(allowed) <= self.EXACT_SUBSET_MAX:
+            return self._exact_search(embedding, k, allowed)
+
+        query = np.array([embedding], dtype=np.float32)
+        if self._normalize_L2:
+            faiss.normalize_L2(query)
+        params = None
+        if allowed is not None:
+            mask = np.zeros(self.index.ntotal, dtype=bool)
+            mask[allowed] = True
+            bitmap = np.packbits(mask, bitorder="little")
+            params = self._search_params(faiss.IDSelectorBitmap(bitmap))
+        scores, positions = self.index.search(query, k, params=params)
+        found = positions[0] != -1
+        return positions[0][found], scores[0][found]
+
+    def _search_params(self, selector: faiss.IDSelector) -> faiss.SearchParameters:
+        # IVF and HNSW indexes need their own parameter types; carry over their saved settings
+        ivf = faiss.try_extract_index_ivf(self.index)
+        if ivf is not None:
+            return faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+        if isinstance(self.index, faiss.IndexHNSW):
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=self.index.hnsw.efSearch)
+        return faiss.SearchParameters(sel=selector)
+
+    def _exact_search(
+        self, embedding: List[float], k: int, allowed: Optional[np.ndarray]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Brute-force top-k over the saved vectors, optionally restricted to some positions"""
+        query = np.asarray(embedding, dtype=np.float32)
+        rows = self.vectors if allowed is None else self.vectors[allowed]
+        products = rows @ query
+        if self._higher_is_better():
+            ranking = -products
+            scores = products
+        else:
+            # ||x - q||^2 = ||x||^2 - 2 x.q + ||q||^2, as FAISS reports it
+            if self.squared_norms is not None:
+                norms = self.squared_norms if allowed is None else self.squared_norms[allowed]
+            else:
+                norms = np.einsum("ij,ij->i", rows, rows)
+            scores = norms - 2 * products + float(query @ query)
+            ranking = scores
+
+        k = min(k, len(ranking))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        top = np.argpartition(ranking, k - 1)[:k] if k < len(ranking) else np.arange(len(ranking))
+        top = top[np.argsort(ranking[top], kind="stable")]
+        positions = top if allowed is None else allowed[top]
+        return positions, scores[top]
+
+    def _vectors_at(self, positions: np.ndarray) -> np.ndarray:
+        if self.vectors is not None:
+            return self.vectors[positions]
+        if len(positions) == 0:
+            return np.empty((0, self.index.d), dtype=np.float32)
+        return self.index.reconstruct_batch(np.asarray(positions, dtype=np.int64))
+
+    def _higher_is_better(self) -> bool:
+        return self.distance_strategy in (DistanceStrategy.MAX_INNER_PRODUCT, DistanceStrategy.JACCARD)
+
+    def document_at(self, position: int) -> Document:
+        doc_id = self.index_to_docstore_id[int(position)]
+        doc = self.docstore.search(doc_id)
+        if not isinstance(doc, Document):
+            raise ValueError(f"Could not find document for id {doc_id}, got {doc}")
+        return doc
+
+    def resident_bytes(self) -> int:
+        """Heap held outside the index and docstore: metadata postings, norms, unmapped vectors"""
+        vector_bytes = 0 if self.vectors is None or self.vectors_mapped else self.vectors.nbytes
+        norm_bytes = self.squared_norms.nbytes if self.squared_norms is not None else 0
+        return self.metadata_index.resident_bytes() + vector_bytes + norm_bytes
+
+
+class DenseVectorStore(PrefilteredFAISS):
+    """
+    Store whose searches are all served by NumPy over the exact vector matrix.
+
+    For the few hundred chunks of a typical artifact, one matrix-vector
+    product and an argpartition beat the FAISS search call and the per-hit
+    docstore lookups it is wrapped in. Scores are the same as FAISS's
+    (squared L2 distance, or inner product), so results can be merged with
+    those of FAISS-backed stores.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # ||x||^2 per row, so an L2 search is a single product with the query
+        self.squared_norms = np.einsum("ij,ij->i", self.vectors, self.vectors)
+
+    def _search_positions(
+        self, embedding: List[float], k: int, allowed: Optional[np.ndarray]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        return self._exact_search(embedding, k, allowed)
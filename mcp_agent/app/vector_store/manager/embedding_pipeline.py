@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import random
+import time
+from typing import List, Dict, Any, Callable, Optional
+
+from .embedding_cache import CachedEmbeddings, EmbeddingCache
+
+logger = logging.getLogger(__name__)
+
+
+def _token_counter(model_name: str) -> Callable[[str], int]:
+    """Token counter for the embedding model, falling back to ~4 characters per token"""
+    try:
+        import tiktoken
+        try:
+            encoding = tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception as e:
+        logger.warning(f"tiktoken unavailable ({e}), estimating tokens from text length")
+        return lambda text: len(text) // 4 + 1
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds to wait from a Retry-After header, if the error carries one"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Rate limits (429) and transient server errors (5xx)"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return type(error).__name__ in ("RateLimitError", "APITimeoutError", "APIConnectionError")
+
+
+class EmbeddingPipeline:
+    """
+    Async embedding of large batches of texts.
+
+    Texts are packed into requests by token count, a bounded number of
+    requests run concurrently, and rate limits back off every worker at
+    once. Each finished batch is written to the embedding cache straight
+    away, so a run that fails part-way resumes from where it stopped.
+    """
+
+    def __init__(
+        self,
+        embeddings: CachedEmbeddings,
+        max_batch_tokens: int = 100_000,
+        max_batch_size: int = 1000,
+        max_concurrency: int = 4,
+        max_retries: int = 6,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0
+    ):
+        self.embeddings = embeddings
+        self.cache: EmbeddingCache = embeddings.cache
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._count_tokens: Optional[Callable[[str], int]] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Monotonic time before which no request is sent, pushed forward by 429s
+        self._resume_at = 0.0
+
+        self.requests = 0
+        self.retries = 0
+        self.embedded = 0
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, calling the model only for those not already cached"""
+        if not texts:
+            return []
+
+        keys = [EmbeddingCache.make_key(self.embeddings.model_name, text) for text in texts]
+        vectors = await asyncio.to_thread(self.cache.get_many, keys)
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in missing:
+                missing[key] = text
+
+        if missing:
+            batches = await asyncio.to_thread(self._pack_batches, list(missing.items()))
+            logger.info(
+                f"Embedding {len(missing)} texts in {len(batches)} batches "
+                f"({len(texts) - len(missing)} already cached)"
+            )
+
+            results = await asyncio.gather(
+                *(self._embed_batch(batch) for batch in batches), return_exceptions=True
+            )
+            errors = [result for result in results if isinstance(result, BaseException)]
+            for result in results:
+                if not isinstance(result, BaseException):
+                    vectors.update(result)
+
+            if errors:
+                logger.error(
+                    f"{len(errors)} of {len(batches)} embedding batches failed; "
+                    f"completed batches are cached and will be reused on retry"
+                )
+                raise errors[0]
+
+        return [vectors[key] for key in keys]
+
+    def stats(self) -> Dict[str, Any]:
+        """Request, retry and throughput counters"""
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "embedded": self.embedded,
+            "max_concurrency": self.max_concurrency,
+            "max_batch_tokens": self.max_batch_tokens
+        }
+
+    def _pack_batches(self, items: List[tuple]) -> List[List[tuple]]:
+        """Greedily pack (key, text) pairs into batches under the token and size limits"""
+        if self._count_tokens is None:
+            self._count_tokens = _token_counter(self.embeddings.model_name)
+
+        batches: List[List[tuple]] = []
+        current: List[tuple] = []
+        current_tokens = 0
+        for key, text in items:
+            tokens = self._count_tokens(text)
+            if current and (current_tokens + tokens > self.max_batch_tokens or len(current) >= self.max_batch_size):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append((key, text))
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _embed_batch(self, batch: List[tuple]) -> Dict[str, List[float]]:
+        """Embed one batch with backoff, then checkpoint it to the cache"""
+        keys = [key for key, _ in batch]
+        texts = [text for _, text in batch]
+
+        async with self._get_semaphore():
+            for attempt in range(self.max_retries + 1):
+                wait = self._resume_at - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+                try:
+                    self.requests += 1
+                    vectors = await self.embeddings.embeddings.aembed_documents(texts)
+                    break
+                except Exception as e:
+                    if attempt == self.max_retries or not _is_retryable(e):
+                        raise
+                    delay = _retry_after(e) or min(self.max_delay, self.base_delay * 2 ** attempt)
+                    delay += random.uniform(0, delay / 4)
+                    # Hold back every worker, not just this one, until the limit resets
+                    self._resume_at = max(self._resume_at, time.monotonic() + delay)
+                    self.retries += 1
+                    logger.warning(
+                        f"Embedding batch of {len(texts)} texts failed ({e}), "
+                        f"retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})"
+                    )
+
+        new_vectors = dict(zip(keys, vectors))
+        await asyncio.to_thread(self.cache.put_many, new_vectors)
+        self.embedded += len(new_vectors)
+        return new_vectors
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Concurrency bound shared by every call on the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
@@ -0,0 +1,127 @@
+import logging
+import math
+import os
+import zlib
+from collections import Counter
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from .embedding_cache import CachedEmbeddings, EmbeddingCache
+from .lexical_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BACKENDS = ("openai", "hashing", "huggingface")
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Local CPU embeddings: signed feature hashing of identifier tokens and
+    their character n-grams into a fixed number of dimensions.
+
+    Needs no model, no network and no fitting, so vectors are identical
+    across processes and machines. Token counts are sublinearly scaled
+    and vectors are L2-normalised.
+    """
+
+    def __init__(self, dimension: int = 1024, ngram_size: int = 3, ngram_weight: float = 0.5):
+        self.dimension = dimension
+        self.ngram_size = ngram_size
+        self.ngram_weight = ngram_weight
+        self.model = f"hashing-{dimension}"
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text).tolist() for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text).tolist()
+
+    def _features(self, text: str) -> Dict[str, float]:
+        features: Dict[str, float] = {}
+        for token, count in Counter(tokenize(text)).items():
+            weight = 1.0 + math.log(count)
+            features["t:" + token] = features.get("t:" + token, 0.0) + weight
+            # Character n-grams let related identifiers, e.g. "TopBar" and "top-bar", share dimensions
+            padded = f"<{token}>"
+            for i in range(len(padded) - self.ngram_size + 1):
+                key = "g:" + padded[i:i + self.ngram_size]
+                features[key] = features.get(key, 0.0) + weight * self.ngram_weight
+        return features
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        features = self._features(text)
+        if not features:
+            return vector
+
+        indices = np.empty(len(features), dtype=np.int64)
+        values = np.empty(len(features), dtype=np.float32)
+        for i, (feature, weight) in enumerate(features.items()):
+            # crc32 is stable across processes, unlike hash()
+            digest = zlib.crc32(feature.encode("utf-8"))
+            indices[i] = digest % self.dimension
+            values[i] = weight if (digest >> 31) & 1 else -weight
+        np.add.at(vector, indices, values)
+
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+def get_embeddings_config(backend: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Embedding backend selected by configuration
+
+    EMBEDDINGS_BACKEND picks "openai" (default), "hashing" or "huggingface".
+    EMBEDDINGS_MODEL names the OpenAI model or the local model path, and
+    EMBEDDINGS_DIMENSION sizes the hashing backend.
+    """
+    backend = (backend or os.getenv("EMBEDDINGS_BACKEND", "openai")).lower()
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embeddings backend '{backend}', expected one of {EMBEDDING_BACKENDS}")
+
+    model = os.getenv("EMBEDDINGS_MODEL")
+    if backend == "openai":
+        model = model or "text-embedding-ada-002"
+    elif backend == "hashing":
+        model = f"hashing-{int(os.getenv('EMBEDDINGS_DIMENSION', '1024'))}"
+    elif not model:
+        raise ValueError("EMBEDDINGS_MODEL must name a local model for the huggingface backend")
+
+    return {"backend": backend, "model": model}
+
+
+def embedding_id(config: Dict[str, Any]) -> str:
+    """Backend and model that vectors are built with, e.g. openai:text-embedding-ada-002"""
+    return f"{config['backend']}:{config['model']}"
+
+
+def stored_embedding_id(metadata: Dict[str, Any]) -> str:
+    """Backend and model recorded in a store's metadata; older stores were all built with OpenAI"""
+    return embedding_id({
+        "backend": metadata.get("embedding_backend", "openai"),
+        "model": metadata.get("embedding_model", "text-embedding-ada-002")
+    })
+
+
+def create_embeddings(config: Dict[str, Any], cache: Optional[EmbeddingCache] = None) -> Embeddings:
+    """Embeddings for a backend config; model-backed ones sit behind the embedding cache"""
+    backend, model = config["backend"], config["model"]
+
+    if backend == "hashing":
+        # Cheaper to recompute than to look up
+        return HashingEmbeddings(dimension=int(model.rsplit("-", 1)[1]))
+
+    if backend == "openai":
+        from langchain_openai import OpenAIEmbeddings
+        embeddings = OpenAIEmbeddings(model=model)
+    else:
+        try:
+            from langchain_community.embeddings import HuggingFaceEmbeddings
+        except ImportError as e:
+            raise ImportError("The huggingface embeddings backend requires sentence-transformers") from e
+        embeddings = HuggingFaceEmbeddings(model_name=model, encode_kwargs={"normalize_embeddings": True})
+
+    logger.info(f"Using {backend} embeddings ({model})")
+    return CachedEmbeddings(embeddings, cache)
@@ -1,6 +1,8 @@
 from datetime import datetime
 import json
 import logging
+import os
+import threading
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 from langchain_core.tools import tool
@@ -8,13 +10,30 @@ from ..manager.vector_manager import VectorStoreManager
 
 logger = logging.getLogger(__name__)
 
-# Global vector manager instance
+# Global vector manager instance, shared by the save path and all tools
 _vector_manager: Optional[VectorStoreManager] = None
+_vector_manager_lock = threading.Lock()
 
 def get_vector_manager() -> VectorStoreManager:
     """Get or create the global vector store manager"""
     global _vector_manager
-    if _vector_manager is None:
-        storage_dir = Path.cwd() / "storage" / "vector_store"
-        _vector_manager = VectorStoreManager(str(storage_dir))
-    return _vector_manager
+    with _vector_manager_lock:
+        if _vector_manager is None:
+            storage_dir = Path.cwd() / "storage" / "vector_store"
+            storage_dir.mkdir(parents=True, exist_ok=True)
+            # VECTOR_STORE_LAYOUT=consolidated serves all searches from one shared index
+            layout = os.getenv("VECTOR_STORE_LAYOUT", "per_artifact")
+            # VECTOR_STORE_MMAP=0 loads stores fully into each process instead of memory-mapping them
+            mmap_load = os.getenv("VECTOR_STORE_MMAP", "1") != "0"
+            # VECTOR_INDEX_TYPE=flat|fp16|sq8|ivf_flat|ivf_pq|hnsw overrides the size-based choice
+            index_type = os.getenv("VECTOR_INDEX_TYPE", "auto")
+            # Stores up to VECTOR_DENSE_MAX_VECTORS vectors are searched with NumPy; 0 always uses FAISS
+            dense_max_vectors = int(os.getenv("VECTOR_DENSE_MAX_VECTORS", "2000"))
+            _vector_manager = VectorStoreManager(
+                str(storage_dir),
+                layout=layout,
+                mmap_load=mmap_load,
+                index_type=index_type,
+                dense_max_vectors=dense_max_vectors
+            )
+        return _vector_manager
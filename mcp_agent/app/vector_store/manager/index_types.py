@@ -0,0 +1,119 @@
+import logging
+import math
+from typing import Dict, Any, Tuple
+
+import faiss
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("auto", "flat", "fp16", "sq8", "ivf_flat", "ivf_pq", "hnsw")
+
+# "auto" picks by vector count: exact search while it is cheap, then
+# 4x smaller scalar-quantized codes, then IVF-PQ for large collections
+AUTO_SQ8_MIN_VECTORS = 10_000
+AUTO_IVF_PQ_MIN_VECTORS = 200_000
+
+# Quantizers need enough training points; below this a type falls back to flat
+MIN_TRAINING_VECTORS = {"ivf_flat": 1_000, "ivf_pq": 10_000}
+
+# Training cost grows with the sample, not the collection; every save retrains
+MAX_TRAINING_VECTORS = 25_000
+
+HNSW_NEIGHBORS = 32
+HNSW_EF_SEARCH = 64
+
+
+def resolve_index_type(index_type: str, n_vectors: int) -> str:
+    """Concrete index type for a configured one and a vector count"""
+    index_type = (index_type or "auto").lower()
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}', expected one of {INDEX_TYPES}")
+
+    if index_type == "auto":
+        if n_vectors >= AUTO_IVF_PQ_MIN_VECTORS:
+            return "ivf_pq"
+        if n_vectors >= AUTO_SQ8_MIN_VECTORS:
+            return "sq8"
+        return "flat"
+
+    if n_vectors < MIN_TRAINING_VECTORS.get(index_type, 0):
+        return "flat"
+    return index_type
+
+
+def _nlist(n_vectors: int) -> int:
+    # ~4*sqrt(n) lists, keeping at least 39 training points per centroid
+    return max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // 39))
+
+
+def _pq_subquantizers(dimension: int) -> int:
+    # About 16 dimensions per 8-bit sub-quantizer, dividing the dimension evenly
+    target = max(1, dimension // 16)
+    for m in range(target, 0, -1):
+        if dimension % m == 0:
+            return m
+    return 1
+
+
+def factory_string(index_type: str, n_vectors: int, dimension: int) -> str:
+    """faiss.index_factory description for a concrete index type"""
+    if index_type == "flat":
+        return "Flat"
+    if index_type == "fp16":
+        return "SQfp16"
+    if index_type == "sq8":
+        return "SQ8"
+    if index_type == "ivf_flat":
+        return f"IVF{_nlist(n_vectors)},Flat"
+    if index_type == "ivf_pq":
+        return f"IVF{_nlist(n_vectors)},PQ{_pq_subquantizers(dimension)}x8"
+    if index_type == "hnsw":
+        return f"HNSW{HNSW_NEIGHBORS}"
+    raise ValueError(f"No factory string for index type '{index_type}'")
+
+
+def _training_sample(vectors: np.ndarray) -> np.ndarray:
+    if len(vectors) <= MAX_TRAINING_VECTORS:
+        return vectors
+    # Fixed seed so an unchanged collection trains the same quantizer
+    positions = np.random.default_rng(0).choice(len(vectors), MAX_TRAINING_VECTORS, replace=False)
+    return vectors[np.sort(positions)]
+
+
+def build_index(
+    vectors: np.ndarray,
+    index_type: str = "auto",
+    metric: int = faiss.METRIC_L2
+) -> Tuple[faiss.Index, Dict[str, Any]]:
+    """
+    Build an index of the resolved type over vectors, in their order.
+
+    Search parameters (nprobe, efSearch) are set on the index and saved
+    with it. Returns the index and a description for the store metadata.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n_vectors, dimension = vectors.shape
+    resolved = resolve_index_type(index_type, n_vectors)
+    description = factory_string(resolved, n_vectors, dimension)
+
+    index = faiss.index_factory(dimension, description, metric)
+    if not index.is_trained:
+        index.train(_training_sample(vectors))
+    index.add(vectors)
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = max(1, min(ivf.nlist, ivf.nlist // 8))
+        # MMR and the consolidated index reconstruct vectors by id
+        ivf.make_direct_map()
+    if resolved == "hnsw":
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+
+    logger.info(f"Built {description} index over {n_vectors} vectors")
+    return index, {"index_type": resolved, "index_factory": description}
+
+
+def index_bytes(index: faiss.Index) -> int:
+    """Serialized size of an index"""
+    return int(faiss.serialize_index(index).size)
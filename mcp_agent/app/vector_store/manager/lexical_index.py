@@ -0,0 +1,121 @@
+import json
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import List, Dict, Iterable, Tuple, Optional, Collection
+
+logger = logging.getLogger(__name__)
+
+# Identifiers, including the dashed names used by web components and CSS classes
+_TOKEN_RE = re.compile(r"[A-Za-z_$][A-Za-z0-9_$]*(?:-[A-Za-z0-9_$]+)*")
+_SUBTOKEN_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split code into lowercase identifier tokens plus their camelCase/snake/kebab parts"""
+    tokens = []
+    for match in _TOKEN_RE.finditer(text):
+        identifier = match.group()
+        tokens.append(identifier.lower())
+        parts = _SUBTOKEN_RE.findall(identifier)
+        if len(parts) > 1:
+            tokens.extend(part.lower() for part in parts)
+    return tokens
+
+
+class LexicalIndex:
+    """BM25 inverted index over the chunks of one artifact, keyed by docstore id"""
+
+    FILE_NAME = "lexical.json"
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_terms: Dict[str, Dict[str, int]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_terms)
+
+    def add(self, chunks: Iterable[Tuple[str, str]]):
+        """Index (docstore id, text) pairs"""
+        for doc_id, text in chunks:
+            self._add_terms(doc_id, Counter(tokenize(text)))
+
+    def remove(self, doc_ids: Iterable[str]):
+        """Drop chunks from the index"""
+        for doc_id in doc_ids:
+            terms = self.doc_terms.pop(doc_id, None)
+            if terms is None:
+                continue
+            for term in terms:
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self.postings[term]
+            self.total_length -= self.doc_lengths.pop(doc_id)
+
+    def search(self, query: str, k: int = 20, allowed: Optional[Collection[str]] = None) -> List[Tuple[str, float]]:
+        """Return up to k (docstore id, BM25 score) pairs, best first
+
+        With allowed, only those chunks are scored, so a metadata filter
+        still yields k matches however few chunks it allows.
+        """
+        query_terms = set(tokenize(query))
+        if not query_terms or not self.doc_terms or (allowed is not None and not allowed):
+            return []
+
+        n_docs = len(self.doc_terms)
+        avg_length = self.total_length / n_docs
+        scores: Dict[str, float] = defaultdict(float)
+
+        for term in query_terms:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            if allowed is None:
+                matches = postings.items()
+            elif len(allowed) < len(postings):
+                matches = ((doc_id, postings[doc_id]) for doc_id in allowed if doc_id in postings)
+            else:
+                matches = ((doc_id, tf) for doc_id, tf in postings.items() if doc_id in allowed)
+            for doc_id, tf in matches:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def copy(self) -> "LexicalIndex":
+        """Independent copy that can be modified while this one is being searched"""
+        index = LexicalIndex(self.k1, self.b)
+        for doc_id, terms in self.doc_terms.items():
+            index._add_terms(doc_id, terms)
+        return index
+
+    def save(self, directory: Path):
+        with open(Path(directory) / self.FILE_NAME, 'w', encoding='utf-8') as f:
+            json.dump(self.doc_terms, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory: Path) -> "LexicalIndex":
+        index = cls()
+        with open(Path(directory) / cls.FILE_NAME, 'r', encoding='utf-8') as f:
+            for doc_id, terms in json.load(f).items():
+                index._add_terms(doc_id, terms)
+        return index
+
+    def _add_terms(self, doc_id: str, terms: Dict[str, int]):
+        if doc_id in self.doc_terms:
+            self.remove([doc_id])
+        self.doc_terms[doc_id] = dict(terms)
+        length = sum(terms.values())
+        self.doc_lengths[doc_id] = length
+        self.total_length += length
+        for term, tf in terms.items():
+            self.postings[term][doc_id] = tf
@@ -0,0 +1,138 @@
+import bisect
+import json
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Callable, Union
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+FilterType = Optional[Union[Callable, Dict[str, Any]]]
+
+# Filter key matching every chunk whose file path starts with the given prefix,
+# e.g. {"path_prefix": "src/components/", "file_extension": "tsx"}
+PATH_PREFIX_FILTER = "path_prefix"
+
+
+def matches_filter(metadata: Dict[str, Any], filter: FilterType) -> bool:
+    """Metadata filter with FAISS semantics (equality, lists, $-operators), plus path_prefix"""
+    if not filter:
+        return True
+    if callable(filter):
+        return bool(filter(metadata))
+
+    conditions = dict(filter)
+    prefix = conditions.pop(PATH_PREFIX_FILTER, None)
+    if prefix is not None and not str(metadata.get("file_path", "")).startswith(prefix):
+        return False
+    return not conditions or FAISS._create_filter_func(conditions)(metadata)
+
+
+class MetadataIndex:
+    """
+    Inverted index from chunk metadata to vector positions of one store.
+
+    Chunks of a file share one metadata dict, so postings are kept per
+    distinct dict ("group"). Extension, file type and source map values
+    straight to positions, file paths are kept sorted for prefix lookups,
+    and any other condition is evaluated once per group. A filter resolves
+    to the sorted positions it allows, before any vector is scored.
+    """
+
+    INDEXED_FIELDS = ("file_extension", "file_type", "source", "file_path")
+
+    # Distinct filters whose resolved positions are kept
+    MAX_CACHED_FILTERS = 32
+
+    def __init__(self, metadatas: List[Dict[str, Any]], chunk_metadata: np.ndarray):
+        self.metadatas = metadatas
+        self.size = len(chunk_metadata)
+
+        chunk_metadata = np.asarray(chunk_metadata, dtype=np.int64)
+        order = np.argsort(chunk_metadata, kind="stable")
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(chunk_metadata, minlength=len(metadatas)))))
+        self._group_positions = [order[bounds[g]:bounds[g + 1]] for g in range(len(metadatas))]
+
+        self._postings: Dict[str, Dict[Any, List[int]]] = {field: {} for field in self.INDEXED_FIELDS}
+        for group, metadata in enumerate(metadatas):
+            for field in self.INDEXED_FIELDS:
+                if field in metadata:
+                    self._postings[field].setdefault(self._value_key(metadata[field]), []).append(group)
+
+        self._paths = sorted(
+            (str(metadata.get("file_path", "")), group) for group, metadata in enumerate(metadatas)
+        )
+
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def select(self, filter: FilterType) -> Optional[np.ndarray]:
+        """Sorted positions allowed by a filter, or None when it allows everything"""
+        if not filter:
+            return None
+
+        key = None if callable(filter) else json.dumps(filter, sort_keys=True, default=str)
+        if key is not None:
+            with self._lock:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    return self._cache[key]
+
+        positions = self._positions(self._select_groups(filter))
+
+        if key is not None:
+            with self._lock:
+                self._cache[key] = positions
+                while len(self._cache) > self.MAX_CACHED_FILTERS:
+                    self._cache.popitem(last=False)
+        return positions
+
+    def _select_groups(self, filter: Union[Callable, Dict[str, Any]]) -> List[int]:
+        if callable(filter) or any(key.startswith("$") for key in filter):
+            return self._evaluate(filter)
+
+        groups: Optional[set] = None
+        for field, condition in filter.items():
+            if field == PATH_PREFIX_FILTER:
+                start = bisect.bisect_left(self._paths, (condition, -1))
+                matched = set()
+                for path, group in self._paths[start:]:
+                    if not path.startswith(condition):
+                        break
+                    matched.add(group)
+            elif field in self._postings and not isinstance(condition, dict):
+                values = condition if isinstance(condition, list) else [condition]
+                matched = {
+                    group
+                    for value in values
+                    for group in self._postings[field].get(self._value_key(value), ())
+                }
+            else:
+                matched = set(self._evaluate({field: condition}))
+
+            groups = matched if groups is None else groups & matched
+            if not groups:
+                return []
+        return sorted(groups)
+
+    def _evaluate(self, filter: Union[Callable, Dict[str, Any]]) -> List[int]:
+        return [group for group, metadata in enumerate(self.metadatas) if matches_filter(metadata, filter)]
+
+    def _positions(self, groups: List[int]) -> np.ndarray:
+        if not groups:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate([self._group_positions[group] for group in groups]))
+
+    @staticmethod
+    def _value_key(value: Any) -> Any:
+        # Unhashable metadata values (lists, dicts) are indexed by their JSON form
+        try:
+            hash(value)
+            return value
+        except TypeError:
+            return json.dumps(value, sort_keys=True, default=str)
+
+    def resident_bytes(self) -> int:
+        """Heap held by postings and cached filter results"""
+        cached = sum(positions.nbytes for positions in self._cache.values())
+        return self.size * 8 + cached
@@ -0,0 +1,284 @@
+import json
+import logging
+import mmap
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Union, Tuple
+
+import faiss
+import numpy as np
+from langchain_community.docstore.base import Docstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from .dense_store import DenseVectorStore, PrefilteredFAISS
+from .metadata_index import MetadataIndex
+from .index_types import build_index
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.faiss"
+# Written by FAISS.save_local; only read to migrate older stores
+PICKLE_FILE = "index.pkl"
+CHUNKS_FILE = "chunks.bin"
+OFFSETS_FILE = "chunk_offsets.npy"
+CHUNK_METADATA_FILE = "chunk_metadata.npy"
+DOCSTORE_FILE = "docstore.json"
+# Exact float32 vectors in index order; compressed indexes are rebuilt from these
+VECTORS_FILE = "vectors.npy"
+# Name of the generation directory holding the files of the latest save
+CURRENT_FILE = "CURRENT"
+GENERATION_PREFIX = "gen-"
+STORE_FILES = (INDEX_FILE, PICKLE_FILE, CHUNKS_FILE, OFFSETS_FILE, CHUNK_METADATA_FILE, DOCSTORE_FILE, VECTORS_FILE)
+
+# A load that races a save's cleanup of the previous generation starts over
+LOAD_ATTEMPTS = 3
+
+# IO_FLAG_MMAP maps IVF lists; IO_FLAG_MMAP_IFC maps the codes of flat and SQ indexes
+MMAP_FLAGS = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_MMAP_IFC
+
+
+def replace_atomically(path: Path, write):
+    """Write to a temporary file and rename it over path.
+
+    Processes that have the old file mapped keep reading the old inode
+    instead of faulting on a truncated one.
+    """
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def store_generation(directory: Path) -> Optional[str]:
+    """Generation directory of a store's latest save, None for stores saved before generations"""
+    try:
+        return (Path(directory) / CURRENT_FILE).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+
+
+def store_files_dir(directory: Path) -> Path:
+    """Directory holding the files of a store's latest save"""
+    directory = Path(directory)
+    generation = store_generation(directory)
+    return directory / generation if generation else directory
+
+
+def store_exists(directory: Path) -> bool:
+    return (store_files_dir(directory) / INDEX_FILE).exists()
+
+
+class MmapDocstore(Docstore):
+    """
+    Read-only, pickle-free docstore over chunk text in a memory-mapped file.
+
+    Text lives in one UTF-8 file addressed by an offsets array, and is only
+    decoded when a search returns that chunk, so load time and memory do not
+    grow with the amount of text. Metadata is stored once per distinct value
+    and referenced by index from each chunk.
+    """
+
+    def __init__(self, directory: Path):
+        directory = Path(directory)
+        with open(directory / DOCSTORE_FILE, 'r', encoding='utf-8') as f:
+            docstore = json.load(f)
+
+        self.ids: List[str] = docstore["ids"]
+        self._metadatas: List[Dict[str, Any]] = docstore["metadatas"]
+        self._positions = {doc_id: position for position, doc_id in enumerate(self.ids)}
+        self._offsets = np.load(directory / OFFSETS_FILE, mmap_mode="r")
+        self._chunk_metadata = np.load(directory / CHUNK_METADATA_FILE, mmap_mode="r")
+
+        self._text = b""
+        if (directory / CHUNKS_FILE).stat().st_size:
+            with open(directory / CHUNKS_FILE, 'rb') as f:
+                self._text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, search: str) -> Union[str, Document]:
+        position = self._positions.get(search)
+        if position is None:
+            return f"ID {search} not found."
+        return self.document_at(position)
+
+    def document_at(self, position: int) -> Document:
+        """Chunk at a position in index order"""
+        start, end = int(self._offsets[position]), int(self._offsets[position + 1])
+        return Document(
+            id=self.ids[position],
+            page_content=self._text[start:end].decode("utf-8"),
+            metadata=dict(self._metadatas[int(self._chunk_metadata[position])])
+        )
+
+    def metadata_groups(self) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        """Distinct metadata dicts, and the index into them of each chunk"""
+        return self._metadatas, np.asarray(self._chunk_metadata)
+
+    def resident_bytes(self) -> int:
+        """Heap held outside the mapped files: ids, positions and metadata"""
+        return sum(len(doc_id) + 100 for doc_id in self.ids) + len(json.dumps(self._metadatas))
+
+
+def save_store(directory: Path, vector_store: FAISS, index_type: str = "flat") -> Dict[str, Any]:
+    """
+    Persist a vector store without pickle: the FAISS index plus the
+    offset-indexed chunk files.
+
+    The store's index must hold exact vectors (a flat index). They are
+    saved to vectors.npy, and index.faiss is built from them as index_type
+    ("auto" picks by vector count). Returns the index description.
+
+    Every save writes a fresh generation directory and then switches the
+    CURRENT file to it with one atomic rename, so a reader only ever opens
+    the files of a single save. Earlier generations are removed afterwards;
+    readers that already mapped them keep reading the unlinked files.
+    """
+    directory = Path(directory)
+    generation = f"{GENERATION_PREFIX}{uuid.uuid4().hex}"
+    files_dir = directory / generation
+    files_dir.mkdir(parents=True)
+
+    vectors = vector_store.index.reconstruct_n(0, vector_store.index.ntotal)
+    index, index_info = build_index(vectors, index_type, vector_store.index.metric_type)
+
+    ids = [vector_store.index_to_docstore_id[position] for position in range(vector_store.index.ntotal)]
+    offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+    chunk_metadata = np.zeros(len(ids), dtype=np.int32)
+    metadatas: List[Dict[str, Any]] = []
+    metadata_positions: Dict[str, int] = {}
+
+    with open(files_dir / CHUNKS_FILE, 'wb') as f:
+        for position, doc_id in enumerate(ids):
+            doc = vector_store.docstore.search(doc_id)
+            encoded = doc.page_content.encode("utf-8")
+            f.write(encoded)
+            offsets[position + 1] = offsets[position] + len(encoded)
+
+            key = json.dumps(doc.metadata, sort_keys=True, default=str)
+            if key not in metadata_positions:
+                metadata_positions[key] = len(metadatas)
+                metadatas.append(doc.metadata)
+            chunk_metadata[position] = metadata_positions[key]
+
+    with open(files_dir / DOCSTORE_FILE, 'w', encoding='utf-8') as f:
+        json.dump({"ids": ids, "metadatas": metadatas}, f, ensure_ascii=False, default=str)
+    np.save(files_dir / OFFSETS_FILE, offsets)
+    np.save(files_dir / CHUNK_METADATA_FILE, chunk_metadata)
+    np.save(files_dir / VECTORS_FILE, vectors)
+    faiss.write_index(index, str(files_dir / INDEX_FILE))
+
+    replace_atomically(directory / CURRENT_FILE, lambda path: path.write_text(generation, encoding="utf-8"))
+    _remove_old_generations(directory, generation)
+    return index_info
+
+
+def _remove_old_generations(directory: Path, current: str):
+    """Delete the files of superseded saves, including those written before generations"""
+    for path in directory.iterdir():
+        if path.is_dir() and path.name.startswith(GENERATION_PREFIX) and path.name != current:
+            shutil.rmtree(path, ignore_errors=True)
+    for name in STORE_FILES:
+        (directory / name).unlink(missing_ok=True)
+
+
+def is_legacy_store(directory: Path) -> bool:
+    """Whether a store directory only has the pickled docstore written by FAISS.save_local"""
+    directory = Path(directory)
+    return (
+        (directory / PICKLE_FILE).exists()
+        and not (directory / DOCSTORE_FILE).exists()
+        and store_generation(directory) is None
+    )
+
+
+def load_store(
+    directory: Path,
+    embeddings: Embeddings,
+    memory_map: bool = True,
+    dense_max_vectors: int = 0
+) -> FAISS:
+    """
+    Load a vector store saved by save_store, with chunk text read lazily.
+
+    With memory_map the index is mapped too. Pages are shared through the
+    OS page cache, so every worker process serving the same artifact reads
+    one physical copy, and a cold load only parses the small id and
+    metadata tables. The mapped index is read-only; writers work on a copy.
+
+    Metadata filters are resolved to the matching vectors before searching
+    (see PrefilteredFAISS). Stores of at most dense_max_vectors vectors are
+    searched with NumPy over vectors.npy instead of through FAISS.
+    """
+    for attempt in range(LOAD_ATTEMPTS):
+        files_dir = store_files_dir(directory)
+        try:
+            return _load_store_files(files_dir, embeddings, memory_map, dense_max_vectors)
+        except FileNotFoundError:
+            # A save replaced this generation while it was being opened; load the new one
+            if attempt == LOAD_ATTEMPTS - 1:
+                raise
+            logger.info(f"Store generation {files_dir} was replaced during load, retrying")
+
+
+def _load_store_files(files_dir: Path, embeddings: Embeddings, memory_map: bool, dense_max_vectors: int) -> FAISS:
+    index = _read_index(files_dir / INDEX_FILE, memory_map)
+    docstore = MmapDocstore(files_dir)
+    if len(docstore) != index.ntotal:
+        raise ValueError(
+            f"Docstore has {len(docstore)} chunks but index has {index.ntotal} vectors in {files_dir}"
+        )
+
+    vectors = _load_vectors_file(files_dir)
+    if vectors is not None and len(vectors) != index.ntotal:
+        vectors = None
+    dense = vectors is not None and index.ntotal <= dense_max_vectors
+    if dense and not memory_map:
+        vectors = np.array(vectors)
+
+    store_class = DenseVectorStore if dense else PrefilteredFAISS
+    vector_store = store_class(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=dict(enumerate(docstore.ids)),
+        metadata_index=MetadataIndex(*docstore.metadata_groups()),
+        vectors=vectors
+    )
+    vector_store.memory_mapped = memory_map
+    return vector_store
+
+
+def _read_index(path: Path, memory_map: bool) -> faiss.Index:
+    if not memory_map:
+        return faiss.read_index(str(path))
+    try:
+        return faiss.read_index(str(path), MMAP_FLAGS)
+    except RuntimeError:
+        # IVF lists can only be mapped through the plain file reader
+        return faiss.read_index(str(path), faiss.IO_FLAG_MMAP)
+
+
+def load_vectors(directory: Path) -> Optional[np.ndarray]:
+    """Memory-mapped exact vectors of a store, or None for stores saved without them"""
+    return _load_vectors_file(store_files_dir(directory))
+
+
+def _load_vectors_file(files_dir: Path) -> Optional[np.ndarray]:
+    vectors_path = files_dir / VECTORS_FILE
+    if not vectors_path.exists():
+        return None
+    return np.load(vectors_path, mmap_mode="r")
+
+
+def copy_index(index: faiss.Index) -> faiss.Index:
+    """Heap-owned copy of an index; clone_index would still point into a mapped file"""
+    return faiss.deserialize_index(faiss.serialize_index(index))
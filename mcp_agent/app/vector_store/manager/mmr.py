@@ -0,0 +1,42 @@
+from typing import List
+
+import numpy as np
+
+
+def mmr_select(query: np.ndarray, candidates: np.ndarray, k: int = 4, lambda_mult: float = 0.5) -> List[int]:
+    """
+    Indices of k candidates chosen by maximal marginal relevance.
+
+    Same selection as langchain's maximal_marginal_relevance (cosine
+    similarity, first pick the most relevant), vectorized: each step is
+    one matrix-vector product against the latest pick, folded into a
+    running max of similarity to all picks so far, instead of recomputing
+    similarities against every selected vector and looping in Python.
+    """
+    candidates = np.asarray(candidates, dtype=np.float32)
+    n = len(candidates)
+    k = min(k, n)
+    if k <= 0:
+        return []
+
+    norms = np.linalg.norm(candidates, axis=1, keepdims=True)
+    normalized = candidates / np.where(norms == 0, 1, norms)
+    query = np.asarray(query, dtype=np.float32).reshape(-1)
+    query_norm = np.linalg.norm(query)
+    relevance = normalized @ (query / query_norm if query_norm else query)
+
+    first = int(np.argmax(relevance))
+    selected = [first]
+    redundancy = normalized @ normalized[first]
+    available = np.ones(n, dtype=bool)
+    available[first] = False
+
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, normalized @ normalized[best], out=redundancy)
+
+    return selected
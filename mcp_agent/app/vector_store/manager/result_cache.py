@@ -0,0 +1,125 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+# Artifact id under which searches across all artifacts are cached
+ALL_ARTIFACTS = "*"
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace so trivially different phrasings share an entry; case is kept for identifiers"""
+    return " ".join(query.split())
+
+
+def _copy_documents(documents: List[Document]) -> List[Document]:
+    """Documents with their own metadata dicts, so callers that annotate results never change cached ones"""
+    return [
+        Document(page_content=doc.page_content, metadata=dict(doc.metadata), id=doc.id)
+        for doc in documents
+    ]
+
+
+class SearchResultCache:
+    """
+    LRU cache of search results with a time-to-live.
+
+    Keys include the artifact's revision, so results of an older version
+    of an artifact are never served; invalidate() also drops them eagerly
+    when the artifact changes. The TTL bounds staleness for changes made
+    by other processes, which do not bump this process's revisions.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        # key -> (artifact_id, expires_at, results)
+        self._entries: "OrderedDict[str, Tuple[str, float, List[Document]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(
+        artifact_id: str,
+        revision: int,
+        query: str,
+        search_type: str,
+        search_kwargs: Optional[Dict[str, Any]],
+        filter: Optional[Dict[str, Any]]
+    ) -> str:
+        """Cache key for one search of one revision of an artifact"""
+        return json.dumps(
+            [artifact_id, revision, normalize_query(query), search_type, search_kwargs or {}, filter or {}],
+            sort_keys=True,
+            default=str
+        )
+
+    def get(self, key: str) -> Optional[List[Document]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if entry[1] < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return _copy_documents(entry[2])
+
+    def put(self, key: str, artifact_id: str, results: List[Document]):
+        results = _copy_documents(results)
+        with self._lock:
+            self._entries[key] = (artifact_id, time.monotonic() + self.ttl_seconds, results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, artifact_id: str):
+        """Drop an artifact's entries, and every cross-artifact entry, since it may contribute to those"""
+        with self._lock:
+            stale = [
+                key for key, (owner, _, _) in self._entries.items()
+                if owner in (artifact_id, ALL_ARTIFACTS)
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit-rate and eviction counters of the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
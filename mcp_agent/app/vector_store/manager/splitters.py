@@ -0,0 +1,263 @@
+import logging
+import re
+from typing import Callable, Dict, List, Tuple, Union
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+# Extracts top-level syntactic units (functions, components, rules, elements) from a file
+UnitExtractor = Callable[[str], List[str]]
+
+_SPLITTERS: Dict[str, UnitExtractor] = {}
+
+
+def register_splitter(*extensions: str):
+    """Register a unit extractor for one or more file extensions"""
+    def decorator(extractor: UnitExtractor) -> UnitExtractor:
+        for extension in extensions:
+            _SPLITTERS[extension.lower()] = extractor
+        return extractor
+    return decorator
+
+
+def get_unit_extractor(file_extension: str):
+    """Unit extractor registered for an extension, or None"""
+    return _SPLITTERS.get((file_extension or "").lower())
+
+
+# Scanner state carried across lines: inside a block comment, and the stack of
+# open template literals ("`") and ${} expressions (their open brace count)
+_ScanState = Tuple[bool, Tuple[Union[str, int], ...]]
+_TOP_LEVEL: _ScanState = (False, ())
+
+
+def _brace_delta(line: str, state: _ScanState = _TOP_LEVEL) -> Tuple[int, _ScanState]:
+    """Net change in {[( nesting on a line, ignoring strings, comments and template literal text"""
+    in_comment, stack = state
+    stack = list(stack)
+    delta = 0
+    i = 0
+    while i < len(line):
+        if in_comment:
+            end = line.find("*/", i)
+            if end == -1:
+                break
+            in_comment = False
+            i = end + 2
+            continue
+
+        c = line[i]
+        top = stack[-1] if stack else None
+        if top == "`":
+            # Template literal text: only its end and ${ matter
+            if c == "\\":
+                i += 2
+            elif c == "`":
+                stack.pop()
+                i += 1
+            elif line.startswith("${", i):
+                stack.append(0)
+                i += 2
+            else:
+                i += 1
+            continue
+
+        if c in "'\"":
+            end = _closing_quote(line, i)
+            # An unclosed quote is text, e.g. an apostrophe in JSX
+            i = end + 1 if end != -1 else i + 1
+            continue
+        if c == "`":
+            stack.append("`")
+        elif line.startswith("//", i):
+            break
+        elif line.startswith("/*", i):
+            in_comment = True
+            i += 2
+            continue
+        elif isinstance(top, int):
+            # Inside a ${} expression, braces only decide where it ends
+            if c == "{":
+                stack[-1] += 1
+            elif c == "}":
+                if top == 0:
+                    stack.pop()
+                else:
+                    stack[-1] -= 1
+        elif c in "{[(":
+            delta += 1
+        elif c in "}])":
+            delta -= 1
+        i += 1
+    return delta, (in_comment, tuple(stack))
+
+
+def _closing_quote(line: str, start: int) -> int:
+    """Index of the quote closing the string opened at start, or -1"""
+    i = start + 1
+    while i < len(line):
+        if line[i] == "\\":
+            i += 2
+        elif line[i] == line[start]:
+            return i
+        else:
+            i += 1
+    return -1
+
+
+def _units_at_depth_zero(text: str, is_boundary: Callable[[str], bool]) -> List[str]:
+    """Cut text into units wherever a boundary line starts at nesting depth 0"""
+    units: List[str] = []
+    current: List[str] = []
+    depth = 0
+    state = _TOP_LEVEL
+
+    for line in text.splitlines(keepends=True):
+        if depth == 0 and state == _TOP_LEVEL and current and is_boundary(line):
+            units.append("".join(current))
+            current = []
+        current.append(line)
+        delta, state = _brace_delta(line, state)
+        depth = max(0, depth + delta)
+
+    if current:
+        units.append("".join(current))
+    return _attach_leading_comments(units)
+
+
+def _attach_leading_comments(units: List[str]) -> List[str]:
+    """Merge comment-only or blank units into the unit that follows them"""
+    merged: List[str] = []
+    pending = ""
+    for unit in units:
+        stripped = unit.strip()
+        if not stripped or all(
+            line.strip().startswith(("//", "/*", "*", "<!--")) or not line.strip()
+            for line in unit.splitlines()
+        ):
+            pending += unit
+            continue
+        merged.append(pending + unit)
+        pending = ""
+    if pending:
+        if merged:
+            merged[-1] += pending
+        else:
+            merged.append(pending)
+    return merged
+
+
+# Lines starting with these continue the previous statement
+_JS_CONTINUATION = ("}", ")", "]", ".", "?", ":", "&&", "||", "+", ",", "=")
+
+
+@register_splitter("js", "jsx", "ts", "tsx", "mjs", "cjs")
+def _split_script(text: str) -> List[str]:
+    """Top-level statements: imports, functions, components, classes, exports"""
+    def is_boundary(line: str) -> bool:
+        stripped = line.lstrip()
+        return bool(stripped) and line[0] not in " \t" and not stripped.startswith(_JS_CONTINUATION)
+    return _units_at_depth_zero(text, is_boundary)
+
+
+@register_splitter("css", "scss", "less")
+def _split_stylesheet(text: str) -> List[str]:
+    """Top-level rules and at-rule blocks"""
+    return _units_at_depth_zero(text, lambda line: bool(line.strip()) and not line.lstrip().startswith("}"))
+
+
+_OPEN_TAG_RE = re.compile(r"<([a-zA-Z][\w-]*)[^>]*?(/?)>")
+_CLOSE_TAG_RE = re.compile(r"</[a-zA-Z][\w-]*\s*>")
+_VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr", "!doctype"
+}
+# Elements whose children are the units worth splitting on
+_HTML_CONTAINER_DEPTH = 2
+
+
+@register_splitter("html", "htm")
+def _split_html(text: str) -> List[str]:
+    """Elements that are direct children of <head>/<body>"""
+    units: List[str] = []
+    current: List[str] = []
+    depth = 0
+
+    for line in text.splitlines(keepends=True):
+        stripped = line.lstrip()
+        if depth <= _HTML_CONTAINER_DEPTH and current and stripped.startswith("<") and not stripped.startswith("</"):
+            units.append("".join(current))
+            current = []
+        current.append(line)
+
+        opened = sum(
+            1 for match in _OPEN_TAG_RE.finditer(line)
+            if not match.group(2) and match.group(1).lower() not in _VOID_TAGS
+        )
+        depth = max(0, depth + opened - len(_CLOSE_TAG_RE.findall(line)))
+
+    if current:
+        units.append("".join(current))
+    return _attach_leading_comments(units)
+
+
+class CodeAwareSplitter:
+    """
+    Splits files on syntactic boundaries chosen by file extension, packing
+    consecutive units into chunks of up to chunk_size characters without
+    overlap. Oversized units and unregistered file types fall back to
+    character splitting.
+    """
+
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200, unit_overlap: int = 100):
+        self.chunk_size = chunk_size
+        # Plain text has no unit boundaries, so it keeps the usual overlap
+        self.fallback_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            separators=["\n\n", "\n", " ", ""]
+        )
+        # Only oversized units are character-split; they need less overlap
+        self.unit_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=unit_overlap,
+            separators=["\n\n", "\n", " ", ""]
+        )
+
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        chunks: List[Document] = []
+        for doc in documents:
+            for text in self.split_text(doc.page_content, doc.metadata.get("file_extension", "")):
+                chunks.append(Document(page_content=text, metadata=dict(doc.metadata)))
+        return chunks
+
+    def split_text(self, text: str, file_extension: str = "") -> List[str]:
+        extractor = get_unit_extractor(file_extension)
+        if extractor is None:
+            return self.fallback_splitter.split_text(text)
+
+        try:
+            units = extractor(text)
+        except Exception as e:
+            logger.warning(f"Failed to split .{file_extension} file on syntax boundaries: {e}")
+            return self.fallback_splitter.split_text(text)
+
+        chunks: List[str] = []
+        current = ""
+        for unit in units:
+            if len(unit) > self.chunk_size:
+                if current.strip():
+                    chunks.append(current.strip())
+                current = ""
+                chunks.extend(self.unit_splitter.split_text(unit))
+            elif len(current) + len(unit) > self.chunk_size:
+                if current.strip():
+                    chunks.append(current.strip())
+                current = unit
+            else:
+                current += unit
+        if current.strip():
+            chunks.append(current.strip())
+        return chunks
@@ -0,0 +1,164 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Set, Tuple
+
+import faiss
+from langchain_community.vectorstores import FAISS
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_index_bytes(index: faiss.Index, memory_mapped: bool = False) -> int:
+    """Heap held by a FAISS index: its codes unless they are mapped, plus the
+    structures that are always on the heap (HNSW links, IVF centroids and ids)"""
+    index = faiss.downcast_index(index)
+
+    if isinstance(index, faiss.IndexHNSW):
+        hnsw = index.hnsw
+        links = hnsw.neighbors.size() * 4 + hnsw.levels.size() * 4 + hnsw.offsets.size() * 8
+        return links + estimate_index_bytes(index.storage, memory_mapped)
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        # Coarse centroids and the id -> list position map are never mapped
+        total = estimate_index_bytes(ivf.quantizer) + ivf.direct_map.array.size() * 8
+        if not memory_mapped:
+            # Inverted lists hold a code and a 64-bit id per vector
+            total += ivf.ntotal * (ivf.code_size + 8)
+        return total
+
+    if memory_mapped:
+        return 0
+    return index.ntotal * getattr(index, "code_size", index.d * 4)
+
+
+def estimate_store_bytes(vector_store: FAISS) -> int:
+    """Approximate resident size of a vector store: index structures plus docstore text
+
+    Memory-mapped codes are not counted; mapped pages live in the page
+    cache and are shared across worker processes.
+    """
+    index_bytes = estimate_index_bytes(vector_store.index, getattr(vector_store, "memory_mapped", False))
+
+    # NumPy-searched stores also hold row norms and filter masks
+    if hasattr(vector_store, "resident_bytes"):
+        index_bytes += vector_store.resident_bytes()
+
+    # Lazily loaded docstores only hold their id and metadata tables
+    docstore = vector_store.docstore
+    if hasattr(docstore, "resident_bytes"):
+        return index_bytes + docstore.resident_bytes()
+
+    docstore_bytes = 0
+    for doc in getattr(docstore, "_dict", {}).values():
+        docstore_bytes += len(doc.page_content.encode("utf-8")) + len(str(doc.metadata))
+
+    return index_bytes + docstore_bytes
+
+
+class VectorStoreCache:
+    """LRU cache of loaded vector stores bounded by a byte budget"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[str, Tuple[FAISS, int]]" = OrderedDict()
+        self._pinned: Set[str] = set()
+        self._lock = threading.RLock()
+
+        self.resident_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.loads = 0
+        self.total_load_seconds = 0.0
+        self.max_load_seconds = 0.0
+
+    def __contains__(self, artifact_id: str) -> bool:
+        with self._lock:
+            return artifact_id in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, artifact_id: str) -> Optional[FAISS]:
+        """Return a cached store and mark it as most recently used"""
+        with self._lock:
+            entry = self._entries.get(artifact_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(artifact_id)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, artifact_id: str, vector_store: FAISS, load_seconds: Optional[float] = None):
+        """Insert or re-measure a store, evicting least recently used ones over budget"""
+        size = estimate_store_bytes(vector_store)
+
+        with self._lock:
+            self.pop(artifact_id)
+            self._entries[artifact_id] = (vector_store, size)
+            self.resident_bytes += size
+
+            if load_seconds is not None:
+                self.loads += 1
+                self.total_load_seconds += load_seconds
+                self.max_load_seconds = max(self.max_load_seconds, load_seconds)
+
+            self._evict(keep=artifact_id)
+
+    def pop(self, artifact_id: str) -> Optional[FAISS]:
+        """Remove a store from the cache without counting it as an eviction"""
+        with self._lock:
+            entry = self._entries.pop(artifact_id, None)
+            if entry is None:
+                return None
+            self.resident_bytes -= entry[1]
+            return entry[0]
+
+    def pin(self, artifact_id: str):
+        """Keep an artifact resident regardless of recency"""
+        with self._lock:
+            self._pinned.add(artifact_id)
+
+    def unpin(self, artifact_id: str):
+        """Make a pinned artifact evictable again"""
+        with self._lock:
+            self._pinned.discard(artifact_id)
+            self._evict()
+
+    def _evict(self, keep: Optional[str] = None):
+        """Evict least recently used, unpinned stores until within budget"""
+        for artifact_id in list(self._entries):
+            if self.resident_bytes <= self.max_bytes:
+                break
+            if artifact_id == keep or artifact_id in self._pinned:
+                continue
+            self.pop(artifact_id)
+            self.evictions += 1
+            logger.info(f"Evicted vector store for {artifact_id} from cache")
+
+        if self.resident_bytes > self.max_bytes:
+            logger.warning(
+                f"Vector store cache over budget after eviction: "
+                f"{self.resident_bytes} > {self.max_bytes} bytes"
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        """Residency, hit/miss, eviction and load latency statistics"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "pinned": sorted(self._pinned),
+                "resident_bytes": self.resident_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "loads": self.loads,
+                "avg_load_seconds": self.total_load_seconds / self.loads if self.loads else 0.0,
+                "max_load_seconds": self.max_load_seconds
+            }
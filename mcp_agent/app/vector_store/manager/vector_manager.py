@@ -1,67 +1,179 @@
 import os
+import re
+import asyncio
 import json
+import heapq
+import time
+import uuid
 import logging
+import threading
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Literal
+from typing import List, Dict, Any, Optional, Literal, Tuple
 from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import faiss
+import numpy as np
 
-from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_core.documents import Document
 from langchain_core.retrievers import BaseRetriever
 from ...models.artifact_models import FileItem, ArtifactMetadata, ProjectInfo, FilesRequest
+from .embedding_cache import CachedEmbeddings, content_digest
+from .embedding_pipeline import EmbeddingPipeline
+from .embeddings import get_embeddings_config, create_embeddings, embedding_id, stored_embedding_id
+from .store_cache import VectorStoreCache
+from .consolidated_index import ConsolidatedIndex
+from .lexical_index import LexicalIndex
+from .mmr import mmr_select
+from .result_cache import SearchResultCache, ALL_ARTIFACTS
+from .splitters import CodeAwareSplitter
+from .mmap_store import save_store, load_store, load_vectors, is_legacy_store, copy_index, store_exists
 
 logger = logging.getLogger(__name__)
 
-SearchType = Literal["similarity", "mmr", "similarity_score_threshold"]
+SearchType = Literal["similarity", "mmr", "similarity_score_threshold", "hybrid"]
+IndexLayout = Literal["per_artifact", "consolidated"]
+
+# Queries that are a single identifier, e.g. "useState", "obc-top-bar" or "TodoList"
+IDENTIFIER_QUERY_RE = re.compile(r"^\s*[A-Za-z_$][\w$.-]*\s*$")
 
 class VectorStoreManager:
     """Simplified vector store manager using retriever pattern"""
     
-    def __init__(self, vector_store_dir: str):
+    # Upper bound on artifacts searched concurrently by search_all_artifacts
+    MAX_SEARCH_WORKERS = 8
+    
+    # Number of per-artifact side indexes (path lookup, lexical) kept in memory
+    MAX_SIDE_INDEXES = 64
+    
+    # Reciprocal rank fusion constant for hybrid search
+    RRF_K = 60
+    
+    def __init__(
+        self,
+        vector_store_dir: str,
+        cache_max_bytes: int = 512 * 1024 * 1024,
+        layout: IndexLayout = "per_artifact",
+        embedding_backend: Optional[str] = None,
+        mmap_load: bool = True,
+        index_type: str = "auto",
+        dense_max_vectors: int = 2000,
+        result_cache_entries: int = 1024,
+        result_cache_ttl: float = 600.0
+    ):
         self.vector_store_dir = Path(vector_store_dir)
         self.vector_store_dir.mkdir(exist_ok=True)
         
-        # Initialize embeddings
-        self.embeddings = OpenAIEmbeddings()
+        # Initialize embeddings for the configured backend; model-backed ones use the on-disk cache
+        self.embedding_config = get_embeddings_config(embedding_backend)
+        self.embeddings = create_embeddings(self.embedding_config)
         
-        # Text splitter for chunking
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            separators=["\n\n", "\n", " ", ""]
+        # Batched, concurrent embedding for the async write path (remote and model backends only)
+        self.embedding_pipeline = (
+            EmbeddingPipeline(self.embeddings) if isinstance(self.embeddings, CachedEmbeddings) else None
         )
         
-        # Cache for loaded vector stores
-        self._cache: Dict[str, FAISS] = {}
+        # Text splitter for chunking, cutting code on syntactic boundaries
+        self.text_splitter = CodeAwareSplitter(chunk_size=1000, chunk_overlap=200)
+        
+        # Memory-map store indexes so their pages are shared across workers
+        self.mmap_load = mmap_load
+        
+        # Index type stores are saved as; "auto" compresses large stores (see index_types)
+        self.index_type = index_type
+        
+        # Stores up to this many vectors are searched with NumPy instead of FAISS
+        self.dense_max_vectors = dense_max_vectors
+        
+        # Memory-bounded LRU cache for loaded vector stores
+        self._cache = VectorStoreCache(max_bytes=cache_max_bytes)
+        
+        # Recent search results, keyed by artifact revision; bumped whenever a store is replaced
+        self._result_cache = SearchResultCache(max_entries=result_cache_entries, ttl_seconds=result_cache_ttl)
+        self._revisions: Dict[str, int] = {}
+        self._revisions_lock = threading.Lock()
+        
+        # Serialize writes per artifact; readers keep using the cached store until it is swapped
+        self._write_locks: Dict[str, threading.Lock] = {}
+        self._write_locks_guard = threading.Lock()
+        
+        # Recently used side indexes keyed by (kind, artifact_id), see get_file() and hybrid search
+        self._side_indexes: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._side_indexes_lock = threading.Lock()
+        
+        # In consolidated layout, searches go to one index holding every artifact.
+        # Per-artifact stores are still written and remain the source of truth
+        self.layout = layout
+        self.consolidated: Optional[ConsolidatedIndex] = None
+        if layout == "consolidated":
+            self.consolidated = ConsolidatedIndex(
+                str(self.vector_store_dir / "_consolidated"),
+                str(self.vector_store_dir),
+                embedding_model=self._embedding_id()
+            )
+            self.rebuild_consolidated_index()
     
-    def create_artifact_vectors(self, artifact_id: str, files: List[FileItem]) -> Optional[str]:
-        """Create new vector store for an artifact"""
+    def create_artifact_vectors(
+        self,
+        artifact_id: str,
+        files: List[FileItem],
+        precomputed: Optional[Dict[str, List[float]]] = None
+    ) -> Optional[str]:
+        """Create new vector store for an artifact, reusing any precomputed chunk vectors"""
+        with self._write_lock(artifact_id):
+            return self._create_artifact_vectors(artifact_id, files, precomputed)
+    
+    async def acreate_artifact_vectors(self, artifact_id: str, files: List[FileItem]) -> Optional[str]:
+        """Create new vector store without blocking the event loop"""
+        precomputed = await self._aembed_files(artifact_id, files)
+        return await asyncio.to_thread(self.create_artifact_vectors, artifact_id, files, precomputed)
+    
+    def _create_artifact_vectors(
+        self,
+        artifact_id: str,
+        files: List[FileItem],
+        precomputed: Optional[Dict[str, List[float]]] = None
+    ) -> Optional[str]:
         try:
-            # Create documents from files
-            documents = self._files_to_documents(artifact_id, files)
+            # Create documents from files and split them into chunks
+            chunked_docs, chunk_ids, file_chunk_ids = self._split_files(artifact_id, files)
             
-            if not documents:
+            if not chunked_docs:
                 logger.warning(f"No documents to vectorize for artifact: {artifact_id}")
                 return None
             
-            # Split documents into chunks
-            chunked_docs = self.text_splitter.split_documents(documents)
-            logger.info(f"Split {len(documents)} files into {len(chunked_docs)} chunks for {artifact_id}")
+            logger.info(f"Split {len(file_chunk_ids)} files into {len(chunked_docs)} chunks for {artifact_id}")
             
-            # Create vector store
-            vector_store = FAISS.from_documents(chunked_docs, self.embeddings)
+            # Create vector store from the collected vectors
+            vectors = self._embed_chunks(chunked_docs, precomputed)
+            vector_store = FAISS.from_embeddings(
+                zip((doc.page_content for doc in chunked_docs), vectors),
+                self.embeddings,
+                metadatas=[doc.metadata for doc in chunked_docs],
+                ids=chunk_ids
+            )
             
-            # Save vector store
+            # Save vector store and cache it
             vector_path = self.vector_store_dir / artifact_id
-            vector_store.save_local(str(vector_path))
+            index_info = self._persist_store(artifact_id, vector_store)
+            
+            # Save metadata and the exact path lookup index
+            self._save_vector_metadata(
+                artifact_id, files, len(chunked_docs), file_chunk_ids, vector_store.index.d,
+                index_info=index_info
+            )
+            self._save_path_index(artifact_id, files, file_chunk_ids)
             
-            # Cache it
-            self._cache[artifact_id] = vector_store
+            # Build the BM25 index used by hybrid search
+            lexical_index = LexicalIndex()
+            lexical_index.add(zip(chunk_ids, (doc.page_content for doc in chunked_docs)))
+            self._save_lexical_index(artifact_id, lexical_index)
             
-            # Save metadata
-            self._save_vector_metadata(artifact_id, files, len(chunked_docs))
+            # Only now are the store and its side indexes all in place
+            self.invalidate_search_results(artifact_id)
             
             logger.info(f"Created vector store for {artifact_id}: {len(chunked_docs)} vectors")
             return str(vector_path)
@@ -70,25 +182,102 @@ class VectorStoreManager:
             logger.error(f"Failed to create vectors for {artifact_id}: {e}")
             raise e
     
-    def update_artifact_vectors(self, artifact_id: str, files: List[FileItem]) -> Optional[str]:
-        """Update existing vector store or create new one"""
+    def update_artifact_vectors(
+        self,
+        artifact_id: str,
+        files: List[FileItem],
+        precomputed: Optional[Dict[str, List[float]]] = None
+    ) -> Optional[str]:
+        """Update existing vector store incrementally, or create new one"""
+        with self._write_lock(artifact_id):
+            return self._update_artifact_vectors(artifact_id, files, precomputed)
+    
+    async def aupdate_artifact_vectors(self, artifact_id: str, files: List[FileItem]) -> Optional[str]:
+        """Update existing vector store without blocking the event loop"""
+        changed_files = await asyncio.to_thread(self._files_to_embed, artifact_id, files)
+        precomputed = await self._aembed_files(artifact_id, changed_files)
+        return await asyncio.to_thread(self.update_artifact_vectors, artifact_id, files, precomputed)
+    
+    def _update_artifact_vectors(
+        self,
+        artifact_id: str,
+        files: List[FileItem],
+        precomputed: Optional[Dict[str, List[float]]] = None
+    ) -> Optional[str]:
         try:
             vector_path = self.vector_store_dir / artifact_id
+            metadata = self._load_vector_metadata(artifact_id) if vector_path.exists() else {}
             
-            if vector_path.exists():
-                # Load existing metadata to compare
-                metadata = self._load_vector_metadata(artifact_id)
-                
-                # Check if files have changed
-                current_file_hashes = {f.path: hash(f.content) for f in files}
-                stored_file_hashes = metadata.get('file_hashes', {})
-                
-                if current_file_hashes == stored_file_hashes:
-                    logger.info(f"No changes detected for {artifact_id}, skipping vector update")
-                    return str(vector_path)
+            # Stores written before chunk ids were tracked can only be rebuilt
+            stored_chunk_ids: Dict[str, List[str]] = metadata.get('file_chunk_ids')
+            current_store = self.get_vector_store(artifact_id) if stored_chunk_ids is not None else None
+            if current_store is None:
+                return self._create_artifact_vectors(artifact_id, files, precomputed)
             
-            # Recreate vector store (simpler than incremental updates)
-            return self.create_artifact_vectors(artifact_id, files)
+            # Work out which files were added, changed or removed
+            changed_paths, removed_paths = self._diff_files(metadata, files)
+            
+            if not changed_paths and not removed_paths:
+                logger.info(f"No changes detected for {artifact_id}, skipping vector update")
+                return str(vector_path)
+            
+            # Edit a copy so concurrent searches never see a half-updated index
+            vector_store = self._clone_store(artifact_id, current_store)
+            
+            # Drop the vectors of every changed or removed file
+            stale_ids = [
+                chunk_id
+                for path in changed_paths | removed_paths
+                for chunk_id in stored_chunk_ids.get(path, [])
+            ]
+            if stale_ids:
+                vector_store.delete(stale_ids)
+            
+            # Embed only the chunks of added and changed files
+            changed_files = [f for f in files if f.path in changed_paths]
+            chunked_docs, chunk_ids, new_chunk_ids = self._split_files(artifact_id, changed_files)
+            if chunked_docs:
+                vector_store.add_embeddings(
+                    zip((doc.page_content for doc in chunked_docs), self._embed_chunks(chunked_docs, precomputed)),
+                    metadatas=[doc.metadata for doc in chunked_docs],
+                    ids=chunk_ids
+                )
+            
+            file_chunk_ids = {
+                path: ids for path, ids in stored_chunk_ids.items()
+                if path not in changed_paths and path not in removed_paths
+            }
+            file_chunk_ids.update(new_chunk_ids)
+            vector_count = vector_store.index.ntotal
+            
+            if vector_count == 0:
+                logger.info(f"No vectors left for {artifact_id}, deleting vector store")
+                self._delete_artifact_vectors(artifact_id)
+                return None
+            
+            # Swap the updated store in for the next search
+            index_info = self._persist_store(artifact_id, vector_store)
+            self._save_vector_metadata(
+                artifact_id, files, vector_count, file_chunk_ids, vector_store.index.d, index_info=index_info
+            )
+            self._save_path_index(artifact_id, files, file_chunk_ids)
+            
+            # Keep the BM25 index in step with the docstore, editing a copy like the vector store
+            lexical_index = self._get_lexical_index(artifact_id)
+            if lexical_index is not None:
+                lexical_index = lexical_index.copy()
+                lexical_index.remove(stale_ids)
+                lexical_index.add(zip(chunk_ids, (doc.page_content for doc in chunked_docs)))
+                self._save_lexical_index(artifact_id, lexical_index)
+            
+            self.invalidate_search_results(artifact_id)
+            
+            logger.info(
+                f"Updated vector store for {artifact_id}: {len(changed_paths)} changed, "
+                f"{len(removed_paths)} removed, {len(stale_ids)} vectors deleted, "
+                f"{len(chunked_docs)} vectors added"
+            )
+            return str(vector_path)
             
         except Exception as e:
             logger.error(f"Failed to update vectors for {artifact_id}: {e}")
@@ -97,21 +286,30 @@ class VectorStoreManager:
     def get_vector_store(self, artifact_id: str) -> Optional[FAISS]:
         """Get vector store for an artifact"""
         try:
-            if artifact_id in self._cache:
-                return self._cache[artifact_id]
+            vector_store = self._cache.get(artifact_id)
+            if vector_store is not None:
+                return vector_store
             
             vector_path = self.vector_store_dir / artifact_id
             if not vector_path.exists():
                 logger.warning(f"Vector store not found for {artifact_id}")
                 return None
             
-            # Load vector store
-            vector_store = FAISS.load_local(
-                str(vector_path), 
-                self.embeddings, 
-                allow_dangerous_deserialization=True
-            )
-            self._cache[artifact_id] = vector_store
+            # Vectors from another embedding model cannot be queried with this one
+            built_with = stored_embedding_id(self._load_vector_metadata(artifact_id))
+            if built_with != self._embedding_id():
+                logger.warning(
+                    f"Vector store for {artifact_id} was built with {built_with}, "
+                    f"not {self._embedding_id()}; it will be rebuilt on the next save"
+                )
+                return None
+            
+            # Load vector store; chunk text is only read for the ids a search returns
+            start = time.perf_counter()
+            if is_legacy_store(vector_path):
+                self._migrate_legacy_store(artifact_id, vector_path)
+            vector_store = self._load_store(vector_path)
+            self._cache.put(artifact_id, vector_store, load_seconds=time.perf_counter() - start)
             
             logger.info(f"Loaded vector store for {artifact_id}")
             return vector_store
@@ -120,6 +318,50 @@ class VectorStoreManager:
             logger.error(f"Failed to load vector store for {artifact_id}: {e}")
             return None
     
+    def _load_store(self, vector_path: Path) -> FAISS:
+        """Load a saved store with this manager's mapping and backend settings"""
+        return load_store(
+            vector_path, self.embeddings, memory_map=self.mmap_load, dense_max_vectors=self.dense_max_vectors
+        )
+    
+    def _migrate_legacy_store(self, artifact_id: str, vector_path: Path):
+        """Rewrite a store saved with a pickled docstore in the pickle-free layout, once"""
+        logger.warning(f"Migrating pickled docstore for {artifact_id} to the pickle-free layout")
+        # Stores are only ever written by this server, so the one-time unpickle is of our own data
+        vector_store = FAISS.load_local(
+            str(vector_path),
+            self.embeddings,
+            allow_dangerous_deserialization=True
+        )
+        save_store(vector_path, vector_store, self.index_type)
+    
+    def get_file(self, artifact_id: str, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Exact lookup of a vectorized file by path, without any embedding call
+        
+        Contents are not kept here; read them from artifact storage, which
+        always has the latest save.
+        
+        Returns:
+            The file's path, size, extension and ordered chunk ids, or None
+            if the file (or the artifact's path index) does not exist
+        """
+        path_index = self._get_path_index(artifact_id)
+        if not path_index:
+            return None
+        
+        entry = path_index.get(file_path)
+        if entry is None:
+            # Fall back to a unique suffix match, e.g. "src/App.jsx" for "/home/project/src/App.jsx"
+            suffix = "/" + file_path.lstrip("/")
+            matches = [path for path in path_index if path.endswith(suffix)]
+            if len(matches) != 1:
+                return None
+            file_path = matches[0]
+            entry = path_index[file_path]
+        
+        return {"path": file_path, **entry}
+    
     def get_retriever(
         self,
         artifact_id: str,
@@ -164,42 +406,108 @@ class VectorStoreManager:
         Args:
             artifact_id: ID of the artifact to search
             query: Search query
-            search_type: Type of search ("similarity", "mmr", "similarity_score_threshold")
+            search_type: Type of search ("similarity", "mmr", "similarity_score_threshold", "hybrid")
             search_kwargs: Additional search parameters (k, score_threshold, etc.)
-            filter: Metadata filter (e.g., {"source": "news", "file_extension": "py"})
+            filter: Metadata filter (e.g., {"file_extension": "py"} or {"path_prefix": "src/components/"}),
+                applied before ranking so the top k all match it
         
         Returns:
             List of relevant documents
         """
+        key = SearchResultCache.make_key(
+            artifact_id, self._revision(artifact_id), query, search_type, search_kwargs, filter
+        )
+        cached = self._result_cache.get(key)
+        if cached is not None:
+            logger.info(f"Served '{query}' in {artifact_id} from the result cache")
+            return cached
+        
+        results = self._search(artifact_id, query, search_type, search_kwargs, filter)
+        # Empty results may be a store that is still being built, or a failed search
+        if results:
+            self._result_cache.put(key, artifact_id, results)
+        return results
+    
+    def _search(
+        self,
+        artifact_id: str,
+        query: str,
+        search_type: SearchType,
+        search_kwargs: Optional[Dict[str, Any]],
+        filter: Optional[Dict[str, Any]]
+    ) -> List[Document]:
         try:
-            # Get retriever
-            retriever = self.get_retriever(artifact_id, search_type, search_kwargs)
-            if not retriever:
-                return []
+            if search_type == "hybrid":
+                return self._hybrid_search(artifact_id, query, search_kwargs or {}, filter)
             
-            # Perform search with optional filter
-            if filter:
-                # For FAISS, we need to pass filter in search_kwargs
-                current_kwargs = retriever.search_kwargs.copy()
-                current_kwargs["filter"] = filter
-                
-                # Update retriever with filter
-                vector_store = self.get_vector_store(artifact_id)
-                retriever = vector_store.as_retriever(
-                    search_type=search_type,
-                    search_kwargs=current_kwargs
+            if self.consolidated:
+                query_vector = self.embeddings.embed_query(query)
+                scored = self.consolidated.search(
+                    query_vector, search_type, search_kwargs, filter, artifact_id=artifact_id
                 )
+                logger.info(f"Found {len(scored)} results for '{query}' in {artifact_id} (consolidated)")
+                return [doc for doc, _ in scored]
             
-            # Invoke retriever
-            results = retriever.invoke(query)
+            if not self.get_vector_store(artifact_id):
+                return []
+            
+            # Query the store directly; building a retriever per call costs more than small searches
+            query_vector = self.embeddings.embed_query(query)
+            scored = self._search_by_vector(artifact_id, query_vector, search_type, search_kwargs or {}, filter)
             
-            logger.info(f"Found {len(results)} results for '{query}' in {artifact_id}")
-            return results
+            logger.info(f"Found {len(scored)} results for '{query}' in {artifact_id}")
+            return [doc for doc, _ in scored]
             
         except Exception as e:
             logger.error(f"Failed to search {artifact_id}: {e}")
             return []
     
+    def _hybrid_search(
+        self,
+        artifact_id: str,
+        query: str,
+        search_kwargs: Dict[str, Any],
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Document]:
+        """BM25 + vector search fused with reciprocal rank fusion"""
+        vector_store = self.get_vector_store(artifact_id)
+        lexical_index = self._get_lexical_index(artifact_id)
+        if not vector_store:
+            return []
+        
+        k = search_kwargs.get("k", 5)
+        fetch_k = search_kwargs.get("fetch_k", 20)
+        
+        lexical_ids = []
+        if lexical_index is not None:
+            # Score only the chunks the filter allows, as the vector side does
+            positions = vector_store.metadata_index.select(filter)
+            allowed = (
+                None if positions is None
+                else {vector_store.index_to_docstore_id[int(position)] for position in positions}
+            )
+            lexical_ids = [doc_id for doc_id, _ in lexical_index.search(query, k=fetch_k, allowed=allowed)]
+        
+        # Exact identifier queries resolve locally, without an embedding call
+        if lexical_ids and IDENTIFIER_QUERY_RE.match(query):
+            logger.info(f"Resolved identifier query '{query}' lexically in {artifact_id}")
+            return [vector_store.docstore.search(doc_id) for doc_id in lexical_ids[:k]]
+        
+        query_vector = self.embeddings.embed_query(query)
+        vector_results = vector_store.similarity_search_with_score_by_vector(
+            query_vector, k=fetch_k, filter=filter, fetch_k=fetch_k * 4 if filter else fetch_k
+        )
+        vector_ids = [doc.id for doc, _ in vector_results if doc.id]
+        
+        fused: Dict[str, float] = {}
+        for ranking in (lexical_ids, vector_ids):
+            for rank, doc_id in enumerate(ranking):
+                fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (self.RRF_K + rank + 1)
+        
+        top_ids = heapq.nlargest(k, fused, key=fused.get)
+        logger.info(f"Found {len(top_ids)} hybrid results for '{query}' in {artifact_id}")
+        return [vector_store.docstore.search(doc_id) for doc_id in top_ids]
+    
     def search_all_artifacts(
         self,
         query: str,
@@ -208,41 +516,226 @@ class VectorStoreManager:
         filter: Optional[Dict[str, Any]] = None,
         max_results: int = 10
     ) -> List[Document]:
-        """Search across all artifacts using retriever pattern"""
+        """Global top-k search across all artifacts, ranked by similarity score
+        
+        "hybrid" is a per-artifact mode and is served as "similarity" here.
+        """
+        key = SearchResultCache.make_key(
+            ALL_ARTIFACTS, self._revision(ALL_ARTIFACTS), query, search_type,
+            {**(search_kwargs or {}), "max_results": max_results}, filter
+        )
+        cached = self._result_cache.get(key)
+        if cached is not None:
+            logger.info(f"Served '{query}' across all artifacts from the result cache")
+            return cached
+        
+        results = self._search_all_artifacts(query, search_type, search_kwargs, filter, max_results)
+        if results:
+            self._result_cache.put(key, ALL_ARTIFACTS, results)
+        return results
+    
+    def _search_all_artifacts(
+        self,
+        query: str,
+        search_type: SearchType,
+        search_kwargs: Optional[Dict[str, Any]],
+        filter: Optional[Dict[str, Any]],
+        max_results: int
+    ) -> List[Document]:
         try:
-            all_results = []
-            artifacts = self.list_artifacts()
+            if self.consolidated:
+                # All artifacts share one index, so this is a single ANN query
+                artifact_search_kwargs = (search_kwargs or {}).copy()
+                artifact_search_kwargs["k"] = max_results
+                query_vector = self.embeddings.embed_query(query)
+                scored = self.consolidated.search(query_vector, search_type, artifact_search_kwargs, filter)
+                logger.info(f"Found {len(scored)} results for '{query}' across all artifacts (consolidated)")
+                return [doc for doc, _ in scored]
             
-            # Calculate k per artifact to get diverse results
-            k_per_artifact = max(1, max_results // len(artifacts)) if artifacts else max_results
+            artifacts = self.list_artifacts()
+            if not artifacts:
+                return []
             
-            # Override k in search_kwargs
+            # Every shard can hold the best matches, so each one is asked for max_results
             artifact_search_kwargs = (search_kwargs or {}).copy()
-            artifact_search_kwargs["k"] = k_per_artifact
-            
-            for artifact_id in artifacts:
-                results = self.search(
-                    artifact_id=artifact_id,
-                    query=query,
-                    search_type=search_type,
-                    search_kwargs=artifact_search_kwargs,
-                    filter=filter
+            artifact_search_kwargs["k"] = max_results
+            
+            # Embed the query once and share the vector with every shard
+            query_vector = self.embeddings.embed_query(query)
+            
+            if search_type == "mmr":
+                return self._search_all_mmr(artifacts, query_vector, artifact_search_kwargs, filter, max_results)
+            
+            with ThreadPoolExecutor(max_workers=min(self.MAX_SEARCH_WORKERS, len(artifacts))) as executor:
+                shard_results = executor.map(
+                    lambda artifact_id: self._search_by_vector(
+                        artifact_id, query_vector, search_type, artifact_search_kwargs, filter
+                    ),
+                    artifacts
                 )
-                all_results.extend(results)
+                scored_results = [result for results in shard_results for result in results]
             
-            # Return first max_results
-            return all_results[:max_results]
+            top_results = heapq.nlargest(max_results, scored_results, key=lambda result: result[1])
+            
+            logger.info(f"Found {len(top_results)} results for '{query}' across {len(artifacts)} artifacts")
+            return [doc for doc, _ in top_results]
             
         except Exception as e:
             logger.error(f"Failed to search all artifacts: {e}")
             return []
     
+    def _search_all_mmr(
+        self,
+        artifacts: List[str],
+        query_vector: List[float],
+        search_kwargs: Dict[str, Any],
+        filter: Optional[Dict[str, Any]],
+        max_results: int
+    ) -> List[Document]:
+        """One MMR selection over the candidates of every artifact
+        
+        Each artifact contributes its fetch_k nearest chunks with their stored
+        vectors (nothing is re-embedded). The best fetch_k overall are
+        diversified together, so results are diverse across artifacts and not
+        only within each one, at the cost of a plain similarity search.
+        """
+        fetch_k = max(search_kwargs.get("fetch_k", 20), max_results)
+        
+        def artifact_candidates(artifact_id: str):
+            try:
+                vector_store = self.get_vector_store(artifact_id)
+                if not vector_store:
+                    return None
+                positions, scores, vectors = vector_store.search_candidates_by_vector(
+                    query_vector, fetch_k=fetch_k, filter=filter
+                )
+                relevance_fn = vector_store._select_relevance_score_fn()
+                relevance = np.array([relevance_fn(score) for score in scores], dtype=np.float32)
+                return vector_store, positions, relevance, vectors
+            except Exception as e:
+                logger.error(f"Failed to collect MMR candidates from {artifact_id}: {e}")
+                return None
+        
+        with ThreadPoolExecutor(max_workers=min(self.MAX_SEARCH_WORKERS, len(artifacts))) as executor:
+            shards = [shard for shard in executor.map(artifact_candidates, artifacts) if shard and len(shard[1])]
+        if not shards:
+            return []
+        
+        owners = [(shard_index, position) for shard_index, shard in enumerate(shards) for position in shard[1]]
+        relevance = np.concatenate([shard[2] for shard in shards])
+        vectors = np.vstack([shard[3] for shard in shards])
+        
+        # Keep the fetch_k most relevant candidates overall, as a single store would
+        pool = np.argsort(-relevance, kind="stable")[:fetch_k]
+        selected = mmr_select(
+            np.array(query_vector, dtype=np.float32),
+            vectors[pool],
+            max_results,
+            search_kwargs.get("lambda_mult", 0.5)
+        )
+        
+        results = []
+        for i in selected:
+            shard_index, position = owners[pool[i]]
+            results.append(shards[shard_index][0].document_at(position))
+        
+        logger.info(f"Selected {len(results)} MMR results from {len(vectors)} candidates across {len(shards)} artifacts")
+        return results
+    
+    def _search_by_vector(
+        self,
+        artifact_id: str,
+        query_vector: List[float],
+        search_type: SearchType,
+        search_kwargs: Dict[str, Any],
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float]]:
+        """Search one artifact with a pre-computed query vector, returning relevance scores (higher is better)"""
+        try:
+            vector_store = self.get_vector_store(artifact_id)
+            if not vector_store:
+                return []
+            
+            k = search_kwargs.get("k", 5)
+            fetch_k = search_kwargs.get("fetch_k", 20)
+            
+            if search_type == "mmr":
+                results = vector_store.max_marginal_relevance_search_with_score_by_vector(
+                    query_vector,
+                    k=k,
+                    fetch_k=fetch_k,
+                    lambda_mult=search_kwargs.get("lambda_mult", 0.5),
+                    filter=filter
+                )
+            else:
+                results = vector_store.similarity_search_with_score_by_vector(
+                    query_vector, k=k, filter=filter, fetch_k=fetch_k
+                )
+            
+            # Convert raw distances to comparable relevance scores
+            relevance_fn = vector_store._select_relevance_score_fn()
+            scored = [(doc, relevance_fn(score)) for doc, score in results]
+            
+            if search_type == "similarity_score_threshold":
+                threshold = search_kwargs.get("score_threshold", 0.0)
+                scored = [(doc, score) for doc, score in scored if score >= threshold]
+            
+            return scored
+            
+        except Exception as e:
+            logger.error(f"Failed to search {artifact_id} by vector: {e}")
+            return []
+    
+    def rebuild_consolidated_index(self):
+        """Bring the consolidated index up to date with the per-artifact stores on disk, in one write"""
+        if not self.consolidated:
+            return
+        artifacts = self.list_artifacts()
+        for artifact_id in artifacts:
+            # Pickled stores are migrated to the mmap layout the consolidated index reads from
+            if is_legacy_store(self.vector_store_dir / artifact_id):
+                self.get_vector_store(artifact_id)
+        self.consolidated.sync(artifacts)
+        logger.info(f"Rebuilt consolidated index for {len(self.consolidated.artifacts())} artifacts")
+    
+    def pin_artifact(self, artifact_id: str):
+        """Keep an artifact's vector store resident in the cache"""
+        self._cache.pin(artifact_id)
+    
+    def unpin_artifact(self, artifact_id: str):
+        """Allow a pinned artifact's vector store to be evicted again"""
+        self._cache.unpin(artifact_id)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Statistics for the loaded vector store cache"""
+        return self._cache.stats()
+    
+    def result_cache_stats(self) -> Dict[str, Any]:
+        """Hit rate and size of the search result cache"""
+        return self._result_cache.stats()
+    
+    def invalidate_search_results(self, artifact_id: str):
+        """Move an artifact to a new revision, so no earlier search result is served for it
+        
+        Cross-artifact results move to a new revision as well. A search that was
+        already running stores its result under the old revision, where it is
+        never looked up again.
+        """
+        with self._revisions_lock:
+            self._revisions[artifact_id] = self._revisions.get(artifact_id, 0) + 1
+            self._revisions[ALL_ARTIFACTS] = self._revisions.get(ALL_ARTIFACTS, 0) + 1
+        self._result_cache.invalidate(artifact_id)
+    
+    def _revision(self, artifact_id: str) -> int:
+        with self._revisions_lock:
+            return self._revisions.get(artifact_id, 0)
+    
     def list_artifacts(self) -> List[str]:
         """List all artifacts with vector stores"""
         try:
             artifacts = []
             for artifact_dir in self.vector_store_dir.iterdir():
-                if artifact_dir.is_dir() and (artifact_dir / "index.faiss").exists():
+                if artifact_dir.is_dir() and store_exists(artifact_dir):
                     artifacts.append(artifact_dir.name)
             return artifacts
         except Exception as e:
@@ -251,6 +744,10 @@ class VectorStoreManager:
     
     def delete_artifact_vectors(self, artifact_id: str) -> bool:
         """Delete vector store for an artifact"""
+        with self._write_lock(artifact_id):
+            return self._delete_artifact_vectors(artifact_id)
+    
+    def _delete_artifact_vectors(self, artifact_id: str) -> bool:
         try:
             vector_path = self.vector_store_dir / artifact_id
             if vector_path.exists():
@@ -258,8 +755,11 @@ class VectorStoreManager:
                 shutil.rmtree(vector_path)
                 
                 # Remove from cache
-                if artifact_id in self._cache:
-                    del self._cache[artifact_id]
+                self._cache.pop(artifact_id)
+                self._drop_side_indexes(artifact_id)
+                self.invalidate_search_results(artifact_id)
+                if self.consolidated:
+                    self.consolidated.remove(artifact_id)
                 
                 logger.info(f"Deleted vector store for {artifact_id}")
                 return True
@@ -303,7 +803,216 @@ class VectorStoreManager:
         
         return documents
     
-    def _save_vector_metadata(self, artifact_id: str, files: List[FileItem], vector_count: int):
+    def _split_files(
+        self, artifact_id: str, files: List[FileItem]
+    ) -> Tuple[List[Document], List[str], Dict[str, List[str]]]:
+        """Split files into chunks and assign each chunk a docstore id"""
+        chunked_docs: List[Document] = []
+        chunk_ids: List[str] = []
+        file_chunk_ids: Dict[str, List[str]] = {}
+        
+        for doc in self._files_to_documents(artifact_id, files):
+            chunks = self.text_splitter.split_documents([doc])
+            ids = [uuid.uuid4().hex for _ in chunks]
+            chunked_docs.extend(chunks)
+            chunk_ids.extend(ids)
+            file_chunk_ids[doc.metadata["file_path"]] = ids
+        
+        return chunked_docs, chunk_ids, file_chunk_ids
+    
+    def _embed_chunks(
+        self, chunked_docs: List[Document], precomputed: Optional[Dict[str, List[float]]] = None
+    ) -> List[List[float]]:
+        """Vectors for chunks in order, embedding only those not already precomputed"""
+        vectors = dict(precomputed or {})
+        missing = list(dict.fromkeys(doc.page_content for doc in chunked_docs if doc.page_content not in vectors))
+        if missing:
+            vectors.update(zip(missing, self.embeddings.embed_documents(missing)))
+        return [vectors[doc.page_content] for doc in chunked_docs]
+    
+    async def _aembed_files(self, artifact_id: str, files: List[FileItem]) -> Dict[str, List[float]]:
+        """Embed the chunks of files through the async pipeline, keyed by chunk text"""
+        chunked_docs, _, _ = await asyncio.to_thread(self._split_files, artifact_id, files)
+        texts = list(dict.fromkeys(doc.page_content for doc in chunked_docs))
+        if self.embedding_pipeline is None:
+            vectors = await asyncio.to_thread(self.embeddings.embed_documents, texts)
+        else:
+            vectors = await self.embedding_pipeline.aembed_documents(texts)
+        return dict(zip(texts, vectors))
+    
+    def _files_to_embed(self, artifact_id: str, files: List[FileItem]) -> List[FileItem]:
+        """Files whose chunks an update will need to embed"""
+        metadata = self._load_vector_metadata(artifact_id)
+        if metadata.get('file_chunk_ids') is None or stored_embedding_id(metadata) != self._embedding_id():
+            return files
+        changed_paths, _ = self._diff_files(metadata, files)
+        return [f for f in files if f.path in changed_paths]
+    
+    def _diff_files(self, metadata: Dict[str, Any], files: List[FileItem]) -> Tuple[set, set]:
+        """Paths added or changed, and paths removed, since the stored metadata was written"""
+        current_file_hashes = {f.path: self._file_hash(f) for f in files}
+        stored_file_hashes = metadata.get('file_hashes', {})
+        
+        changed_paths = {
+            path for path, file_hash in current_file_hashes.items()
+            if stored_file_hashes.get(path) != file_hash
+        }
+        removed_paths = set(stored_file_hashes) - set(current_file_hashes)
+        return changed_paths, removed_paths
+    
+    def _embedding_id(self) -> str:
+        """Backend and model that vectors are built with, e.g. openai:text-embedding-ada-002"""
+        return embedding_id(self.embedding_config)
+    
+    def _write_lock(self, artifact_id: str) -> threading.Lock:
+        """Lock serializing writes to one artifact's vector store"""
+        with self._write_locks_guard:
+            return self._write_locks.setdefault(artifact_id, threading.Lock())
+    
+    def _persist_store(self, artifact_id: str, vector_store: FAISS) -> Dict[str, Any]:
+        """Save a freshly built store and swap its on-disk (compressed, mapped) version into the cache"""
+        vector_path = self.vector_store_dir / artifact_id
+        index_info = save_store(vector_path, vector_store, self.index_type)
+        if self.consolidated:
+            self.consolidated.upsert(artifact_id)
+        self._cache.put(artifact_id, self._load_store(vector_path))
+        return index_info
+    
+    def _clone_store(self, artifact_id: str, vector_store: FAISS) -> FAISS:
+        """Copy a vector store so it can be modified while the original is being searched
+        
+        The copy always has an exact flat index, rebuilt from the saved vectors
+        when the store's own index is compressed.
+        """
+        index = None
+        vectors = load_vectors(self.vector_store_dir / artifact_id)
+        if vectors is not None and len(vectors) == vector_store.index.ntotal:
+            index = faiss.index_factory(vector_store.index.d, "Flat", vector_store.index.metric_type)
+            index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+        
+        return FAISS(
+            embedding_function=self.embeddings,
+            index=index if index is not None else copy_index(vector_store.index),
+            docstore=InMemoryDocstore({
+                doc_id: vector_store.docstore.search(doc_id)
+                for doc_id in vector_store.index_to_docstore_id.values()
+            }),
+            index_to_docstore_id=dict(vector_store.index_to_docstore_id)
+        )
+    
+    @staticmethod
+    def _file_hash(file: FileItem) -> str:
+        """Stable digest of a file's content used to detect changes between saves"""
+        return content_digest(file.content)
+    
+    def _save_path_index(self, artifact_id: str, files: List[FileItem], file_chunk_ids: Dict[str, List[str]]):
+        """Save the path -> (size, extension, ordered chunk ids) index for an artifact"""
+        try:
+            path_index = {
+                f.path: {
+                    "size": f.size,
+                    "file_extension": Path(f.path).suffix.lstrip('.'),
+                    "chunk_ids": file_chunk_ids.get(f.path, [])
+                }
+                for f in files
+                if not f.is_binary
+            }
+            
+            index_path = self.vector_store_dir / artifact_id / "paths.json"
+            index_path.parent.mkdir(exist_ok=True)
+            
+            with open(index_path, 'w', encoding='utf-8') as f:
+                json.dump(path_index, f, ensure_ascii=False)
+            
+            self._put_side_index("paths", artifact_id, path_index)
+                
+        except Exception as e:
+            logger.warning(f"Failed to save path index for {artifact_id}: {e}")
+    
+    def _get_path_index(self, artifact_id: str) -> Dict[str, Any]:
+        """Load an artifact's path lookup index, caching recently used ones"""
+        path_index = self._get_side_index("paths", artifact_id)
+        if path_index is not None:
+            return path_index
+        
+        try:
+            index_path = self.vector_store_dir / artifact_id / "paths.json"
+            if not index_path.exists():
+                return {}
+            with open(index_path, 'r', encoding='utf-8') as f:
+                path_index = json.load(f)
+        except Exception as e:
+            logger.warning(f"Failed to load path index for {artifact_id}: {e}")
+            return {}
+        
+        self._put_side_index("paths", artifact_id, path_index)
+        return path_index
+    
+    def _save_lexical_index(self, artifact_id: str, lexical_index: LexicalIndex):
+        """Persist an artifact's BM25 index next to its vector store"""
+        try:
+            lexical_index.save(self.vector_store_dir / artifact_id)
+            self._put_side_index("lexical", artifact_id, lexical_index)
+        except Exception as e:
+            logger.warning(f"Failed to save lexical index for {artifact_id}: {e}")
+    
+    def _get_lexical_index(self, artifact_id: str) -> Optional[LexicalIndex]:
+        """Load an artifact's BM25 index, building it from the docstore for older stores"""
+        lexical_index = self._get_side_index("lexical", artifact_id)
+        if lexical_index is not None:
+            return lexical_index
+        
+        artifact_dir = self.vector_store_dir / artifact_id
+        try:
+            if (artifact_dir / LexicalIndex.FILE_NAME).exists():
+                lexical_index = LexicalIndex.load(artifact_dir)
+            else:
+                vector_store = self.get_vector_store(artifact_id)
+                if not vector_store:
+                    return None
+                lexical_index = LexicalIndex()
+                lexical_index.add(
+                    (doc_id, vector_store.docstore.search(doc_id).page_content)
+                    for doc_id in vector_store.index_to_docstore_id.values()
+                )
+                lexical_index.save(artifact_dir)
+        except Exception as e:
+            logger.warning(f"Failed to load lexical index for {artifact_id}: {e}")
+            return None
+        
+        self._put_side_index("lexical", artifact_id, lexical_index)
+        return lexical_index
+    
+    def _get_side_index(self, kind: str, artifact_id: str) -> Optional[Any]:
+        with self._side_indexes_lock:
+            key = (kind, artifact_id)
+            if key not in self._side_indexes:
+                return None
+            self._side_indexes.move_to_end(key)
+            return self._side_indexes[key]
+    
+    def _put_side_index(self, kind: str, artifact_id: str, index: Any):
+        with self._side_indexes_lock:
+            key = (kind, artifact_id)
+            self._side_indexes[key] = index
+            self._side_indexes.move_to_end(key)
+            while len(self._side_indexes) > self.MAX_SIDE_INDEXES:
+                self._side_indexes.popitem(last=False)
+    
+    def _drop_side_indexes(self, artifact_id: str):
+        with self._side_indexes_lock:
+            for key in [key for key in self._side_indexes if key[1] == artifact_id]:
+                del self._side_indexes[key]
+    
+    def _save_vector_metadata(
+        self,
+        artifact_id: str,
+        files: List[FileItem],
+        vector_count: int,
+        file_chunk_ids: Dict[str, List[str]],
+        dimension: int,
+        index_info: Optional[Dict[str, Any]] = None
+    ):
         """Save metadata about the vector store"""
         try:
             metadata = {
@@ -311,9 +1020,14 @@ class VectorStoreManager:
                 "created_at": datetime.now().isoformat(),
                 "file_count": len(files),
                 "vector_count": vector_count,
-                "file_hashes": {f.path: hash(f.content) for f in files},
+                "file_hashes": {f.path: self._file_hash(f) for f in files},
                 "file_paths": [f.path for f in files],
-                "file_extensions": list(set(Path(f.path).suffix.lstrip('.') for f in files if Path(f.path).suffix))
+                "file_extensions": list(set(Path(f.path).suffix.lstrip('.') for f in files if Path(f.path).suffix)),
+                "file_chunk_ids": file_chunk_ids,
+                "embedding_backend": self.embedding_config["backend"],
+                "embedding_model": self.embedding_config["model"],
+                "embedding_dimension": dimension,
+                **(index_info or {})
             }
             
             metadata_path = self.vector_store_dir / artifact_id / "metadata.json"
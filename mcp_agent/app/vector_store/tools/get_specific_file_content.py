@@ -9,6 +9,7 @@ from ..manager.vector_manager import VectorStoreManager
 logger = logging.getLogger(__name__)
 
 from ..manager.get_vector_manager import get_vector_manager
+from ...utils.artifact_functions import load_artifact_file
 
 @tool
 def get_specific_file_content(
@@ -28,28 +29,27 @@ def get_specific_file_content(
     try:
         vector_manager = get_vector_manager()
         
-        # Search for the exact file path
-        results = vector_manager.search(
-            artifact_id=artifact_id,
-            query=file_path,
-            search_type="similarity",
-            search_kwargs={"k": 10},  # Get more results to find exact match
-            filter=None
-        )
+        # Artifact storage holds the latest save of every file
+        file = load_artifact_file(artifact_id, file_path, include_binary=False)
+        entry = vector_manager.get_file(artifact_id, file_path)
+        if file is None and entry is not None:
+            # The path index resolves a unique suffix, e.g. "src/App.jsx" for "/home/project/src/App.jsx"
+            file = load_artifact_file(artifact_id, entry["path"], include_binary=False)
         
-        # Find exact file path match
-        for doc in results:
-            if doc.metadata.get("file_path") == file_path:
-                return {
-                    "file_name": doc.metadata.get("file_name"),
-                    "file_path": doc.metadata.get("file_path"),
-                    "file_extension": doc.metadata.get("file_extension"),
-                    "source": doc.metadata.get("source"),
-                    "content": doc.page_content,
-                    "file_size": doc.metadata.get("file_size"),
-                    "artifact_id": doc.metadata.get("artifact_id"),
-                    "found": True
-                }
+        if file is not None and not file.is_binary:
+            result = {
+                "file_name": Path(file.path).name,
+                "file_path": file.path,
+                "file_extension": Path(file.path).suffix.lstrip('.'),
+                "source": "artifact_file",
+                "content": file.content,
+                "file_size": file.size,
+                "artifact_id": artifact_id,
+                "found": True
+            }
+            if entry is not None:
+                result["chunk_count"] = len(entry["chunk_ids"])
+            return result
         
         logger.warning(f"File not found: {file_path} in artifact {artifact_id}")
         return {"found": False, "error": f"File {file_path} not found in artifact {artifact_id}"}
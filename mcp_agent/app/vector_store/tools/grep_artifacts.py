@@ -0,0 +1,64 @@
+import logging
+import re
+from typing import List, Dict, Any, Optional
+from langchain_core.tools import tool
+
+logger = logging.getLogger(__name__)
+
+from ...utils.blob_store import get_blob_store
+from ...utils.trigram_index import get_trigram_index, list_stored_artifacts
+
+@tool
+def grep_artifacts(
+    pattern: str,
+    artifact_id: Optional[str] = None,
+    regex: bool = False,
+    case_sensitive: bool = False,
+    file_extension: Optional[str] = None,
+    max_results: int = 50
+) -> List[Dict[str, Any]]:
+    """
+    Find every exact occurrence of a string or regex in an artifact's files, like grep.
+    Use this instead of semantic search to find all uses of a component tag, identifier or import.
+    
+    Args:
+        pattern (str): Literal text (e.g. "obc-top-bar") or a regex when regex=True.
+        artifact_id (Optional[str]): The artifact to search; searches all artifacts if omitted.
+        regex (bool): Treat the pattern as a Python regular expression.
+        case_sensitive (bool): Match case exactly.
+        file_extension (Optional[str]): Only search files with this extension, e.g. "jsx".
+        max_results (int): Maximum number of matching lines to return.
+        
+    Returns:
+        List[Dict[str, Any]]: Matching lines with artifact_id, file_path, line number and text.
+    """
+    try:
+        artifact_ids = [artifact_id] if artifact_id else list_stored_artifacts()
+        
+        hits: List[Dict[str, Any]] = []
+        for current_id in artifact_ids:
+            index = get_trigram_index(current_id)
+            if index is None:
+                continue
+            
+            for hit in index.search(
+                pattern,
+                get_blob_store(),
+                regex=regex,
+                case_sensitive=case_sensitive,
+                file_extension=file_extension,
+                max_results=max_results - len(hits)
+            ):
+                hits.append({"artifact_id": current_id, **hit})
+            
+            if len(hits) >= max_results:
+                break
+        
+        logger.info(f"grep '{pattern}' found {len(hits)} lines in {len(artifact_ids)} artifact(s)")
+        return hits
+        
+    except re.error as e:
+        return [{"error": f"Invalid regex '{pattern}': {e}"}]
+    except Exception as e:
+        logger.error(f"Error grepping for '{pattern}': {e}")
+        return []
@@ -10,6 +10,17 @@ logger = logging.getLogger(__name__)
 
 from ..manager.get_vector_manager import get_vector_manager
 
+# File extensions searched for each language name the agent may pass
+LANGUAGE_EXTENSIONS = {
+    "javascript": ["js", "jsx", "mjs", "cjs"],
+    "typescript": ["ts", "tsx"],
+    "react": ["jsx", "tsx"],
+    "css": ["css", "scss"],
+    "html": ["html", "htm"],
+    "json": ["json"],
+    "python": ["py"],
+}
+
 @tool
 def search_code_patterns(
     pattern: str,
@@ -25,7 +36,7 @@ def search_code_patterns(
     Args:
         pattern (str): Code pattern to search for (function names, class names, imports, etc.).
         artifact_id (str): The ID of the artifact to search in.
-        language (str): Programming language to filter by ("python", "javascript", "react", etc.).
+        language (str): Language or file extension to filter by ("javascript", "typescript", "react", "css", "tsx", etc.).
         k (int): Number of results to return.
         include_context (bool): Whether to include surrounding code context.
         
@@ -35,15 +46,17 @@ def search_code_patterns(
     try:
         vector_manager = get_vector_manager()
         
-        # Build filter for language
+        # Build filter for language, accepting a bare extension like "tsx" as well
         filter_dict = {}
         if language:
-            filter_dict["source"] = language
+            language = language.lower().lstrip('.')
+            filter_dict["file_extension"] = LANGUAGE_EXTENSIONS.get(language, [language])
         
+        # Lexical + vector search; exact identifiers resolve without an embedding call
         results = vector_manager.search(
             artifact_id=artifact_id,
             query=pattern,
-            search_type="similarity",
+            search_type="hybrid",
             search_kwargs={"k": k},
             filter=filter_dict if filter_dict else None
         )
@@ -71,7 +84,7 @@ def search_code_patterns(
             result = {
                 "file_name": doc.metadata.get("file_name"),
                 "file_path": doc.metadata.get("file_path"),
-                "language": doc.metadata.get("source"),
+                "language": doc.metadata.get("file_extension"),
                 "pattern_found": pattern,
                 "code_content": content,
                 "file_size": doc.metadata.get("file_size")
@@ -0,0 +1,49 @@
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+
+# pyproject.toml installs app/ as the mcp_agent package; map it the same way when running from a checkout
+try:
+    import mcp_agent.vector_store  # noqa: F401
+except ImportError:
+    package = types.ModuleType("mcp_agent")
+    package.__path__ = [str(APP_DIR)]
+    sys.modules["mcp_agent"] = package
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    """Fresh storage/ under a temporary working directory, with offline embeddings and new global stores"""
+    from mcp_agent.utils import artifact_repository, asset_store, blob_store
+    from mcp_agent.vector_store.manager import get_vector_manager
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("EMBEDDINGS_BACKEND", "hashing")
+    monkeypatch.setattr(artifact_repository, "_artifact_repository", None)
+    monkeypatch.setattr(asset_store, "_asset_store", None)
+    monkeypatch.setattr(blob_store, "_blob_store", None)
+    monkeypatch.setattr(get_vector_manager, "_vector_manager", None)
+    storage_dir = tmp_path / "storage"
+    storage_dir.mkdir()
+    return storage_dir
+
+
+@pytest.fixture
+def app(storage, monkeypatch):
+    """The FastAPI app without its startup hook: a no-op agent and a queue that records submissions"""
+    from types import SimpleNamespace
+
+    from mcp_agent import main
+
+    submitted = []
+    monkeypatch.setattr(main.app.state, "agent", SimpleNamespace(update_agent_state=lambda **kwargs: None), raising=False)
+    monkeypatch.setattr(
+        main.app.state, "vectorization_queue",
+        SimpleNamespace(submit=lambda saved: submitted.append(saved) or {"state": "queued"}, submitted=submitted),
+        raising=False
+    )
+    return main.app
@@ -0,0 +1,36 @@
+import pytest
+
+from mcp_agent.models.artifact_models import FileItem, FilesRequest
+from mcp_agent.utils.artifact_functions import load_artifact_file, write_artifact_file
+from mcp_agent.utils.artifact_repository import StaleRevisionError, get_artifact_repository
+
+
+def text_file(path: str, body: str) -> FileItem:
+    return FileItem(path=path, content=body, size=len(body))
+
+
+def test_delta_against_the_current_revision_is_saved(storage):
+    first = write_artifact_file(FilesRequest(artifact_id="a1", files=[text_file("a.ts", "1")]))
+
+    saved = write_artifact_file(FilesRequest(
+        artifact_id="a1", files=[text_file("b.ts", "2")], removed_paths=["a.ts"], base_revision=first.revision
+    ))
+
+    assert saved.revision == first.revision + 1
+    assert get_artifact_repository().file_paths("a1") == ["b.ts"]
+
+
+def test_save_landing_after_the_diff_is_refused(storage):
+    write_artifact_file(FilesRequest(artifact_id="a1", files=[text_file("a.ts", "1")]))
+    repository = get_artifact_repository()
+    metadata = repository.get_metadata("a1")
+    # Another writer saves between the client's diff at revision 1 and its delta
+    write_artifact_file(FilesRequest(artifact_id="a1", files=[text_file("a.ts", "2")]))
+
+    with pytest.raises(StaleRevisionError, match="revision 2, not 1"):
+        repository.save("a1", metadata, [], [], ["a.ts"], base_revision=1)
+    with pytest.raises(StaleRevisionError):
+        write_artifact_file(FilesRequest(artifact_id="a1", files=[text_file("a.ts", "3")], base_revision=1))
+
+    assert repository.revision("a1") == 2
+    assert load_artifact_file("a1", "a.ts").content == "2"
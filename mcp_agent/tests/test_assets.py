@@ -0,0 +1,120 @@
+import base64
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from mcp_agent.models.artifact_models import FileItem, FilesRequest
+from mcp_agent.utils.artifact_functions import load_artifact, write_artifact_file
+from mcp_agent.utils.asset_store import FLAG_COMPRESSED, AssetStore
+
+# Random bytes do not compress and are stored as is; repeated ones are stored compressed
+RAW = os.urandom(200_000)
+REPETITIVE = b"0123456789abcdef" * 12_500
+
+
+def encoded(payload: bytes) -> str:
+    return base64.b64encode(payload).decode("ascii")
+
+
+def stored_flags(store: AssetStore, digest: str) -> int:
+    with open(store.path(digest), 'rb') as f:
+        return f.read(1)[0]
+
+
+@pytest.mark.parametrize("payload, compressed", [(RAW, False), (REPETITIVE, True)], ids=["raw", "compressed"])
+def test_asset_ranges(tmp_path, payload, compressed):
+    store = AssetStore(str(tmp_path / "assets"))
+    digest = store.put(encoded(payload))
+
+    assert bool(stored_flags(store, digest) & FLAG_COMPRESSED) == compressed
+    assert store.size(digest) == len(payload)
+    assert store.get(digest) == encoded(payload)
+    assert b"".join(store.iter_bytes(digest)) == payload
+    assert b"".join(store.iter_bytes(digest, 70_000, 140_001, chunk_size=4096)) == payload[70_000:140_002]
+    assert b"".join(store.iter_bytes(digest, len(payload) - 10, len(payload) + 100)) == payload[-10:]
+
+
+@pytest.fixture
+def client(app):
+    write_artifact_file(FilesRequest(
+        artifact_id="a1",
+        files=[FileItem(path="public/logo.png", content=encoded(RAW), is_binary=True, size=len(RAW), type="binary")]
+    ))
+    return TestClient(app)
+
+
+def test_full_asset_with_etag(client):
+    response = client.get("/api/files/a1/assets/public/logo.png")
+
+    assert response.status_code == 200
+    assert response.content == RAW
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["etag"]
+
+
+@pytest.mark.parametrize("if_none_match, status", [
+    ("{etag}", 304),
+    ("W/{etag}", 304),
+    ('"other", {etag}', 304),
+    ("*", 304),
+    ('"other"', 200),
+    ("{bare}", 200),
+    ('"{bare}-v2"', 200),
+    ("", 200),
+], ids=["exact", "weak", "list", "any", "other", "unquoted", "longer", "empty"])
+def test_if_none_match(client, if_none_match, status):
+    etag = client.get("/api/files/a1/assets/public/logo.png").headers["etag"]
+    header = if_none_match.format(etag=etag, bare=etag.strip('"'))
+
+    response = client.get("/api/files/a1/assets/public/logo.png", headers={"If-None-Match": header})
+
+    assert response.status_code == status
+    if status == 304:
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+
+@pytest.mark.parametrize("range_header, start, end", [
+    ("bytes=100-199", 100, 199),
+    ("bytes=199990-", 199_990, 199_999),
+    ("bytes=-5", 199_995, 199_999),
+    ("bytes=199000-999999", 199_000, 199_999),
+])
+def test_range_returns_206(client, range_header, start, end):
+    response = client.get("/api/files/a1/assets/public/logo.png", headers={"Range": range_header})
+
+    assert response.status_code == 206
+    assert response.content == RAW[start:end + 1]
+    assert response.headers["content-range"] == f"bytes {start}-{end}/{len(RAW)}"
+
+
+def test_unsatisfiable_range_returns_416(client):
+    response = client.get("/api/files/a1/assets/public/logo.png", headers={"Range": "bytes=300000-"})
+
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(RAW)}"
+
+
+def test_range_against_other_version_returns_full_asset(client):
+    response = client.get(
+        "/api/files/a1/assets/public/logo.png", headers={"Range": "bytes=0-9", "If-Range": '"outdated"'}
+    )
+
+    assert response.status_code == 200
+    assert response.content == RAW
+
+
+def test_text_only_load_leaves_binary_content_out(storage):
+    write_artifact_file(FilesRequest(
+        artifact_id="a1",
+        files=[FileItem(path="public/logo.png", content=encoded(RAW), is_binary=True, size=len(RAW), type="binary")]
+    ))
+
+    assert load_artifact("a1").files[0].content == encoded(RAW)
+    assert load_artifact("a1", include_binary=False).files[0].content == ""
+
+
+def test_unknown_asset_returns_404(client):
+    assert client.get("/api/files/a1/assets/public/missing.png").status_code == 404
@@ -0,0 +1,60 @@
+import pytest
+
+from mcp_agent.models.artifact_models import FileItem, FilesRequest
+from mcp_agent.utils.artifact_functions import load_artifact, load_artifact_file, write_artifact_file
+from mcp_agent.utils.blob_store import BlobStore, blob_digest, get_blob_store
+
+
+def text_file(path: str, body: str) -> FileItem:
+    return FileItem(path=path, content=body, size=len(body))
+
+
+def blob_count(storage) -> int:
+    return sum(1 for _ in (storage / "blobs").rglob("*.z"))
+
+
+def test_blobs_are_content_addressed_and_compressed(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    content = "export const theme = 'night';\n" * 200
+
+    digest = store.put(content)
+
+    assert digest == blob_digest(content)
+    assert store.put(content) == digest
+    assert store.get(digest) == content
+    assert store.path(digest).stat().st_size < len(content) / 10
+    assert [path.name for path in (tmp_path / "blobs").rglob("*")] == [digest[:2], f"{digest}.z"]
+    with pytest.raises(FileNotFoundError):
+        store.get(blob_digest("never stored"))
+
+
+def test_artifacts_share_blobs_and_unchanged_files_are_not_rewritten(storage):
+    files = [text_file("src/App.tsx", "export default function App() {}\n"), text_file("README.md", "# Bridge\n")]
+    write_artifact_file(FilesRequest(artifact_id="a1", files=files))
+    blobs = blob_count(storage)
+    app_blob = get_blob_store().path(blob_digest(files[0].content))
+    written_at = app_blob.stat().st_mtime_ns
+
+    write_artifact_file(FilesRequest(artifact_id="a1", files=files))
+    write_artifact_file(FilesRequest(artifact_id="a2", files=files))
+
+    assert blob_count(storage) == blobs
+    assert app_blob.stat().st_mtime_ns == written_at
+
+
+def test_one_file_loads_without_reading_the_others(storage, monkeypatch):
+    write_artifact_file(FilesRequest(artifact_id="a1", files=[
+        text_file("src/App.tsx", "export default function App() {}\n"),
+        text_file("src/theme.css", ":root { --accent: teal; }\n"),
+    ]))
+    write_artifact_file(FilesRequest(artifact_id="a1", files=[text_file("src/theme.css", ":root { --accent: red; }\n")]))
+
+    read = []
+    original_get = BlobStore.get
+    monkeypatch.setattr(BlobStore, "get", lambda self, digest: read.append(digest) or original_get(self, digest))
+
+    theme = load_artifact_file("a1", "src/theme.css")
+    assert theme.content == ":root { --accent: red; }\n"
+    assert read == [blob_digest(theme.content)]
+    assert load_artifact_file("a1", "src/missing.css") is None
+    assert sorted(f.path for f in load_artifact("a1").files) == ["src/App.tsx", "src/theme.css"]
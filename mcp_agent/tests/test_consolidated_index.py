@@ -0,0 +1,84 @@
+from mcp_agent.models.artifact_models import FileItem
+from mcp_agent.vector_store.manager.consolidated_index import ConsolidatedIndex
+from mcp_agent.vector_store.manager.vector_manager import VectorStoreManager
+
+
+def project_files(name: str, version: int = 0):
+    files = []
+    for i in range(5):
+        body = f"export const {name}Part{i} = 'harbour {name} part {i} version {version}';\n"
+        files.append(FileItem(path=f"src/{name}/part_{i}.ts", content=body, size=len(body)))
+    return files
+
+
+def consolidated_manager(storage, **kwargs) -> VectorStoreManager:
+    return VectorStoreManager(
+        str(storage / "vector_store"), embedding_backend="hashing", layout="consolidated", **kwargs
+    )
+
+
+def test_stores_of_another_embedding_model_are_not_consolidated(storage, monkeypatch):
+    monkeypatch.setenv("EMBEDDINGS_DIMENSION", "256")
+    VectorStoreManager(str(storage / "vector_store"), embedding_backend="hashing").create_artifact_vectors(
+        "a1", project_files("alpha")
+    )
+
+    monkeypatch.setenv("EMBEDDINGS_DIMENSION", "128")
+    manager = consolidated_manager(storage)
+
+    assert manager.consolidated.artifacts() == []
+    assert manager.search("a1", "harbour alpha") == []
+
+    # Stores of the current model are still added and searchable
+    manager.create_artifact_vectors("a2", project_files("beta"))
+    assert manager.consolidated.artifacts() == ["a2"]
+    assert {doc.metadata["artifact_id"] for doc in manager.search_all_artifacts("harbour part")} == {"a2"}
+
+
+def test_repeated_saves_renumber_ids(storage):
+    manager = consolidated_manager(storage)
+    manager.create_artifact_vectors("a1", project_files("alpha"))
+    manager.create_artifact_vectors("a2", project_files("beta"))
+
+    for version in range(1, 6):
+        manager.update_artifact_vectors("a1", project_files("alpha", version))
+
+    consolidated = manager.consolidated
+    assert consolidated.index.ntotal == 10
+    assert consolidated._snapshot.next_id <= ConsolidatedIndex.RENUMBER_RATIO * consolidated.index.ntotal
+
+    results = manager.search("a1", "harbour alpha part version 5", search_kwargs={"k": 5})
+    assert len(results) == 5
+    assert all(doc.page_content.endswith("version 5';") for doc in results)
+    filtered = manager.search("a2", "harbour beta", search_kwargs={"k": 5}, filter={"path_prefix": "src/beta/part_1"})
+    assert [doc.metadata["file_path"] for doc in filtered] == ["src/beta/part_1.ts"]
+
+
+def test_writes_are_persisted_once_flushed(storage):
+    manager = consolidated_manager(storage)
+    manager.create_artifact_vectors("a1", project_files("alpha"))
+    manager.create_artifact_vectors("a2", project_files("beta"))
+    assert not manager.consolidated.exists()
+
+    manager.consolidated.flush()
+
+    reloaded = ConsolidatedIndex(
+        str(manager.vector_store_dir / "_consolidated"), str(manager.vector_store_dir),
+        embedding_model=manager._embedding_id()
+    )
+    assert sorted(reloaded.artifacts()) == ["a1", "a2"]
+    assert reloaded.index.ntotal == 10
+
+
+def test_unpersisted_writes_are_recovered_by_sync(storage):
+    manager = consolidated_manager(storage)
+    manager.create_artifact_vectors("a1", project_files("alpha"))
+    manager.consolidated.flush()
+    # Saved while the next write to disk was still pending
+    manager.update_artifact_vectors("a1", project_files("alpha", 1))
+    manager.create_artifact_vectors("a2", project_files("beta"))
+
+    restarted = consolidated_manager(storage)
+
+    assert sorted(restarted.consolidated.artifacts()) == ["a1", "a2"]
+    assert all(doc.page_content.endswith("version 1';") for doc in restarted.search("a1", "harbour alpha"))
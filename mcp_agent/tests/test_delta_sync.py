@@ -0,0 +1,79 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from mcp_agent.models.artifact_models import FileItem, FilesRequest
+from mcp_agent.utils.artifact_functions import (
+    StaleRevisionError, diff_artifact_manifest, load_artifact, write_artifact_file
+)
+from mcp_agent.utils.blob_store import blob_digest
+
+
+def text_file(path: str, body: str) -> FileItem:
+    return FileItem(path=path, content=body, size=len(body))
+
+
+@pytest.fixture
+def artifact(storage):
+    saved = write_artifact_file(FilesRequest(
+        artifact_id="a1",
+        files=[text_file("src/a.ts", "export const a = 1;\n"), text_file("src/b.ts", "export const b = 2;\n")]
+    ))
+    return saved
+
+
+def test_manifest_lists_changed_and_removed_paths(artifact):
+    manifest = {"src/a.ts": blob_digest("export const a = 1;\n"), "src/c.ts": blob_digest("export const c = 3;\n")}
+
+    revision, upload, removed = diff_artifact_manifest("a1", manifest)
+
+    assert revision == artifact.revision
+    assert upload == ["src/c.ts"]
+    assert removed == ["src/b.ts"]
+
+
+def test_delta_applies_against_current_revision(artifact):
+    saved = write_artifact_file(FilesRequest(
+        artifact_id="a1",
+        files=[text_file("src/c.ts", "export const c = 3;\n")],
+        removed_paths=["src/b.ts"],
+        base_revision=artifact.revision
+    ))
+
+    assert saved.revision == artifact.revision + 1
+    assert sorted(file.path for file in load_artifact("a1").files) == ["src/a.ts", "src/c.ts"]
+
+
+def test_delta_against_stale_revision_is_rejected(artifact):
+    write_artifact_file(FilesRequest(artifact_id="a1", files=[text_file("src/a.ts", "export const a = 10;\n")]))
+
+    with pytest.raises(StaleRevisionError):
+        write_artifact_file(FilesRequest(
+            artifact_id="a1", removed_paths=["src/b.ts"], base_revision=artifact.revision
+        ))
+
+    assert sorted(file.path for file in load_artifact("a1").files) == ["src/a.ts", "src/b.ts"]
+
+
+@pytest.fixture
+def client(app, artifact):
+    return TestClient(app)
+
+
+def test_delta_endpoint_returns_409_for_stale_revision(client, artifact):
+    response = client.post("/api/files/delta", json={
+        "artifact_id": "a1", "files": [], "removed_paths": ["src/b.ts"], "base_revision": artifact.revision - 1
+    })
+
+    assert response.status_code == 409
+
+
+def test_delta_endpoint_reports_new_revision(client, artifact):
+    response = client.post("/api/files/delta", json={
+        "artifact_id": "a1",
+        "files": [{"path": "src/c.ts", "content": "export const c = 3;\n", "size": 20}],
+        "base_revision": artifact.revision
+    })
+
+    assert response.status_code == 200
+    assert response.json()["revision"] == artifact.revision + 1
+    assert response.json()["file_count"] == 3
@@ -0,0 +1,57 @@
+import random
+
+import numpy as np
+import pytest
+
+from mcp_agent.models.artifact_models import FileItem
+from mcp_agent.vector_store.manager.dense_store import DenseVectorStore, PrefilteredFAISS
+from mcp_agent.vector_store.manager.vector_manager import VectorStoreManager
+
+
+WORDS = "alarm bearing chart depth engine heading radar rudder speed throttle wind wave".split()
+
+
+def project_files():
+    """Forty files of distinct word mixes, so no two chunks score the same"""
+    rng = random.Random(7)
+    files = []
+    for i in range(40):
+        extension = "css" if i % 4 == 0 else "tsx"
+        body = " ".join(rng.choice(WORDS) for _ in range(12)) + "\n"
+        files.append(FileItem(path=f"src/widgets/widget_{i}.{extension}", content=body, size=len(body)))
+    return files
+
+
+@pytest.fixture
+def stores(storage):
+    directory = str(storage / "vector_store")
+    VectorStoreManager(directory, embedding_backend="hashing").create_artifact_vectors("a1", project_files())
+    dense = VectorStoreManager(directory, embedding_backend="hashing", dense_max_vectors=2000).get_vector_store("a1")
+    indexed = VectorStoreManager(directory, embedding_backend="hashing", dense_max_vectors=0).get_vector_store("a1")
+    return dense, indexed
+
+
+def ranked(results):
+    return [doc.metadata["file_path"] for doc, _ in results], np.array([score for _, score in results])
+
+
+@pytest.mark.parametrize("search_filter", [None, {"file_extension": "css"}])
+def test_dense_search_matches_faiss(stores, search_filter):
+    dense, indexed = stores
+    assert type(dense) is DenseVectorStore
+    assert type(indexed) is PrefilteredFAISS
+
+    for query in ("radar heading", "engine throttle speed"):
+        dense_paths, dense_scores = ranked(dense.similarity_search_with_score(query, k=6, filter=search_filter))
+        faiss_paths, faiss_scores = ranked(indexed.similarity_search_with_score(query, k=6, filter=search_filter))
+
+        assert dense_paths == faiss_paths
+        np.testing.assert_allclose(dense_scores, faiss_scores, atol=1e-5)
+
+
+def test_dense_search_handles_k_beyond_the_store(stores):
+    dense, _ = stores
+
+    assert len(dense.similarity_search_with_score("radar", k=100)) == 40
+    assert len(dense.similarity_search_with_score("radar", k=100, filter={"file_extension": "css"})) == 10
+    assert dense.similarity_search_with_score("radar", k=5, filter={"file_extension": "rs"}) == []
@@ -0,0 +1,41 @@
+import pytest
+
+from mcp_agent.vector_store.manager.embedding_cache import EmbeddingCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return EmbeddingCache(str(tmp_path / "embeddings.sqlite"), max_entries=10)
+
+
+def test_recent_hits_do_not_write(cache):
+    cache.put_many({"m:a": [1.0, 2.0]})
+    changes = cache._conn.total_changes
+
+    assert cache.get_many(["m:a", "m:b"]) == {"m:a": [1.0, 2.0]}
+    assert cache._conn.total_changes == changes
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_old_hits_refresh_last_used(cache, monkeypatch):
+    cache.put_many({"m:a": [1.0]})
+    monkeypatch.setattr(cache, "TOUCH_INTERVAL", -1.0)
+    changes = cache._conn.total_changes
+
+    cache.get_many(["m:a"])
+
+    assert cache._conn.total_changes == changes + 1
+
+
+def test_overflow_evicts_least_recently_used(cache):
+    cache.put_many({f"m:{i}": [float(i)] for i in range(10)})
+    cache._conn.execute("UPDATE embeddings SET last_used = 0 WHERE key IN ('m:0', 'm:1')")
+    cache._conn.commit()
+
+    cache.put_many({"m:10": [10.0]})
+
+    # The table is trimmed to EVICT_TO of the bound, oldest entries first
+    assert cache.stats()["entries"] == 9
+    assert cache.evictions == 2
+    assert not cache.get_many(["m:0", "m:1"])
+    assert set(cache.get_many([f"m:{i}" for i in range(2, 11)])) == {f"m:{i}" for i in range(2, 11)}
@@ -0,0 +1,98 @@
+import asyncio
+from typing import List
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from mcp_agent.vector_store.manager.embedding_cache import CachedEmbeddings, EmbeddingCache
+from mcp_agent.vector_store.manager.embedding_pipeline import EmbeddingPipeline
+
+
+class ApiError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+class FakeEmbeddings(Embeddings):
+    """Embeds a text as [len(text)], recording requests and how many run at once"""
+
+    model = "fake-model"
+
+    def __init__(self, failures: List[int] = ()):
+        self.failures = list(failures)
+        self.batches: List[List[str]] = []
+        self.running = 0
+        self.max_running = 0
+
+    def embed_documents(self, texts):
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text):
+        return [float(len(text))]
+
+    async def aembed_documents(self, texts):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(0.01)
+            if self.failures:
+                raise ApiError(self.failures.pop(0))
+            if any(text.startswith("bad") for text in texts):
+                raise ApiError(400)
+            self.batches.append(list(texts))
+            return self.embed_documents(texts)
+        finally:
+            self.running -= 1
+
+
+def pipeline(tmp_path, model: FakeEmbeddings, **kwargs) -> EmbeddingPipeline:
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite"))
+    return EmbeddingPipeline(CachedEmbeddings(model, cache), base_delay=0.01, **kwargs)
+
+
+def test_texts_are_batched_deduplicated_and_cached(tmp_path):
+    model = FakeEmbeddings()
+    embedder = pipeline(tmp_path, model, max_batch_size=3, max_concurrency=2)
+    texts = [f"text {'x' * i}" for i in range(10)] + ["text "]
+
+    vectors = asyncio.run(embedder.aembed_documents(texts))
+
+    assert vectors == [[float(len(text))] for text in texts]
+    assert sorted(len(batch) for batch in model.batches) == [1, 3, 3, 3]
+    assert model.max_running == 2
+
+    # A second run is served from the cache
+    asyncio.run(embedder.aembed_documents(texts))
+    assert len(model.batches) == 4
+
+
+def test_batches_respect_the_token_budget(tmp_path):
+    embedder = pipeline(tmp_path, FakeEmbeddings(), max_batch_tokens=50)
+    embedder._count_tokens = len
+
+    batches = embedder._pack_batches([(str(i), "y" * 20) for i in range(5)] + [("big", "z" * 80)])
+
+    assert [len(batch) for batch in batches] == [2, 2, 1, 1]
+
+
+def test_rate_limits_are_retried(tmp_path):
+    model = FakeEmbeddings(failures=[429, 503])
+    embedder = pipeline(tmp_path, model)
+
+    assert asyncio.run(embedder.aembed_documents(["alpha", "beta"])) == [[5.0], [4.0]]
+    assert embedder.retries == 2
+    assert embedder.requests == 3
+
+
+def test_failed_batch_raises_and_completed_batches_are_kept(tmp_path):
+    model = FakeEmbeddings()
+    embedder = pipeline(tmp_path, model, max_batch_size=2)
+
+    with pytest.raises(ApiError):
+        asyncio.run(embedder.aembed_documents(["good one", "good two", "bad one", "good three"]))
+    assert embedder.retries == 0
+
+    model.batches.clear()
+    asyncio.run(embedder.aembed_documents(["good one", "good two"]))
+    assert model.batches == []
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from mcp_agent.models.artifact_models import FileItem
+from mcp_agent.vector_store.manager.embedding_cache import CachedEmbeddings
+from mcp_agent.vector_store.manager.embeddings import (
+    HashingEmbeddings, create_embeddings, get_embeddings_config, stored_embedding_id
+)
+from mcp_agent.vector_store.manager.vector_manager import VectorStoreManager
+
+
+def test_config_follows_the_environment(monkeypatch):
+    monkeypatch.delenv("EMBEDDINGS_BACKEND", raising=False)
+    monkeypatch.delenv("EMBEDDINGS_MODEL", raising=False)
+    assert get_embeddings_config() == {"backend": "openai", "model": "text-embedding-ada-002"}
+
+    monkeypatch.setenv("EMBEDDINGS_BACKEND", "Hashing")
+    monkeypatch.setenv("EMBEDDINGS_DIMENSION", "256")
+    assert get_embeddings_config() == {"backend": "hashing", "model": "hashing-256"}
+
+    with pytest.raises(ValueError):
+        get_embeddings_config("huggingface")
+    with pytest.raises(ValueError):
+        get_embeddings_config("word2vec")
+
+
+def test_model_backends_are_cached_and_hashing_is_not(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+
+    assert isinstance(create_embeddings({"backend": "openai", "model": "text-embedding-3-small"}), CachedEmbeddings)
+    hashing = create_embeddings({"backend": "hashing", "model": "hashing-256"})
+    assert isinstance(hashing, HashingEmbeddings)
+    assert hashing.dimension == 256
+
+
+def test_hashing_vectors_are_deterministic_and_normalised():
+    embeddings = HashingEmbeddings(dimension=512)
+    first, second = embeddings.embed_documents(["const TopBar = () => null;", ""])
+
+    assert len(first) == 512
+    assert np.linalg.norm(first) == pytest.approx(1.0, abs=1e-5)
+    assert not any(second)
+    assert HashingEmbeddings(dimension=512).embed_query("const TopBar = () => null;") == first
+
+
+def test_hashing_places_related_identifiers_close():
+    embeddings = HashingEmbeddings()
+    query = np.array(embeddings.embed_query("TopBar component"))
+    related = np.array(embeddings.embed_query("<obc-top-bar> element"))
+    unrelated = np.array(embeddings.embed_query("database migration script"))
+
+    assert query @ related > query @ unrelated
+
+
+def test_stores_of_another_model_are_not_loaded(storage):
+    files = [FileItem(path="src/App.ts", content="export const app = 1;\n", size=22)]
+    VectorStoreManager(str(storage / "vector_store"), embedding_backend="hashing").create_artifact_vectors("a1", files)
+
+    assert stored_embedding_id({}) == "openai:text-embedding-ada-002"
+    with pytest.MonkeyPatch.context() as patched:
+        patched.setenv("EMBEDDINGS_DIMENSION", "256")
+        other = VectorStoreManager(str(storage / "vector_store"), embedding_backend="hashing")
+        assert other.get_vector_store("a1") is None
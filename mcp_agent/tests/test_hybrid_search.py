@@ -0,0 +1,41 @@
+import pytest
+
+from mcp_agent.models.artifact_models import FileItem
+from mcp_agent.vector_store.manager.vector_manager import VectorStoreManager
+
+
+def project_files():
+    """Two hundred TypeScript files that repeat the identifier and ten Python files that mention it once"""
+    files = []
+    for i in range(200):
+        body = f"export const value{i} = sharedToken + sharedToken; // sharedToken\n"
+        files.append(FileItem(path=f"src/ts/file_{i}.ts", content=body, size=len(body)))
+    for i in range(10):
+        body = f"value_{i} = compute(sharedToken, {i})\n"
+        files.append(FileItem(path=f"src/py/file_{i}.py", content=body, size=len(body)))
+    return files
+
+
+@pytest.fixture
+def manager(storage):
+    manager = VectorStoreManager(str(storage / "vector_store"), embedding_backend="hashing")
+    manager.create_artifact_vectors("a1", project_files())
+    return manager
+
+
+def test_selective_filter_still_gets_lexical_matches(manager, monkeypatch):
+    def no_embedding(query):
+        raise AssertionError("identifier query should resolve lexically")
+
+    monkeypatch.setattr(manager.embeddings, "embed_query", no_embedding)
+
+    results = manager.search(
+        "a1", "sharedToken", search_type="hybrid", search_kwargs={"k": 5}, filter={"file_extension": "py"}
+    )
+
+    assert len(results) == 5
+    assert all(doc.metadata["file_extension"] == "py" for doc in results)
+
+
+def test_hybrid_filter_without_matches_returns_nothing(manager):
+    assert manager.search("a1", "sharedToken", search_type="hybrid", filter={"file_extension": "rs"}) == []
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from mcp_agent.models.artifact_models import FileItem
+from mcp_agent.vector_store.manager.vector_manager import VectorStoreManager
+
+
+def text_file(path: str, body: str) -> FileItem:
+    return FileItem(path=path, content=body, size=len(body))
+
+
+@pytest.fixture
+def manager(storage):
+    return VectorStoreManager(str(storage / "vector_store"), embedding_backend="hashing")
+
+
+def chunk_ids(manager: VectorStoreManager, artifact_id: str):
+    with open(manager.vector_store_dir / artifact_id / "metadata.json", encoding="utf-8") as f:
+        return json.load(f)["file_chunk_ids"]
+
+
+def stored_contents(manager: VectorStoreManager, artifact_id: str):
+    store = manager.get_vector_store(artifact_id)
+    return {
+        store.docstore.search(doc_id).metadata["file_path"]: store.docstore.search(doc_id).page_content
+        for doc_id in store.index_to_docstore_id.values()
+    }
+
+
+FILES = [
+    text_file("src/keep.py", "def keep():\n    return 'unchanged'\n"),
+    text_file("src/edit.py", "def edit():\n    return 'first version'\n"),
+    text_file("src/drop.py", "def drop():\n    return 'removed later'\n"),
+]
+
+
+def test_update_replaces_changed_and_removes_deleted_chunks(manager):
+    manager.create_artifact_vectors("a1", FILES)
+    before = chunk_ids(manager, "a1")
+
+    edited = text_file("src/edit.py", "def edit():\n    return 'second version'\n")
+    manager.update_artifact_vectors("a1", [FILES[0], edited])
+
+    after = chunk_ids(manager, "a1")
+    assert set(after) == {"src/keep.py", "src/edit.py"}
+    # Unchanged files keep their chunks; changed files get new ones
+    assert after["src/keep.py"] == before["src/keep.py"]
+    assert not set(after["src/edit.py"]) & set(before["src/edit.py"])
+
+    store = manager.get_vector_store("a1")
+    assert store.index.ntotal == len(after["src/keep.py"]) + len(after["src/edit.py"])
+    assert set(store.index_to_docstore_id.values()) == set(after["src/keep.py"] + after["src/edit.py"])
+    assert stored_contents(manager, "a1")["src/edit.py"] == edited.content.strip()
+
+    results = manager.search("a1", "removed later", search_kwargs={"k": 5})
+    assert all(doc.metadata["file_path"] != "src/drop.py" for doc in results)
+
+
+def test_update_without_changes_keeps_store(manager):
+    manager.create_artifact_vectors("a1", FILES)
+    before = chunk_ids(manager, "a1")
+
+    manager.update_artifact_vectors("a1", FILES)
+
+    assert chunk_ids(manager, "a1") == before
+
+
+def test_update_removing_every_file_deletes_store(manager):
+    manager.create_artifact_vectors("a1", FILES)
+
+    assert manager.update_artifact_vectors("a1", []) is None
+    assert "a1" not in manager.list_artifacts()
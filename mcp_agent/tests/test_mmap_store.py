@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from mcp_agent.vector_store.manager.embeddings import HashingEmbeddings
+from mcp_agent.vector_store.manager.mmap_store import (
+    CURRENT_FILE, is_legacy_store, load_store, load_vectors, save_store, store_files_dir, store_generation
+)
+
+
+@pytest.fixture
+def embeddings():
+    return HashingEmbeddings()
+
+
+def build_store(embeddings, count: int) -> FAISS:
+    docs = [
+        Document(page_content=f"chunk item{i}: naïve café ✓", metadata={"file_path": f"src/file_{i % 3}.py", "n": i})
+        for i in range(count)
+    ]
+    return FAISS.from_documents(docs, embeddings, ids=[f"id-{i}" for i in range(count)])
+
+
+@pytest.mark.parametrize("memory_map", [True, False])
+def test_round_trip(tmp_path, embeddings, memory_map):
+    original = build_store(embeddings, 12)
+    save_store(tmp_path / "store", original, "flat")
+
+    loaded = load_store(tmp_path / "store", embeddings, memory_map=memory_map)
+
+    assert loaded.index.ntotal == 12
+    assert loaded.index_to_docstore_id == original.index_to_docstore_id
+    for doc_id in original.index_to_docstore_id.values():
+        expected, actual = original.docstore.search(doc_id), loaded.docstore.search(doc_id)
+        assert actual.page_content == expected.page_content
+        assert actual.metadata == expected.metadata
+    np.testing.assert_array_equal(load_vectors(tmp_path / "store"), original.index.reconstruct_n(0, 12))
+
+    query = embeddings.embed_query("chunk item7: naïve café ✓")
+    assert loaded.similarity_search_by_vector(query, k=1)[0].id == "id-7"
+
+
+def test_save_switches_generation_and_removes_the_previous_one(tmp_path, embeddings):
+    directory = tmp_path / "store"
+    save_store(directory, build_store(embeddings, 5))
+    first = store_generation(directory)
+    reader = load_store(directory, embeddings)
+
+    save_store(directory, build_store(embeddings, 5))
+
+    second = store_generation(directory)
+    assert second != first
+    assert sorted(path.name for path in directory.iterdir()) == sorted([CURRENT_FILE, second])
+    assert store_files_dir(directory) == directory / second
+    # A store loaded before the save keeps reading its own, now unlinked, files
+    assert reader.docstore.search("id-3").page_content == "chunk item3: naïve café ✓"
+
+
+def test_empty_store_round_trip(tmp_path, embeddings):
+    store = build_store(embeddings, 1)
+    store.delete(["id-0"])
+    save_store(tmp_path / "store", store)
+
+    loaded = load_store(tmp_path / "store", embeddings)
+
+    assert loaded.index.ntotal == 0
+    assert loaded.similarity_search("chunk", k=3) == []
+
+
+def test_legacy_store_is_detected_and_replaced(tmp_path, embeddings):
+    directory = tmp_path / "store"
+    build_store(embeddings, 3).save_local(str(directory))
+    assert is_legacy_store(directory)
+
+    save_store(directory, build_store(embeddings, 3))
+
+    assert not is_legacy_store(directory)
+    assert not (directory / "index.pkl").exists()
+    assert load_store(directory, embeddings).index.ntotal == 3
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+
+from mcp_agent.vector_store.manager.mmr import mmr_select
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("lambda_mult", [0.0, 0.25, 0.5, 1.0])
+@pytest.mark.parametrize("k", [1, 4, 20, 50])
+def test_matches_langchain(seed, lambda_mult, k):
+    rng = np.random.default_rng(seed)
+    query = rng.normal(size=32).astype(np.float32)
+    candidates = rng.normal(size=(40, 32)).astype(np.float32)
+
+    assert mmr_select(query, candidates, k, lambda_mult) == maximal_marginal_relevance(
+        query, candidates, lambda_mult=lambda_mult, k=k
+    )
+
+
+def test_near_duplicates_are_passed_over():
+    query = np.array([1.0, 0.0, 0.0])
+    candidates = np.array([
+        [1.0, 0.1, 0.0],
+        [1.0, 0.11, 0.0],
+        [0.7, 0.0, 0.7],
+    ])
+
+    assert mmr_select(query, candidates, k=2) == [0, 2]
+    assert mmr_select(query, candidates, k=2, lambda_mult=1.0) == [0, 1]
+
+
+def test_empty_and_zero_inputs():
+    assert mmr_select(np.ones(3), np.empty((0, 3)), k=4) == []
+    assert mmr_select(np.ones(3), np.ones((2, 3)), k=0) == []
+    # Zero vectors score zero instead of dividing by zero
+    assert mmr_select(np.zeros(3), np.eye(3), k=3) == [0, 1, 2]
@@ -0,0 +1,56 @@
+import pytest
+
+from mcp_agent.models.artifact_models import FileItem
+from mcp_agent.vector_store.manager.vector_manager import VectorStoreManager
+
+
+def project_files(name: str):
+    """Sixty TypeScript files and six Python files, so a filter on py matches a tenth of the chunks"""
+    files = []
+    for i in range(66):
+        extension = "py" if i % 11 == 0 else "ts"
+        body = f"export const {name}Value{i} = 'component {name} value {i}';\n"
+        files.append(FileItem(path=f"src/{name}/file_{i}.{extension}", content=body, size=len(body)))
+    return files
+
+
+@pytest.fixture(params=[
+    {"layout": "per_artifact", "dense_max_vectors": 2000},
+    {"layout": "per_artifact", "dense_max_vectors": 0},
+    {"layout": "consolidated", "dense_max_vectors": 2000},
+], ids=["dense", "faiss", "consolidated"])
+def manager(storage, request):
+    manager = VectorStoreManager(str(storage / "vector_store"), embedding_backend="hashing", **request.param)
+    manager.create_artifact_vectors("a1", project_files("alpha"))
+    manager.create_artifact_vectors("a2", project_files("beta"))
+    return manager
+
+
+def test_selective_filter_returns_k_matches(manager):
+    results = manager.search("a1", "component value", search_kwargs={"k": 5}, filter={"file_extension": "py"})
+
+    assert len(results) == 5
+    assert all(doc.metadata["file_extension"] == "py" for doc in results)
+    assert all(doc.metadata["artifact_id"] == "a1" for doc in results)
+
+
+def test_path_prefix_filter_across_artifacts(manager):
+    results = manager.search_all_artifacts(
+        "component value", max_results=4, filter={"path_prefix": "src/beta/file_1"}
+    )
+
+    assert len(results) == 4
+    assert all(doc.metadata["file_path"].startswith("src/beta/file_1") for doc in results)
+
+
+def test_mmr_respects_filter(manager):
+    results = manager.search(
+        "a2", "component value", search_type="mmr", search_kwargs={"k": 3, "fetch_k": 6}, filter={"file_extension": "py"}
+    )
+
+    assert len(results) == 3
+    assert all(doc.metadata["file_extension"] == "py" for doc in results)
+
+
+def test_filter_without_matches_returns_nothing(manager):
+    assert manager.search("a1", "component value", filter={"file_extension": "rs"}) == []
@@ -0,0 +1,18 @@
+from mcp_agent.models.artifact_models import FileItem
+from mcp_agent.vector_store.manager.vector_manager import VectorStoreManager
+
+
+def test_callers_cannot_change_cached_results(storage):
+    manager = VectorStoreManager(str(storage / "vector_store"), embedding_backend="hashing")
+    body = "export const speed = 12;\n"
+    manager.create_artifact_vectors("a1", [FileItem(path="src/speed.ts", content=body, size=len(body))])
+
+    first = manager.search("a1", "speed", search_kwargs={"k": 1})
+    first[0].metadata["score"] = 0.5
+    first[0].page_content = "annotated"
+    first.clear()
+
+    second = manager.search("a1", "speed", search_kwargs={"k": 1})
+    assert manager.result_cache_stats()["hits"] == 1
+    assert second[0].page_content == body.strip()
+    assert "score" not in second[0].metadata
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from mcp_agent.models.artifact_models import FileItem
+from mcp_agent.vector_store.manager.vector_manager import VectorStoreManager
+
+WORDS = ["anchor", "buoy", "chart", "deck", "engine", "funnel", "galley", "hull", "keel", "mast"]
+
+
+def artifact_files(name: str, offset: int):
+    files = []
+    for i in range(4):
+        words = " ".join(WORDS[(offset + i + j) % len(WORDS)] for j in range(3))
+        body = f"// {name} module {i}: {words}\n"
+        files.append(FileItem(path=f"src/{name}_{i}.ts", content=body, size=len(body)))
+    return files
+
+
+@pytest.fixture
+def manager(storage):
+    manager = VectorStoreManager(str(storage / "vector_store"), embedding_backend="hashing")
+    for offset, artifact_id in enumerate(["a1", "a2", "a3"]):
+        manager.create_artifact_vectors(artifact_id, artifact_files(artifact_id, offset * 3))
+    return manager
+
+
+def distances(manager: VectorStoreManager, query: str, docs):
+    query_vector = np.array(manager.embeddings.embed_query(query))
+    doc_vectors = np.array(manager.embeddings.embed_documents([doc.page_content for doc in docs]))
+    return np.linalg.norm(doc_vectors - query_vector, axis=1)
+
+
+def test_results_are_merged_by_score_across_artifacts(manager):
+    query = "anchor buoy chart deck"
+
+    results = manager.search_all_artifacts(query, max_results=6)
+
+    assert len(results) == 6
+    assert len({doc.metadata["artifact_id"] for doc in results}) > 1
+    # Best matches first, whichever artifact they come from
+    assert np.all(np.diff(distances(manager, query, results)) >= -1e-6)
+    # and no chunk left out scores better than the last one returned
+    every_chunk = [
+        doc for artifact_id in ["a1", "a2", "a3"] for doc in manager.search(artifact_id, query, search_kwargs={"k": 4})
+    ]
+    assert distances(manager, query, results).max() <= np.sort(distances(manager, query, every_chunk))[5] + 1e-6
+
+
+def test_failing_artifact_does_not_fail_the_search(manager, monkeypatch):
+    get_vector_store = manager.get_vector_store
+
+    def broken(artifact_id):
+        if artifact_id == "a2":
+            raise OSError("store unreadable")
+        return get_vector_store(artifact_id)
+
+    monkeypatch.setattr(manager, "get_vector_store", broken)
+
+    results = manager.search_all_artifacts("anchor buoy chart deck", max_results=8)
+
+    assert len(results) == 8
+    assert {doc.metadata["artifact_id"] for doc in results} == {"a1", "a3"}
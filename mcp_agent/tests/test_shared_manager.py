@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from mcp_agent.models.artifact_models import FileItem
+from mcp_agent.vector_store.manager.get_vector_manager import get_vector_manager
+
+
+def text_file(path: str, body: str) -> FileItem:
+    return FileItem(path=path, content=body, size=len(body))
+
+
+def test_every_caller_gets_the_same_manager(storage):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        managers = list(pool.map(lambda _: get_vector_manager(), range(16)))
+
+    assert all(manager is managers[0] for manager in managers)
+
+
+def test_update_swaps_a_new_store_into_the_cache(storage):
+    manager = get_vector_manager()
+    manager.create_artifact_vectors("a1", [text_file("src/a.py", "def first():\n    return 'first'\n")])
+    before = manager.get_vector_store("a1")
+    before_ids = dict(before.index_to_docstore_id)
+
+    manager.update_artifact_vectors("a1", [
+        text_file("src/a.py", "def first():\n    return 'first'\n"),
+        text_file("src/b.py", "def second():\n    return 'second'\n"),
+    ])
+    loads = manager.cache_stats()["loads"]
+    after = manager.get_vector_store("a1")
+
+    # The next search is served from the cache without reloading, and a store
+    # held by an in-flight search is never edited in place
+    assert manager.cache_stats()["loads"] == loads
+    assert after is not before
+    assert after.index.ntotal == before.index.ntotal + 1
+    assert before.index_to_docstore_id == before_ids
+    assert {doc.metadata["file_path"] for doc in manager.search("a1", "second", search_kwargs={"k": 2})} == {
+        "src/a.py", "src/b.py"
+    }
@@ -0,0 +1,105 @@
+from mcp_agent.vector_store.manager.splitters import CodeAwareSplitter, get_unit_extractor
+
+COMPONENT = """import React from 'react';
+import { TopBar } from './TopBar';
+
+// Shows the app shell
+export function App({ title }) {
+  const [open, setOpen] = React.useState(false);
+  return (
+    <div className="app">
+      <TopBar
+        title={title}
+        onMenu={() => setOpen(!open)}
+      />
+      <p>Don't close {open ? "yet" : "now"}</p>
+    </div>
+  );
+}
+
+export default App;
+"""
+
+STYLED = """import styled from 'styled-components';
+
+const Button = styled.button`
+color: red;
+${props => props.primary && `
+background: blue;
+`}
+`;
+
+const query = `
+SELECT * FROM users WHERE id IN (${ids.map((id) => { return id; }).join(",")})
+`;
+
+export default Button;
+"""
+
+
+def units(text: str, extension: str):
+    return [unit.strip() for unit in get_unit_extractor(extension)(text)]
+
+
+def test_jsx_component_is_one_unit_with_its_comment():
+    assert units(COMPONENT, "jsx") == [
+        "import React from 'react';",
+        "import { TopBar } from './TopBar';",
+        COMPONENT[COMPONENT.index("// Shows"):COMPONENT.index("export default")].strip(),
+        "export default App;",
+    ]
+
+
+def test_template_literal_lines_are_not_boundaries():
+    result = units(STYLED, "ts")
+
+    assert len(result) == 4
+    assert result[1].startswith("const Button") and result[1].endswith("`;")
+    assert result[2].startswith("const query") and "join" in result[2]
+    assert result[3] == "export default Button;"
+
+
+def test_braces_in_strings_and_comments_are_ignored():
+    text = "const open = '{';\n/* } {\n*/\nfunction f() {\n  return \"}\";\n}\nconst next = 1;\n"
+
+    assert units(text, "js") == [
+        "const open = '{';",
+        "/* } {\n*/\nfunction f() {\n  return \"}\";\n}",
+        "const next = 1;",
+    ]
+
+
+def test_css_rules_and_at_rules():
+    css = ".a { color: red; }\n@media (max-width: 600px) {\n  .a { color: blue; }\n}\n.b {\n  margin: 0;\n}\n"
+
+    assert units(css, "css") == [
+        ".a { color: red; }",
+        "@media (max-width: 600px) {\n  .a { color: blue; }\n}",
+        ".b {\n  margin: 0;\n}",
+    ]
+
+
+def test_html_splits_on_children_of_body():
+    html = (
+        "<html>\n<body>\n<header>\n  <h1>Title</h1>\n</header>\n"
+        "<main>\n  <p>Text</p>\n</main>\n</body>\n</html>\n"
+    )
+
+    result = units(html, "html")
+
+    assert "<header>\n  <h1>Title</h1>\n</header>" in result
+    assert any(unit.startswith("<main>") and "<p>Text</p>" in unit for unit in result)
+
+
+def test_units_are_packed_into_chunks_and_oversized_units_fall_back():
+    splitter = CodeAwareSplitter(chunk_size=120, chunk_overlap=20, unit_overlap=20)
+    small = "".join(f"export const value{i} = {i};\n" for i in range(10))
+    large = "function big() {\n" + "".join(f"  call{i}();\n" for i in range(30)) + "}\n"
+
+    chunks = splitter.split_text(small + large, "ts")
+
+    assert all(len(chunk) <= 120 for chunk in chunks)
+    # Small units are never cut in the middle
+    assert all(chunk.endswith(";") or chunk.endswith("}") or chunk.endswith(")") for chunk in chunks)
+    assert "export const value0 = 0;\nexport const value1 = 1;" in chunks[0]
+    assert splitter.split_text("plain words " * 30, "txt") == splitter.fallback_splitter.split_text("plain words " * 30)
@@ -0,0 +1,80 @@
+import faiss
+import numpy as np
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from mcp_agent.vector_store.manager.embeddings import HashingEmbeddings
+from mcp_agent.vector_store.manager.store_cache import VectorStoreCache, estimate_index_bytes, estimate_store_bytes
+
+
+@pytest.fixture(scope="module")
+def embeddings():
+    return HashingEmbeddings()
+
+
+def build_store(embeddings, count: int) -> FAISS:
+    docs = [Document(page_content=f"chunk item{i}", metadata={"n": i}) for i in range(count)]
+    return FAISS.from_documents(docs, embeddings)
+
+
+def test_eviction_keeps_least_recently_used_out(embeddings):
+    stores = {name: build_store(embeddings, 20) for name in ("a", "b", "c")}
+    size = estimate_store_bytes(stores["a"])
+    cache = VectorStoreCache(max_bytes=2 * size)
+
+    cache.put("a", stores["a"])
+    cache.put("b", stores["b"])
+    assert cache.get("a") is stores["a"]
+    cache.put("c", stores["c"])
+
+    # b was used least recently once a was read again
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache
+    assert cache.resident_bytes == 2 * size
+    assert cache.evictions == 1
+
+
+def test_pinned_store_survives_and_newest_is_kept_over_budget(embeddings):
+    big, small = build_store(embeddings, 40), build_store(embeddings, 5)
+    cache = VectorStoreCache(max_bytes=estimate_store_bytes(small))
+
+    cache.put("pinned", small)
+    cache.pin("pinned")
+    cache.put("big", big)
+
+    # Neither can be evicted: one is pinned and the other was just inserted
+    assert len(cache) == 2
+    assert cache.evictions == 0
+
+    # Once unpinned, the budget is enforced again
+    cache.unpin("pinned")
+    assert "pinned" not in cache
+    assert cache.stats()["resident_bytes"] <= cache.max_bytes
+
+
+def test_put_remeasures_a_replaced_store(embeddings):
+    cache = VectorStoreCache(max_bytes=10 ** 9)
+    cache.put("a", build_store(embeddings, 5))
+    cache.put("a", build_store(embeddings, 30))
+
+    assert len(cache) == 1
+    assert cache.resident_bytes == estimate_store_bytes(cache.get("a"))
+
+
+def test_index_estimates_count_graph_and_list_structures():
+    vectors = np.random.default_rng(0).random((500, 16), dtype=np.float32)
+    flat = faiss.IndexFlatL2(16)
+    hnsw = faiss.IndexHNSWFlat(16, 8)
+    ivf = faiss.IndexIVFFlat(faiss.IndexFlatL2(16), 16, 4)
+    ivf.train(vectors)
+    for index in (flat, hnsw, ivf):
+        index.add(vectors)
+
+    assert estimate_index_bytes(flat) == 500 * 16 * 4
+    assert estimate_index_bytes(flat, memory_mapped=True) == 0
+    assert estimate_index_bytes(hnsw) > estimate_index_bytes(flat)
+    # Mapped HNSW and IVF indexes still hold their links, centroids and id maps on the heap
+    assert estimate_index_bytes(hnsw, memory_mapped=True) > 0
+    assert estimate_index_bytes(ivf, memory_mapped=True) >= 4 * 16 * 4
+    assert estimate_index_bytes(ivf) >= estimate_index_bytes(ivf, memory_mapped=True) + 500 * (16 * 4 + 8)
@@ -0,0 +1,60 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from mcp_agent.main import _ndjson_lines
+from mcp_agent.utils.artifact_functions import load_artifact
+
+
+def chunked(body: bytes, size: int):
+    async def stream():
+        for start in range(0, len(body), size):
+            yield body[start:start + size]
+    return SimpleNamespace(stream=stream)
+
+
+def lines(request):
+    async def collect():
+        return [line async for line in _ndjson_lines(request)]
+    return asyncio.run(collect())
+
+
+BODY = b'{"a": 1}\n\n  {"b": "two"}  \r\n{"c": "\xc3\xa9"}\n{"d": 4}'
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 9, 64])
+def test_lines_survive_any_chunk_boundary(size):
+    assert lines(chunked(BODY, size)) == [b'{"a": 1}', b'{"b": "two"}', b'{"c": "\xc3\xa9"}', b'{"d": 4}']
+
+
+def test_empty_and_blank_bodies_have_no_lines():
+    assert lines(chunked(b"", 4)) == []
+    assert lines(chunked(b"\n \n\r\n", 2)) == []
+
+
+def ndjson(*records) -> bytes:
+    return b"".join(json.dumps(record).encode("utf-8") + b"\n" for record in records)
+
+
+def test_streamed_upload_is_saved(app):
+    body = ndjson(
+        {"artifact_id": "a1", "files": [{"path": "index.html", "content": "<main></main>", "size": 13}]},
+        {"path": "src/app.ts", "content": "export const app = 1;\n", "size": 22},
+        {"path": "src/theme.css", "content": ":root {}\n", "size": 9},
+    )
+
+    response = TestClient(app).post("/api/files/stream", content=body)
+
+    assert response.status_code == 200
+    assert response.json()["files_received"] == 3
+    assert response.json()["file_count"] == 3
+    assert len(app.state.vectorization_queue.submitted) == 1
+    assert sorted(f.path for f in load_artifact("a1").files) == ["index.html", "src/app.ts", "src/theme.css"]
+
+
+@pytest.mark.parametrize("body", [b"", b'{"artifact_id": "a1"}\n{"path": "x.ts"\n', b"not json\n"])
+def test_malformed_streams_are_rejected(app, body):
+    assert TestClient(app).post("/api/files/stream", content=body).status_code == 400
@@ -0,0 +1,65 @@
+import pytest
+
+from mcp_agent.models.artifact_models import FileItem, FilesRequest
+from mcp_agent.utils import trigram_index
+from mcp_agent.utils.artifact_functions import write_artifact_file
+from mcp_agent.utils.trigram_index import get_trigram_index, required_literals
+from mcp_agent.vector_store.tools.grep_artifacts import grep_artifacts
+
+
+@pytest.mark.parametrize("pattern, literals", [
+    ("obc-top-bar", ["obc-top-bar"]),
+    (r"import\s+React", ["import", "React"]),
+    (r"useState\(", ["useState("]),
+    (r"colou?r-primary", ["colo", "r-primary"]),
+    (r"items*\.map", ["item", ".map"]),
+    (r"export (default )?function", ["export ", "function"]),
+    (r"[A-Z]\w+Bar", ["Bar"]),
+    (r"width: \d{2,3}px;", ["width: ", "px;"]),
+    (r"^const handler", ["const handler"]),
+    (r"foo|barbaz", []),
+    (r"ab.cd", []),
+])
+def test_required_literals(pattern, literals):
+    assert required_literals(pattern) == literals
+
+
+def text_file(path: str, body: str) -> FileItem:
+    return FileItem(path=path, content=body, size=len(body))
+
+
+@pytest.fixture
+def artifact(storage, monkeypatch):
+    monkeypatch.setattr(trigram_index, "_indexes", type(trigram_index._indexes)())
+    write_artifact_file(FilesRequest(artifact_id="a1", files=[
+        text_file("src/App.jsx", "import React from 'react';\nexport default function App() {\n  return <obc-top-bar />;\n}\n"),
+        text_file("src/styles.css", ".bar {\n  color: red;\n  width: 120px;\n}\n"),
+    ]))
+
+
+def grep(**kwargs):
+    return grep_artifacts.invoke(kwargs)
+
+
+def test_grep_finds_literal_and_regex_lines(artifact):
+    assert grep(pattern="obc-top-bar") == [
+        {"artifact_id": "a1", "file_path": "src/App.jsx", "line": 3, "text": "return <obc-top-bar />;"}
+    ]
+    assert [hit["line"] for hit in grep(pattern=r"width: \d+px", regex=True)] == [3]
+    assert grep(pattern="obc-top-bar", file_extension="css") == []
+    assert grep(pattern="IMPORT REACT", case_sensitive=True) == []
+
+
+def test_index_is_saved_per_revision_and_rebuilt_after_a_save(artifact, monkeypatch):
+    first = get_trigram_index("a1")
+    # A new process, or one whose in-memory indexes were evicted, loads it from disk
+    with monkeypatch.context() as patched:
+        patched.setattr(trigram_index, "_indexes", type(trigram_index._indexes)())
+        patched.setattr(trigram_index.TrigramIndex, "build", None)
+        assert get_trigram_index("a1").postings == first.postings
+
+    write_artifact_file(FilesRequest(artifact_id="a1", files=[text_file("src/App.jsx", "const obcTopBar = 1;\n")]))
+
+    assert get_trigram_index("a1").revision == first.revision + 1
+    assert grep(pattern="obc-top-bar") == []
+    assert grep(pattern="obcTopBar")[0]["file_path"] == "src/App.jsx"
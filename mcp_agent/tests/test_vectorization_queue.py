@@ -0,0 +1,74 @@
+import asyncio
+
+from mcp_agent.utils import vectorization_queue
+from mcp_agent.utils.artifact_functions import ArtifactWrite
+from mcp_agent.utils.vectorization_queue import VectorizationQueue
+
+
+def snapshot(artifact_id: str, revision: int) -> ArtifactWrite:
+    return ArtifactWrite(artifact_id, revision, [{"path": f"file_{revision}.ts"}], True, revision > 1)
+
+
+class SlowRebuild:
+    """Stands in for aupdate_artifact_vectors, holding each rebuild until released"""
+
+    def __init__(self):
+        self.revisions = []
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def __call__(self, saved, raise_errors=False):
+        self.revisions.append(saved.revision)
+        self.started.set()
+        await self.release.wait()
+
+
+def test_saves_during_a_running_job_coalesce_into_one_follow_up(monkeypatch):
+    async def scenario():
+        rebuild = SlowRebuild()
+        monkeypatch.setattr(vectorization_queue, "aupdate_artifact_vectors", rebuild)
+        queue = VectorizationQueue()
+        await queue.start()
+
+        queue.submit(snapshot("a1", 1))
+        await rebuild.started.wait()
+        for revision in range(2, 7):
+            status = queue.submit(snapshot("a1", revision))
+
+        assert status["state"] == "queued"
+        assert status["coalesced"] == 4
+        assert status["running"]["state"] == "running"
+
+        rebuild.release.set()
+        await queue._queue.join()
+        await queue.stop()
+        return rebuild.revisions, queue.get_status("a1")
+
+    revisions, status = asyncio.run(scenario())
+
+    # The running job finishes, then one job rebuilds the latest save
+    assert revisions == [1, 6]
+    assert status["state"] == "done"
+    assert "running" not in status
+
+
+def test_finished_jobs_are_pruned_past_the_cap_and_ttl(monkeypatch):
+    async def rebuild(saved, raise_errors=False):
+        pass
+
+    async def scenario(queue):
+        await queue.start()
+        for i in range(5):
+            queue.submit(snapshot(f"a{i}", 1))
+            await queue._queue.join()
+        await queue.stop()
+
+    monkeypatch.setattr(vectorization_queue, "aupdate_artifact_vectors", rebuild)
+
+    capped = VectorizationQueue(max_finished_jobs=2)
+    asyncio.run(scenario(capped))
+    assert [capped.get_status(f"a{i}") is not None for i in range(5)] == [False, False, False, True, True]
+
+    expired = VectorizationQueue(job_ttl=0)
+    asyncio.run(scenario(expired))
+    assert expired.stats()["jobs"] == {}